@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import chain
+
+from sqlalchemy import event, func, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import (
+    Admin,
+    DailyAttendance,
+    SectionCalendarBitmap,
+    Semester,
+    SemesterSettings,
+    Student,
+    StudentAttendanceBitmap,
+)
+from app.section_calendar import section_holidays
+
+
+# Without a configured semester the bitmaps start at the academic year (July)
+ACADEMIC_YEAR_START_MONTH = 7
+
+PRESENT, OD, ABSENT = "PRESENT", "OD", "ABSENT"
+
+Section = tuple[str, str, str]
+
+
+# -------------------- BIT HELPERS --------------------
+def _int(blob: bytes | None) -> int:
+    return int.from_bytes(blob or b"", "little")
+
+
+def _blob(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def _normalize(status: str | None) -> str:
+    u = (status or "").strip().upper()
+    return u if u in (PRESENT, OD) else ABSENT
+
+
+def _absence_runs(absent: int, class_days: int, length: int) -> tuple[int, int]:
+    """(longest, current) count of absences in a row, skipping days without class.
+
+    Non-class days are filled with 1s so they join the runs around them; each
+    maximal run of 1s is isolated with `fill & ~(fill + lowest_bit)` and its
+    absences are a popcount.
+    """
+    if length <= 0:
+        return 0, 0
+    fill = absent | (~class_days & ((1 << length) - 1))
+    top = 1 << (length - 1)
+    longest = current = 0
+    while fill:
+        run = fill & ~(fill + (fill & -fill))
+        count = (run & absent).bit_count()
+        longest = max(longest, count)
+        if run & top:
+            current = count
+        fill ^= run
+    return longest, current
+
+
+# -------------------- SEMESTER ORIGIN --------------------
+def _fallback_origin(today: date) -> date:
+    year = today.year if today.month >= ACADEMIC_YEAR_START_MONTH else today.year - 1
+    return date(year, ACADEMIC_YEAR_START_MONTH, 1)
+
+
+def semester_origins(db: Session, sections: set[Section], *, today: date | None = None) -> dict[Section, date]:
+    """Start of the current semester per section (bit 0 of its bitmaps)."""
+    today = today or date.today()
+    origins = {s: _fallback_origin(today) for s in sections}
+    if not sections:
+        return origins
+    for department, year, section, start in (
+        db.query(Admin.department, Admin.year, Admin.section, func.max(SemesterSettings.start_date))
+        .join(SemesterSettings, SemesterSettings.admin_id == Admin.admin_id)
+        .filter(
+            tuple_(Admin.department, Admin.year, Admin.section).in_(list(sections)),
+            SemesterSettings.start_date <= today,
+        )
+        .group_by(Admin.department, Admin.year, Admin.section)
+    ):
+        if start is not None:
+            origins[(department, year, section)] = start
+    # after a reset the new semester starts at the switch, even if the configured dates are older
+    for department, year, section, start in db.query(
+        Semester.department, Semester.year, Semester.section, Semester.start_date
+    ).filter(
+        Semester.status == "ACTIVE",
+        Semester.start_date.isnot(None),
+        Semester.start_date <= today,
+        tuple_(Semester.department, Semester.year, Semester.section).in_(list(sections)),
+    ):
+        key = (department, year, section)
+        origins[key] = max(origins[key], start)
+    return origins
+
+
+# -------------------- BUILD / UPSERT --------------------
+def _upsert(db: Session, model, key: dict, values: dict) -> None:
+    dialect = db.get_bind().dialect.name
+    row = {**key, **values, "updated_at": datetime.utcnow()}
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(model).values(**row)
+        stmt = stmt.on_conflict_do_update(index_elements=list(key), set_={k: row[k] for k in (*values, "updated_at")})
+        db.execute(stmt)
+        return
+
+    where = [getattr(model, k) == v for k, v in key.items()]
+    if not db.execute(update(model).where(*where).values(**values)).rowcount:
+        db.execute(model.__table__.insert().values(**row))
+
+
+def _build_student(db: Session, student_id: int, origin: date) -> dict:
+    planes = {PRESENT: 0, OD: 0, ABSENT: 0}
+    for day, status in db.query(DailyAttendance.date, DailyAttendance.status).filter(
+        DailyAttendance.student_id == student_id, DailyAttendance.date >= origin
+    ):
+        planes[_normalize(status)] |= 1 << (day - origin).days
+    values = {
+        "present_bits": _blob(planes[PRESENT]),
+        "od_bits": _blob(planes[OD]),
+        "absent_bits": _blob(planes[ABSENT]),
+    }
+    _upsert(db, StudentAttendanceBitmap, {"student_id": student_id, "origin": origin}, values)
+    return values
+
+
+def _build_section(db: Session, section: Section, origin: date) -> bytes:
+    department, year, sec = section
+    bits = 0
+    for (day,) in (
+        db.query(DailyAttendance.date)
+        .join(Student, Student.id == DailyAttendance.student_id)
+        .filter(
+            Student.department == department,
+            Student.year == year,
+            Student.section == sec,
+            DailyAttendance.date >= origin,
+        )
+        .distinct()
+    ):
+        bits |= 1 << (day - origin).days
+    blob = _blob(bits)
+    _upsert(
+        db,
+        SectionCalendarBitmap,
+        {"department": department, "year": year, "section": sec, "origin": origin},
+        {"class_bits": blob},
+    )
+    return blob
+
+
+# -------------------- INCREMENTAL MAINTENANCE --------------------
+@event.listens_for(Session, "after_flush")
+def _sync_bitmaps_on_attendance_write(session, flush_context):
+    """Patch the touched days into existing bitmaps (or build missing ones) in the same transaction.
+
+    Runs after the flush so the final state of each touched (student, day) can
+    be read back, which also covers deletes.
+    """
+    touched: set[tuple[int, date]] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, DailyAttendance):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if obj.student_id is not None and obj.date is not None:
+            touched.add((obj.student_id, obj.date))
+    if not touched:
+        return
+
+    student_ids = {sid for sid, _ in touched}
+    days = {day for _, day in touched}
+    section_of = {
+        sid: (department, year, section)
+        for sid, department, year, section in session.query(
+            Student.id, Student.department, Student.year, Student.section
+        ).filter(Student.id.in_(student_ids))
+    }
+    origins = semester_origins(session, set(section_of.values()))
+
+    status_of = {
+        (sid, day): _normalize(status)
+        for sid, day, status in session.query(
+            DailyAttendance.student_id, DailyAttendance.date, DailyAttendance.status
+        ).filter(DailyAttendance.student_id.in_(student_ids), DailyAttendance.date.in_(days))
+    }
+
+    # ---- student planes ----
+    existing = {
+        (row.student_id, row.origin): row
+        for row in session.query(
+            StudentAttendanceBitmap.student_id,
+            StudentAttendanceBitmap.origin,
+            StudentAttendanceBitmap.present_bits,
+            StudentAttendanceBitmap.od_bits,
+            StudentAttendanceBitmap.absent_bits,
+        )
+        .filter(
+            tuple_(StudentAttendanceBitmap.student_id, StudentAttendanceBitmap.origin).in_(
+                [(sid, origins[sec]) for sid, sec in section_of.items()]
+            )
+        )
+        .with_for_update()
+    }
+    by_student: dict[int, list[date]] = {}
+    for sid, day in touched:
+        if sid in section_of and day >= origins[section_of[sid]]:
+            by_student.setdefault(sid, []).append(day)
+
+    for sid, student_days in by_student.items():
+        origin = origins[section_of[sid]]
+        row = existing.get((sid, origin))
+        if row is None:
+            _build_student(session, sid, origin)
+            continue
+        planes = {PRESENT: _int(row.present_bits), OD: _int(row.od_bits), ABSENT: _int(row.absent_bits)}
+        for day in student_days:
+            bit = 1 << (day - origin).days
+            for key in planes:
+                planes[key] &= ~bit
+            status = status_of.get((sid, day))
+            if status is not None:
+                planes[status] |= bit
+        _upsert(
+            session,
+            StudentAttendanceBitmap,
+            {"student_id": sid, "origin": origin},
+            {
+                "present_bits": _blob(planes[PRESENT]),
+                "od_bits": _blob(planes[OD]),
+                "absent_bits": _blob(planes[ABSENT]),
+            },
+        )
+
+    # ---- section class days ----
+    section_days: dict[Section, set[date]] = {}
+    for sid, student_days in by_student.items():
+        section_days.setdefault(section_of[sid], set()).update(student_days)
+    if not section_days:
+        return
+
+    held = {
+        (department, year, section, day)
+        for department, year, section, day in session.query(
+            Student.department, Student.year, Student.section, DailyAttendance.date
+        )
+        .join(DailyAttendance, DailyAttendance.student_id == Student.id)
+        .filter(
+            tuple_(Student.department, Student.year, Student.section).in_(list(section_days)),
+            DailyAttendance.date.in_(set().union(*section_days.values())),
+        )
+        .distinct()
+    }
+    calendars = {
+        (row.department, row.year, row.section): row
+        for row in session.query(
+            SectionCalendarBitmap.department,
+            SectionCalendarBitmap.year,
+            SectionCalendarBitmap.section,
+            SectionCalendarBitmap.class_bits,
+        )
+        .filter(
+            tuple_(
+                SectionCalendarBitmap.department,
+                SectionCalendarBitmap.year,
+                SectionCalendarBitmap.section,
+                SectionCalendarBitmap.origin,
+            ).in_([(*sec, origins[sec]) for sec in section_days])
+        )
+        .with_for_update()
+    }
+    for sec, sec_days in section_days.items():
+        origin = origins[sec]
+        row = calendars.get(sec)
+        if row is None:
+            _build_section(session, sec, origin)
+            continue
+        bits = _int(row.class_bits)
+        for day in sec_days:
+            bit = 1 << (day - origin).days
+            bits = bits | bit if (*sec, day) in held else bits & ~bit
+        _upsert(
+            session,
+            SectionCalendarBitmap,
+            {"department": sec[0], "year": sec[1], "section": sec[2], "origin": origin},
+            {"class_bits": _blob(bits)},
+        )
+
+
+# -------------------- QUERIES --------------------
+def _build_missing(student_id: int, section: Section, origin: date, planes, calendar) -> tuple:
+    """Build whichever of the student planes / section calendar is missing and commit them."""
+    db = SessionLocal()
+    try:
+        if planes is None:
+            values = _build_student(db, student_id, origin)
+            planes = (values["present_bits"], values["od_bits"], values["absent_bits"])
+        if calendar is None:
+            calendar = _build_section(db, section, origin)
+        db.commit()
+    finally:
+        db.close()
+    return planes, calendar
+
+
+@dataclass(frozen=True)
+class AttendanceStats:
+    origin: date
+    class_days: int  # days the section held attendance this semester
+    marked_days: int  # days with a DailyAttendance row for this student
+    present_days: int
+    od_days: int
+    absent_days: int  # class days without PRESENT / OD (explicit or unmarked)
+    percentage: float  # present / class days
+    longest_absence_streak: int
+    current_absence_streak: int
+
+
+def student_attendance_stats(db: Session, student: Student, *, today: date | None = None) -> AttendanceStats:
+    """Semester stats for one student from two small blobs: popcounts and bit scans.
+
+    Missing bitmaps (first read of a semester) are built once, in a session of
+    their own: db is only read, so GET handlers never commit through it.
+    """
+    today = today or date.today()
+    section = (student.department, student.year, student.section)
+    origin = semester_origins(db, {section}, today=today)[section]
+
+    planes = (
+        db.query(
+            StudentAttendanceBitmap.present_bits,
+            StudentAttendanceBitmap.od_bits,
+            StudentAttendanceBitmap.absent_bits,
+        )
+        .filter(StudentAttendanceBitmap.student_id == student.id, StudentAttendanceBitmap.origin == origin)
+        .first()
+    )
+    calendar = (
+        db.query(SectionCalendarBitmap.class_bits)
+        .filter(
+            SectionCalendarBitmap.department == student.department,
+            SectionCalendarBitmap.year == student.year,
+            SectionCalendarBitmap.section == student.section,
+            SectionCalendarBitmap.origin == origin,
+        )
+        .scalar()
+    )
+    if planes is None or calendar is None:
+        planes, calendar = _build_missing(student.id, section, origin, planes, calendar)
+
+    # the bitmap records days attendance was taken; declared holidays never count
+    off = 0
+    for d in section_holidays(db, section, origin, today):
+        off |= 1 << (d - origin).days
+    present, od, explicit_absent = (_int(p) & ~off for p in planes)
+    class_days = _int(calendar) & ~off
+    attended = present | od
+    absent = class_days & ~attended
+    length = max((today - origin).days + 1, class_days.bit_length(), 0)
+    longest, current = _absence_runs(absent, class_days, length)
+
+    held = class_days.bit_count()
+    present_days = present.bit_count()
+    return AttendanceStats(
+        origin=origin,
+        class_days=held,
+        marked_days=(attended | explicit_absent).bit_count(),
+        present_days=present_days,
+        od_days=od.bit_count(),
+        absent_days=absent.bit_count(),
+        percentage=round(present_days * 100 / held, 2) if held else 0,
+        longest_absence_streak=longest,
+        current_absence_streak=current,
+    )
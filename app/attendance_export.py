@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from datetime import date, timedelta
+from typing import Iterator
+
+from sqlalchemy import and_, select
+
+from app.database import SessionLocal
+from app.models import Admin, Attendance, DailyAttendance, Student, TimeSlot
+
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_GRANULARITIES = ("day", "slot")
+EXPORT_MAX_DAYS = int(os.getenv("EXPORT_MAX_DAYS", "366"))
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "2000"))
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _dates(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _scope_filter(department: str, year: str | None, section: str | None):
+    clauses = [Student.department == department]
+    if year is not None:
+        clauses.append(Student.year == year)
+    if section is not None:
+        clauses.append(Student.section == section)
+    return and_(*clauses)
+
+
+def _matrix_statement(scope, start: date, end: date, granularity: str):
+    """Every student in scope, outer-joined to their marks, ordered so each student's cells are contiguous."""
+    student_cols = (Student.id, Student.roll_number, Student.name, Student.department, Student.year, Student.section)
+    order = (Student.department, Student.year, Student.section, Student.roll_number, Student.id)
+    if granularity == "slot":
+        mark = Attendance
+        extra = (Attendance.date, Attendance.slot, Attendance.status)
+        on = and_(Attendance.student_id == Student.id, Attendance.date >= start, Attendance.date <= end)
+        order = order + (Attendance.date, Attendance.slot)
+    else:
+        mark = DailyAttendance
+        extra = (DailyAttendance.date, DailyAttendance.status)
+        on = and_(DailyAttendance.student_id == Student.id, DailyAttendance.date >= start, DailyAttendance.date <= end)
+        order = order + (DailyAttendance.date,)
+    return (
+        select(*student_cols, *extra)
+        .outerjoin(mark, on)
+        .where(scope)
+        .order_by(*order)
+        # server-side cursor: rows arrive in batches while the query is still running
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+
+
+def _students(rows, granularity: str) -> Iterator[tuple[tuple, dict]]:
+    """Group the ordered row stream into (student, {key: status}) without buffering beyond one student."""
+    current_id = None
+    student = None
+    cells: dict = {}
+    for row in rows:
+        if row.id != current_id:
+            if current_id is not None:
+                yield student, cells
+            current_id = row.id
+            student = (row.roll_number, row.name, row.department, row.year, row.section)
+            cells = {}
+        if row.date is None:
+            continue
+        key = (row.date, row.slot) if granularity == "slot" else row.date
+        cells[key] = row.status
+    if current_id is not None:
+        yield student, cells
+
+
+def _slot_columns(db, department: str, year: str | None, section: str | None) -> list[tuple[int, str]]:
+    q = db.query(TimeSlot.id, TimeSlot.slot_name).join(Admin, Admin.admin_id == TimeSlot.admin_id)
+    q = q.filter(Admin.department == department)
+    if year is not None:
+        q = q.filter(Admin.year == year)
+    if section is not None:
+        q = q.filter(Admin.section == section)
+    return [(sid, name) for sid, name in q.order_by(TimeSlot.start_time, TimeSlot.id).distinct()]
+
+
+def stream_attendance_matrix(
+    *,
+    department: str,
+    year: str | None,
+    section: str | None,
+    start: date,
+    end: date,
+    fmt: str = "csv",
+    granularity: str = "day",
+) -> Iterator[bytes]:
+    """Yield the students x dates (or x date-slots) matrix one student at a time.
+
+    Opens its own session: the generator runs after the request's dependencies
+    have been torn down. Memory is bounded by one student row plus one fetch batch.
+    """
+    db = SessionLocal()
+    try:
+        days = _dates(start, end)
+        slots = _slot_columns(db, department, year, section) if granularity == "slot" else []
+        slot_names = dict(slots)
+        if granularity == "slot":
+            keys = [(d, sid) for d in days for sid, _ in slots]
+            labels = [f"{d.isoformat()} {name}" for d in days for _, name in slots]
+        else:
+            keys = days
+            labels = [d.isoformat() for d in days]
+
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+
+        def flush() -> bytes:
+            data = buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            return data
+
+        if fmt == "csv":
+            writer.writerow(["roll_number", "name", "department", "year", "section", *labels])
+            yield flush()
+
+        rows = db.execute(_matrix_statement(_scope_filter(department, year, section), start, end, granularity))
+        for (roll, name, dept, yr, sec), cells in _students(rows, granularity):
+            if fmt == "csv":
+                writer.writerow([roll, name, dept, yr, sec, *[cells.get(k) or "" for k in keys]])
+                yield flush()
+            else:
+                if granularity == "slot":
+                    marks = {
+                        f"{d.isoformat()} {slot_names.get(sid, sid)}": status
+                        for (d, sid), status in cells.items()
+                    }
+                else:
+                    marks = {d.isoformat(): status for d, status in cells.items()}
+                yield (json.dumps({
+                    "roll_number": roll,
+                    "name": name,
+                    "department": dept,
+                    "year": yr,
+                    "section": sec,
+                    "attendance": marks,
+                }) + "\n").encode("utf-8")
+    finally:
+        db.close()
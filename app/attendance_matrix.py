@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models import Attendance, DailyAttendance, Student
+from app.semesters import active_semester_start
+
+
+# int8 status codes; 0 means "no mark" (no class that day, or not yet marked)
+UNMARKED, PRESENT, ABSENT, OD = 0, 1, 2, 3
+STATUS_LABELS = {UNMARKED: None, PRESENT: "PRESENT", ABSENT: "ABSENT", OD: "OD"}
+
+DEFAULTER_THRESHOLD = 75.0
+
+
+def _status_code(column):
+    """Map the free-form status strings ("PRESENT", "Present", "OD", ...) to codes in SQL."""
+    upper = func.upper(column)
+    return case(
+        (upper == "PRESENT", PRESENT),
+        (upper == "OD", OD),
+        else_=ABSENT,
+    )
+
+
+@dataclass
+class AttendanceMatrix:
+    """Dense attendance for one section over [start, start + len(days)).
+
+    daily[i, d] is the DailyAttendance code of student i on days[d];
+    slots[i, d, k] is the Attendance code of student i in slot_ids[k] on days[d].
+    """
+
+    student_ids: np.ndarray
+    rolls: list[str]
+    names: list[str]
+    days: list[date]  # datetime64[D] array when loaded from a semester snapshot
+    daily: np.ndarray
+    slot_ids: list[int]
+    slots: np.ndarray
+
+    @property
+    def working_day_mask(self) -> np.ndarray:
+        """Days on which anyone in the section was marked."""
+        return (self.daily != UNMARKED).any(axis=0)
+
+    @property
+    def working_days(self) -> int:
+        return int(self.working_day_mask.sum())
+
+    def present_days(self, *, count_od: bool = False) -> np.ndarray:
+        present = self.daily == PRESENT
+        if count_od:
+            present |= self.daily == OD
+        return present.sum(axis=1)
+
+    def percentages(self, *, count_od: bool = False) -> np.ndarray:
+        working = self.working_days
+        if not working:
+            return np.zeros(len(self.rolls))
+        return np.round(self.present_days(count_od=count_od) * 100.0 / working, 2)
+
+    def defaulters(self, threshold: float = DEFAULTER_THRESHOLD, *, count_od: bool = True) -> np.ndarray:
+        """Row indices below threshold, lowest percentage first."""
+        pct = self.percentages(count_od=count_od)
+        idx = np.flatnonzero(pct < threshold)
+        return idx[np.argsort(pct[idx], kind="stable")]
+
+    def weekday_heatmap(self) -> np.ndarray:
+        """Present rate (0-100) per weekday Mon..Sun over marked cells; NaN where nothing was marked."""
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekdays = (np.asarray(self.days, dtype="datetime64[D]").astype(np.int64) + 3) % 7
+        marked = (self.daily != UNMARKED).sum(axis=0)
+        present = ((self.daily == PRESENT) | (self.daily == OD)).sum(axis=0)
+        marked_by_day = np.bincount(weekdays, weights=marked, minlength=7)
+        present_by_day = np.bincount(weekdays, weights=present, minlength=7)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.round(present_by_day * 100.0 / marked_by_day, 2)
+
+    def slot_heatmap(self) -> np.ndarray:
+        """Present rate (0-100) per slot_ids column over marked cells; NaN where nothing was marked."""
+        marked = (self.slots != UNMARKED).sum(axis=(0, 1))
+        present = ((self.slots == PRESENT) | (self.slots == OD)).sum(axis=(0, 1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.round(present * 100.0 / marked, 2)
+
+    def absence_streaks(self) -> tuple[np.ndarray, np.ndarray]:
+        """(longest, current) run of consecutive absent working days per student."""
+        absent = (self.daily[:, self.working_day_mask] == ABSENT).astype(np.int32)
+        if absent.shape[1] == 0:
+            zeros = np.zeros(len(self.rolls), dtype=np.int32)
+            return zeros, zeros
+        total = np.cumsum(absent, axis=1)
+        # running total as of the last non-absent day: subtracting it restarts the count
+        reset = np.maximum.accumulate(np.where(absent == 0, total, 0), axis=1)
+        runs = total - reset
+        return runs.max(axis=1), runs[:, -1]
+
+
+def load_section_matrix(
+    db: Session,
+    *,
+    department: str,
+    year: str,
+    section: str,
+    start: date,
+    end: date,
+    include_slots: bool = False,
+    semester_id: int | None = None,
+) -> AttendanceMatrix:
+    """Load one section's marks in [start, end] into int8 arrays: one query per attendance table.
+
+    With semester_id, only rows stamped with that semester are loaded.
+    """
+    students = (
+        db.query(Student.id, Student.roll_number, Student.name)
+        .filter(Student.department == department, Student.year == year, Student.section == section)
+        .order_by(Student.id)
+        .all()
+    )
+    student_ids = np.array([s.id for s in students], dtype=np.int64)
+    n_days = max((end - start).days + 1, 0)
+    days = [start + timedelta(days=i) for i in range(n_days)]
+    scope = (Student.department == department, Student.year == year, Student.section == section)
+
+    daily = np.zeros((len(students), n_days), dtype=np.int8)
+    rows = (
+        db.query(DailyAttendance.student_id, DailyAttendance.date, _status_code(DailyAttendance.status))
+        .join(Student, Student.id == DailyAttendance.student_id)
+        .filter(*scope, DailyAttendance.date >= start, DailyAttendance.date <= end)
+    )
+    if semester_id is not None:
+        rows = rows.filter(DailyAttendance.semester_id == semester_id)
+    rows = rows.all()
+    if rows and len(student_ids):
+        sid, day, code = zip(*rows)
+        daily[_rows(student_ids, sid), _cols(start, day)] = code
+
+    slot_ids: list[int] = []
+    slots = np.zeros((len(students), n_days, 0), dtype=np.int8)
+    if include_slots:
+        rows = (
+            db.query(Attendance.student_id, Attendance.date, Attendance.slot, _status_code(Attendance.status))
+            .join(Student, Student.id == Attendance.student_id)
+            .filter(*scope, Attendance.date >= start, Attendance.date <= end)
+        )
+        if semester_id is not None:
+            rows = rows.filter(Attendance.semester_id == semester_id)
+        rows = rows.all()
+        if rows and len(student_ids):
+            sid, day, slot, code = zip(*rows)
+            slot_arr = np.array(slot, dtype=np.int64)
+            slot_values = np.unique(slot_arr)
+            slot_ids = slot_values.tolist()
+            slots = np.zeros((len(students), n_days, len(slot_ids)), dtype=np.int8)
+            slots[_rows(student_ids, sid), _cols(start, day), np.searchsorted(slot_values, slot_arr)] = code
+
+    return AttendanceMatrix(
+        student_ids=student_ids,
+        rolls=[s.roll_number for s in students],
+        names=[s.name for s in students],
+        days=days,
+        daily=daily,
+        slot_ids=slot_ids,
+        slots=slots,
+    )
+
+
+def _rows(student_ids: np.ndarray, sids) -> np.ndarray:
+    # student_ids is sorted (ordered by id), so a binary search maps ids to rows
+    return np.searchsorted(student_ids, np.array(sids, dtype=np.int64))
+
+
+def _cols(start: date, days) -> np.ndarray:
+    # a dict lookup per row is far cheaper than numpy's date-object conversion
+    column = {}
+    out = np.empty(len(days), dtype=np.int64)
+    for i, d in enumerate(days):
+        c = column.get(d)
+        if c is None:
+            c = column[d] = (d - start).days
+        out[i] = c
+    return out
+
+
+def section_date_range(
+    db: Session, *, department: str, year: str, section: str, semester_id: int | None = None
+) -> tuple[date, date] | None:
+    """First and last marked day of a section's active semester (or of semester_id), None if it has no marks."""
+    q = (
+        db.query(func.min(DailyAttendance.date), func.max(DailyAttendance.date))
+        .join(Student, Student.id == DailyAttendance.student_id)
+        .filter(Student.department == department, Student.year == year, Student.section == section)
+    )
+    if semester_id is not None:
+        q = q.filter(DailyAttendance.semester_id == semester_id)
+    else:
+        started = active_semester_start(db, department, year, section)
+        if started is not None:
+            # rows of a just-closed semester may still be waiting for the archiver
+            q = q.filter(DailyAttendance.date >= started)
+    first, last = q.one()
+    return (first, last) if first else None
@@ -0,0 +1,113 @@
+"""Local stand-in for the Twilio Messages API (tests and load benchmarks).
+
+    python -m app.fake_twilio --port 8765 --fail-every 50
+
+then run the app with SMS_TRANSPORT=twilio, TWILIO_API_BASE_URL=http://127.0.0.1:8765
+and any TWILIO_ACCOUNT_SID / TWILIO_AUTH_TOKEN / TWILIO_FROM_NUMBER.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+MESSAGES_PATH = re.compile(r"^/2010-04-01/Accounts/(?P<sid>[^/]+)/Messages\.json$")
+
+
+class FakeTwilioServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_every: int = 0):
+        super().__init__(address, _Handler)
+        self.fail_every = fail_every
+        self.messages: list[dict] = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeTwilioServer
+
+    def log_message(self, format, *args):
+        return
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        match = MESSAGES_PATH.match(self.path.split("?", 1)[0])
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+        if not match:
+            self._reply(404, {"code": 20404, "message": "The requested resource was not found", "status": 404})
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+            fail = self.server.fail_every and self.server.requests % self.server.fail_every == 0
+
+        if fail:
+            self._reply(429, {"code": 20429, "message": "Too Many Requests", "status": 429})
+            return
+
+        to = (form.get("To") or [""])[0]
+        if not to.startswith("+"):
+            self._reply(400, {"code": 21211, "message": f"The 'To' number {to} is not a valid phone number.", "status": 400})
+            return
+
+        now = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S +0000")
+        msg = {
+            "sid": "SM" + uuid.uuid4().hex,
+            "account_sid": match.group("sid"),
+            "to": to,
+            "from": (form.get("From") or [""])[0],
+            "body": (form.get("Body") or [""])[0],
+            "status": "queued",
+            "num_segments": "1",
+            "direction": "outbound-api",
+            "date_created": now,
+            "date_updated": now,
+            "date_sent": None,
+            "price": None,
+            "error_code": None,
+            "error_message": None,
+            "uri": f"{self.path[:-5]}/{uuid.uuid4().hex}.json",
+        }
+        with self.server.lock:
+            self.server.messages.append(msg)
+        self._reply(201, msg)
+
+
+def start_fake_twilio(host: str = "127.0.0.1", port: int = 0, fail_every: int = 0) -> FakeTwilioServer:
+    """Start in a background thread; port=0 picks a free port (see server.base_url)."""
+    server = FakeTwilioServer((host, port), fail_every=fail_every)
+    threading.Thread(target=server.serve_forever, name="fake-twilio", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Twilio Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+
+    srv = FakeTwilioServer((args.host, args.port), fail_every=args.fail_every)
+    print(f"fake twilio listening on {srv.base_url}")
+    srv.serve_forever()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import and_, func, literal_column, or_, select, text
+from sqlalchemy.orm import Query, Session
+
+from app.models import GrievanceRequest, ProofBlob
+
+
+GRIEVANCE_MAX_LIMIT = 200
+
+# SQLite: external-content FTS5 table over description + review_remarks, kept current by triggers
+GRIEVANCES_FTS = "grievances_fts"
+# Postgres: generated tsvector column on grievance_requests (GIN indexed)
+SEARCH_VECTOR = "search_vector"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_status(value: str) -> str:
+    return value.strip().upper().replace(" ", "_")
+
+
+# -------------------- BACKENDS --------------------
+_ready: dict[str, bool] = {}
+
+
+def _has_index(db: Session) -> bool:
+    """Whether the startup upgrade managed to create this database's text index."""
+    dialect = db.get_bind().dialect.name
+    if dialect not in _ready:
+        if dialect == "sqlite":
+            sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+            name = GRIEVANCES_FTS
+        elif dialect == "postgresql":
+            sql = (
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'grievance_requests' AND column_name = :name"
+            )
+            name = SEARCH_VECTOR
+        else:
+            _ready[dialect] = False
+            return False
+        _ready[dialect] = bool(db.execute(text(sql), {"name": name}).first())
+    return _ready[dialect]
+
+
+def _apply_text(db: Session, query: Query, q: str | None):
+    """Restrict query to grievances matching every word of q; (query, relevance order or None).
+
+    The last word also matches as a prefix, so "wif" finds "wifi".
+    """
+    terms = _WORD.findall((q or "").lower())
+    if not terms:
+        return query, None
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite" and _has_index(db):
+        expr = " ".join([f'"{t}"' for t in terms[:-1]] + [f'"{terms[-1]}"*'])
+        matched = (
+            select(
+                literal_column("rowid").label("id"),
+                literal_column(f"bm25({GRIEVANCES_FTS})").label("score"),
+            )
+            .select_from(text(GRIEVANCES_FTS))
+            .where(text(f"{GRIEVANCES_FTS} MATCH :expr").bindparams(expr=expr))
+            .subquery()
+        )
+        # bm25 is lower-is-better
+        return query.join(matched, matched.c.id == GrievanceRequest.id), matched.c.score.asc()
+
+    if dialect == "postgresql" and _has_index(db):
+        tsquery = func.to_tsquery("english", " & ".join(terms[:-1] + [f"{terms[-1]}:*"]))
+        vector = literal_column(f"grievance_requests.{SEARCH_VECTOR}")
+        return query.filter(vector.op("@@")(tsquery)), func.ts_rank(vector, tsquery).desc()
+
+    # no text index: substring match per word
+    return query.filter(
+        and_(
+            *[
+                or_(GrievanceRequest.description.ilike(f"%{t}%"), GrievanceRequest.review_remarks.ilike(f"%{t}%"))
+                for t in terms
+            ]
+        )
+    ), None
+
+
+def _month(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(GrievanceRequest.request_date, "YYYY-MM")
+    return func.strftime("%Y-%m", GrievanceRequest.request_date)
+
+
+# -------------------- SEARCH --------------------
+def search_grievances(
+    db: Session,
+    *,
+    department: str,
+    year: str,
+    section: str,
+    q: str | None = None,
+    status: str | None = None,
+    grievance_type: str | None = None,
+    month: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+) -> tuple[list[tuple[GrievanceRequest, str | None]], int, dict]:
+    """One section's grievances filtered by text and facets; (page, total, facets).
+
+    Page rows are (grievance, proof preview path), best match first when q is
+    given, otherwise newest first; limit None returns everything (offset
+    ignored). Facet counts (status, type, month) cover the text matches before
+    the facet filters, so each option shows how many results picking it gives.
+    """
+    scope = (
+        GrievanceRequest.department == department,
+        GrievanceRequest.year == year,
+        GrievanceRequest.section == section,
+    )
+    month_expr = _month(db)
+
+    facet_query, _ = _apply_text(
+        db,
+        db.query(GrievanceRequest.status, GrievanceRequest.grievance_type, month_expr, func.count()).filter(*scope),
+        q,
+    )
+    facets: dict[str, dict[str, int]] = {"status": {}, "grievance_type": {}, "month": {}}
+    for status_value, type_value, month_value, count in facet_query.group_by(
+        GrievanceRequest.status, GrievanceRequest.grievance_type, month_expr
+    ):
+        for key, value in (("status", status_value), ("grievance_type", type_value), ("month", month_value)):
+            facets[key][value] = facets[key].get(value, 0) + count
+
+    query, relevance = _apply_text(
+        db,
+        db.query(GrievanceRequest, ProofBlob.preview_path)
+        .outerjoin(ProofBlob, ProofBlob.sha256 == GrievanceRequest.proof_sha256)
+        .filter(*scope),
+        q,
+    )
+    if status:
+        query = query.filter(GrievanceRequest.status == normalize_status(status))
+    if grievance_type:
+        query = query.filter(GrievanceRequest.grievance_type == grievance_type.strip().upper())
+    if month:
+        query = query.filter(month_expr == month.strip())
+
+    order = [GrievanceRequest.created_at.desc(), GrievanceRequest.id.desc()]
+    if relevance is not None:
+        order.insert(0, relevance)
+    query = query.order_by(*order)
+
+    if limit is None:
+        rows = [(g, preview) for g, preview in query.all()]
+        return rows, len(rows), facets
+
+    page = (
+        query.add_columns(func.count().over())
+        .limit(min(max(limit, 1), GRIEVANCE_MAX_LIMIT))
+        .offset(max(offset, 0))
+        .all()
+    )
+    if page:
+        total = page[0][2]
+    else:
+        total = query.order_by(None).count() if offset else 0
+    return [(g, preview) for g, preview, _ in page], total, facets
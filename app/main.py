@@ -4,10 +4,14 @@ import os
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from .database import engine
 from . import models
+from .schema_upgrades import upgrade_schema
+from .notification_broker import get_broker
+from .report_jobs import resume_report_jobs
+from .semesters import resume_pending_archives
+from .static_files import PresenzaStaticFiles, precompress_static
 from .routes_auth import router as auth_router
 from .routes_admin import router as admin_router
 from .routes_students import router as students_router
@@ -17,11 +21,17 @@ from .routes_student_home_announcement import router as student_home_announcemen
 
 from .routes_cr import router as cr_router
 from .routes_notifications import router as notifications_router
+from .routes_uploads import router as uploads_router
 
 
 
 # Create DB tables
 models.Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+# build the notification broker now so a misconfigured backend fails startup, not the first commit
+get_broker()
+resume_report_jobs()
+resume_pending_archives()
 
 app = FastAPI(title="PRESENZA - Presence Is The Proof")
 
@@ -54,6 +64,7 @@ app.include_router(notifications_router)
 # IMPORTANT: some frontend routes are implemented as React routes; backend does not serve them.
 # Avoid adding placeholder HTML routes that can shadow /admin/* APIs.
 
+app.include_router(uploads_router)
 app.include_router(students_router)
 app.include_router(cr_router)
 app.include_router(student_holiday_router)
@@ -65,7 +76,10 @@ app.include_router(student_home_announcement_router)
 
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 if os.path.isdir(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    # .gz/.br siblings for the JS/CSS bundle; set STATIC_PRECOMPRESS=0 when the build step does it
+    if os.getenv("STATIC_PRECOMPRESS", "1") != "0":
+        precompress_static(static_dir)
+    app.mount("/static", PresenzaStaticFiles(directory=static_dir), name="static")
 
 @app.get("/")
 def root():
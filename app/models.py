@@ -1,5 +1,6 @@
 #prazenza-backend/app/models.py
-from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Float, Time
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Float, Time, Index, JSON, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 from sqlalchemy.sql import func
@@ -26,6 +27,9 @@ class ODRequest(Base):
     section = Column(String, nullable=False, index=True)
 
     request_date = Column(Date, nullable=False, default=date.today)
+    # inclusive range for multi-day requests (request_date = start_date); backfilled from request_date
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
 
     # FULL_DAY / SLOT
     category = Column(String, nullable=False)  # FULL_DAY | SLOT
@@ -38,6 +42,7 @@ class ODRequest(Base):
 
     proof_url = Column(String, nullable=False)  # points to stored file under /static
     proof_type = Column(String, nullable=True)
+    proof_sha256 = Column(String, ForeignKey("proof_blobs.sha256"), nullable=True, index=True)
 
     status = Column(String, default="PENDING")  # PENDING | APPROVED | REJECTED
     cr_remarks = Column(String, nullable=True)
@@ -45,6 +50,11 @@ class ODRequest(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+    __table_args__ = (
+        # overlap lookups: student_id = ? AND status = ? AND start_date <= ? AND end_date >= ?
+        Index("ix_od_requests_student_range", "student_id", "status", "start_date", "end_date"),
+    )
+
 
 class AbsenceRequest(Base):
     __tablename__ = "absence_requests"
@@ -60,6 +70,9 @@ class AbsenceRequest(Base):
     section = Column(String, nullable=False, index=True)
 
     request_date = Column(Date, nullable=False, default=date.today)
+    # inclusive range for multi-day requests (request_date = start_date); backfilled from request_date
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
 
     category = Column(String, nullable=False)  # FULL_DAY | SLOT
     slots = Column(String)  # comma-separated slot names when category == SLOT
@@ -68,6 +81,7 @@ class AbsenceRequest(Base):
 
     proof_url = Column(String, nullable=True)
     proof_type = Column(String, nullable=True)
+    proof_sha256 = Column(String, ForeignKey("proof_blobs.sha256"), nullable=True, index=True)
 
     status = Column(String, default="PENDING")  # PENDING | APPROVED | REJECTED
     cr_remarks = Column(String, nullable=True)
@@ -75,6 +89,11 @@ class AbsenceRequest(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+    __table_args__ = (
+        # overlap lookups: student_id = ? AND status = ? AND start_date <= ? AND end_date >= ?
+        Index("ix_absence_requests_student_range", "student_id", "status", "start_date", "end_date"),
+    )
+
 
 class GrievanceRequest(Base):
     __tablename__ = "grievance_requests"
@@ -96,6 +115,7 @@ class GrievanceRequest(Base):
 
     proof_url = Column(String, nullable=True)
     proof_type = Column(String, nullable=True)
+    proof_sha256 = Column(String, ForeignKey("proof_blobs.sha256"), nullable=True, index=True)
 
     status = Column(String, default="OPEN")  # OPEN | UNDER_REVIEW | RESOLVED | REJECTED
     review_remarks = Column(String, nullable=True)
@@ -116,6 +136,11 @@ class Student(Base):
     mobile = Column(String, nullable=False)
     is_cr = Column(Boolean, default=False)
 
+    __table_args__ = (
+        # section-scoped listings and search
+        Index("ix_students_section", "department", "year", "section"),
+    )
+
 
 class Admin(Base):
     __tablename__ = "admins"
@@ -148,6 +173,9 @@ class DailyAttendance(Base):
 
     created_at = Column(DateTime, server_default=func.now())
 
+    # stamped on insert with the section's active semester (see semesters); NULL on legacy rows
+    semester_id = Column(Integer, ForeignKey("semesters.id"), nullable=True, index=True)
+
 
 class AttendanceQR(Base):
     __tablename__ = "attendance_qr"
@@ -174,6 +202,8 @@ class Attendance(Base):
     longitude = Column(Float)
     marked_at = Column(DateTime, server_default=func.now())
 
+    semester_id = Column(Integer, ForeignKey("semesters.id"), nullable=True, index=True)
+
 
 class SemesterSettings(Base):
     __tablename__ = "semester_settings"
@@ -287,12 +317,21 @@ class Notification(Base):
     notification_type = Column(String, nullable=False, index=True)  # e.g. GRIEVANCE_SUBMITTED, OD_APPROVED, ATTENDANCE_MARKED
     message = Column(String, nullable=False)
 
-    # simple JSON-like payload stored as string (for now)
-    meta = Column(String, nullable=True)
+    # JSON payload (JSONB on Postgres); common keys have expression indexes, see
+    # notifications_utils.META_INDEXED_KEYS and schema_upgrades.migrate_notification_meta
+    meta = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
 
     is_read = Column(Boolean, default=False, index=True)
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        # list endpoints: WHERE recipient = ? ORDER BY created_at DESC LIMIT n
+        Index("ix_notifications_student_created", "recipient_student_id", "created_at"),
+        Index("ix_notifications_admin_created", "recipient_admin_id", "created_at"),
+        # retention job: WHERE is_read AND created_at < cutoff
+        Index("ix_notifications_read_created", "is_read", "created_at"),
+    )
+
 
 class CRAssignment(Base):
     """Persist current + backup CR assignments with validity window."""
@@ -316,3 +355,259 @@ class CRAssignment(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+
+class SmsAlert(Base):
+    """One absentee SMS per student per day, with delivery state."""
+
+    __tablename__ = "sms_alerts"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
+    alert_date = Column(Date, nullable=False, index=True)
+
+    mobile = Column(String, nullable=False)
+    message = Column(String, nullable=False)
+
+    status = Column(String, nullable=False, default="QUEUED")  # QUEUED | SENT | FAILED | REJECTED
+    attempts = Column(Integer, nullable=False, default=0)
+    provider_sid = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_sms_alerts_student_date", "student_id", "alert_date", unique=True),
+    )
+
+
+class ProofBlob(Base):
+    """Content-addressed proof file (static/proofs/ab/cd/<sha256><ext>).
+
+    ref_count = number of OD / absence / grievance rows whose proof_sha256 points here.
+    """
+
+    __tablename__ = "proof_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)  # relative to app/static
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    # downscaled WebP preview (proofs/previews/ab/cd/<sha256>.webp); NULL until generated
+    preview_path = Column(String, nullable=True)
+    # 64-bit dHash as 16 hex chars (images, and PDFs when PyMuPDF is installed); see proof_phash
+    phash = Column(String(16), nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class ProofPhashBand(Base):
+    """Multi-index hash table over ProofBlob.phash.
+
+    Each hash is split into PHASH_BANDS equal bands; two hashes within
+    PHASH_BANDS - 1 bits of each other agree exactly on at least one band, so
+    near-duplicate lookup is an indexed equality probe per band, never a scan.
+    """
+
+    __tablename__ = "proof_phash_bands"
+
+    sha256 = Column(String(64), ForeignKey("proof_blobs.sha256"), primary_key=True)
+    band = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_proof_phash_bands_band_value", "band", "value"),
+    )
+
+
+class UploadSession(Base):
+    """Resumable proof upload: chunks land in UPLOAD_SESSION_DIR/<id>.part until attached."""
+
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex, handed to the client
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
+
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    total_size = Column(Integer, nullable=False)
+    received_bytes = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # bumped on every chunk; sessions idle past UPLOAD_SESSION_TTL_HOURS are collected
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class SectionAttendanceVersion(Base):
+    """Per section+day counter bumped on every DailyAttendance write (see report_cache).
+
+    Rendered daily reports are cached under this version, so a bump is what
+    invalidates them.
+    """
+
+    __tablename__ = "section_attendance_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    department = Column(String, nullable=False)
+    year = Column(String, nullable=False)
+    section = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "ix_section_attendance_versions_scope_day",
+            "department", "year", "section", "day",
+            unique=True,
+        ),
+    )
+
+
+class ReportJob(Base):
+    """Background bulk report pack (see report_jobs): per-section, per-month registers in one zip."""
+
+    __tablename__ = "report_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    admin_id = Column(String, ForeignKey("admins.admin_id"), nullable=False, index=True)
+
+    params = Column(JSON, nullable=False)  # {start_date, end_date, sections: [[dept, year, section]], formats}
+    status = Column(String, nullable=False, default="QUEUED")  # QUEUED | RUNNING | DONE | FAILED
+
+    total_units = Column(Integer, nullable=False, default=0)
+    done_units = Column(Integer, nullable=False, default=0)
+    artifact_path = Column(String, nullable=True)
+    artifact_size = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class StudentAttendanceBitmap(Base):
+    """One student's DailyAttendance for the semester starting at `origin`, as bit planes.
+
+    Bit i of each plane is origin + i days (little-endian bytes); maintained by
+    the attendance_bitmaps flush hook.
+    """
+
+    __tablename__ = "student_attendance_bitmaps"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    origin = Column(Date, primary_key=True)
+
+    present_bits = Column(LargeBinary, nullable=False, default=b"")
+    od_bits = Column(LargeBinary, nullable=False, default=b"")
+    absent_bits = Column(LargeBinary, nullable=False, default=b"")
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SectionCalendarBitmap(Base):
+    """Days (from `origin`) on which anyone in the section was marked: the section's class days."""
+
+    __tablename__ = "section_calendar_bitmaps"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    department = Column(String, nullable=False)
+    year = Column(String, nullable=False)
+    section = Column(String, nullable=False)
+    origin = Column(Date, nullable=False)
+
+    class_bits = Column(LargeBinary, nullable=False, default=b"")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "ix_section_calendar_bitmaps_scope_origin",
+            "department", "year", "section", "origin",
+            unique=True,
+        ),
+    )
+
+
+class Semester(Base):
+    """A section's semester: live attendance rows carry its id until it is archived.
+
+    Reset closes the active semester and opens a new one (see semesters); the
+    closed semester's rows are then moved to the *_archive tables in chunks.
+    """
+
+    __tablename__ = "semesters"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    department = Column(String, nullable=False)
+    year = Column(String, nullable=False)
+    section = Column(String, nullable=False)
+
+    start_date = Column(Date, nullable=True)  # NULL for the implicit first semester of legacy data
+    end_date = Column(Date, nullable=True)
+
+    status = Column(String, nullable=False, default="ACTIVE")  # ACTIVE | ARCHIVING | ARCHIVED | FAILED
+    # "dept|year|section" while ACTIVE, NULL afterwards: the unique index allows one active semester per section
+    active_key = Column(String, nullable=True, unique=True)
+
+    rows_total = Column(Integer, nullable=False, default=0)
+    rows_moved = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    archive_attempts = Column(Integer, nullable=True, default=0)  # runs started; FAILED ones retry up to a limit
+
+    opened_at = Column(DateTime, default=datetime.utcnow)
+    closed_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_semesters_scope", "department", "year", "section"),
+    )
+
+
+class DailyAttendanceArchive(Base):
+    """daily_attendance rows of closed semesters (same ids as when they were live)."""
+
+    __tablename__ = "daily_attendance_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    student_id = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)
+    status = Column(String)
+    source = Column(String, nullable=False)
+    marked_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime)
+
+    semester_id = Column(Integer, ForeignKey("semesters.id"), nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_daily_attendance_archive_semester_student", "semester_id", "student_id", "date"),
+    )
+
+
+class AttendanceArchive(Base):
+    """attendance (slot) rows of closed semesters."""
+
+    __tablename__ = "attendance_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    student_id = Column(Integer)
+    date = Column(Date, nullable=False)
+    slot = Column(Integer, nullable=False)
+    status = Column(String)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    marked_at = Column(DateTime)
+
+    semester_id = Column(Integer, ForeignKey("semesters.id"), nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_attendance_archive_semester_student", "semester_id", "student_id", "date"),
+    )
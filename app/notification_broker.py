@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Notification
+
+
+# Backend selection (per process):
+# - memory (default): single uvicorn worker, events stay in-process
+# - redis: any Redis-protocol server (redis, valkey, keydb, a local stand-in) fans out across workers
+# - db: every worker polls the notifications table for new ids (no extra infra needed)
+BROKER_BACKEND = os.getenv("NOTIFICATION_BROKER_BACKEND", "memory").strip().lower()
+BROKER_URL = os.getenv("NOTIFICATION_BROKER_URL", "redis://localhost:6379/0")
+DB_POLL_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_BROKER_POLL_SECONDS", "2"))
+
+SUBSCRIBER_QUEUE_SIZE = 100
+REDIS_CHANNEL_PREFIX = "presenza:notifications:"
+# listener/poller back off exponentially up to this while their backend keeps failing
+BACKEND_MAX_BACKOFF_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+def topic_for_student(student_id: int) -> str:
+    return f"student:{student_id}"
+
+
+def topic_for_admin(admin_id: str) -> str:
+    return f"admin:{admin_id}"
+
+
+def topic_for_notification(n: Notification) -> str | None:
+    if n.recipient_student_id is not None:
+        return topic_for_student(n.recipient_student_id)
+    if n.recipient_admin_id is not None:
+        return topic_for_admin(n.recipient_admin_id)
+    return None
+
+
+def notification_event(n: Notification) -> dict:
+    """Serialize without triggering lazy loads (safe inside flush/commit hooks)."""
+    loaded = n.__dict__
+    created_at = loaded.get("created_at") or datetime.utcnow()
+    return {
+        "id": n.id,
+        "message": loaded.get("message"),
+        "notification_type": loaded.get("notification_type"),
+        "meta": loaded.get("meta"),
+        "is_read": bool(loaded.get("is_read") or False),
+        "created_at": created_at.isoformat(),
+    }
+
+
+# -------------------- BACKENDS --------------------
+class MemoryBackend:
+    """Deliver straight to local subscribers. Only correct with a single worker process."""
+
+    def attach(self, broker: "NotificationBroker") -> None:
+        self._broker = broker
+
+    def publish(self, topic: str, payload: dict) -> None:
+        self._broker.deliver_local(topic, payload)
+
+
+class RedisBackend:
+    """Share events between workers through Redis PUBLISH / PSUBSCRIBE."""
+
+    def __init__(self, url: str):
+        import redis  # optional dependency; only needed for this backend
+
+        self._client = redis.Redis.from_url(url)
+        self._thread: threading.Thread | None = None
+
+    def attach(self, broker: "NotificationBroker") -> None:
+        self._broker = broker
+        self._thread = threading.Thread(target=self._listen, name="notification-redis", daemon=True)
+        self._thread.start()
+
+    def publish(self, topic: str, payload: dict) -> None:
+        self._client.publish(REDIS_CHANNEL_PREFIX + topic, json.dumps(payload, default=str))
+
+    def _listen(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(REDIS_CHANNEL_PREFIX + "*")
+                backoff = 1.0
+                for msg in pubsub.listen():
+                    channel = msg.get("channel")
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    topic = channel[len(REDIS_CHANNEL_PREFIX):]
+                    self._broker.deliver_local(topic, json.loads(msg["data"]))
+            except Exception:
+                # connection dropped; clients fall back to polling until we reconnect
+                logger.exception("notification broker: redis listener failed, retrying in %.0fs", backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, BACKEND_MAX_BACKOFF_SECONDS)
+
+
+class DatabasePollingBackend:
+    """Fallback for multi-worker deployments without Redis: tail notifications by id.
+
+    publish() is a no-op because committed rows are picked up by every worker's poller.
+    """
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._thread: threading.Thread | None = None
+
+    def attach(self, broker: "NotificationBroker") -> None:
+        self._broker = broker
+        self._thread = threading.Thread(target=self._poll, name="notification-db-poll", daemon=True)
+        self._thread.start()
+
+    def publish(self, topic: str, payload: dict) -> None:
+        return
+
+    def _poll(self) -> None:
+        last_id = None
+        delay = self._interval
+        while True:
+            try:
+                db = SessionLocal()
+                try:
+                    if last_id is None:
+                        newest = db.query(Notification.id).order_by(Notification.id.desc()).first()
+                        last_id = newest[0] if newest else 0
+                    elif self._broker.has_subscribers():
+                        rows = (
+                            db.query(Notification)
+                            .filter(Notification.id > last_id)
+                            .order_by(Notification.id.asc())
+                            .limit(500)
+                            .all()
+                        )
+                        for n in rows:
+                            topic = topic_for_notification(n)
+                            if topic:
+                                self._broker.deliver_local(topic, notification_event(n))
+                            last_id = n.id
+                    else:
+                        # nobody listening: just advance the cursor
+                        newest = db.query(Notification.id).order_by(Notification.id.desc()).first()
+                        last_id = newest[0] if newest else last_id
+                finally:
+                    db.close()
+                delay = self._interval
+            except Exception:
+                delay = min(max(delay, self._interval) * 2, BACKEND_MAX_BACKOFF_SECONDS)
+                logger.exception("notification broker: polling failed, retrying in %.0fs", delay)
+            time.sleep(delay)
+
+
+# -------------------- BROKER --------------------
+class NotificationBroker:
+    """In-process topic broker: one topic per recipient, one bounded queue per SSE client."""
+
+    def __init__(self, backend):
+        self._subscribers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.backend = backend
+        backend.attach(self)
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        """Must be called from the event loop that will consume the queue."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[topic].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(topic)
+            if not subs:
+                return
+            for entry in list(subs):
+                if entry[1] is queue:
+                    subs.discard(entry)
+            if not subs:
+                self._subscribers.pop(topic, None)
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, topic: str, payload: dict) -> None:
+        try:
+            self.backend.publish(topic, payload)
+        except Exception:
+            # push is best-effort; the row is committed and polling still sees it
+            logger.exception("notification broker: publish to %s failed", topic)
+
+    def deliver_local(self, topic: str, payload: dict) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(topic, ()))
+        for loop, queue in subs:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                # loop already closed (client went away mid-delivery)
+                pass
+
+
+def _offer(queue: asyncio.Queue, payload: dict) -> None:
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        # slow consumer: drop; the client re-syncs via Last-Event-ID on reconnect
+        pass
+
+
+def _backend_from_env():
+    if BROKER_BACKEND == "redis":
+        return RedisBackend(BROKER_URL)
+    if BROKER_BACKEND == "db":
+        return DatabasePollingBackend(DB_POLL_INTERVAL_SECONDS)
+    return MemoryBackend()
+
+
+_broker: NotificationBroker | None = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> NotificationBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = NotificationBroker(_backend_from_env())
+    return _broker
+
+
+# -------------------- PUBLISH ON COMMIT --------------------
+_PENDING_KEY = "presenza_pending_notifications"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_notifications(session, flush_context):
+    new_rows = [obj for obj in session.new if isinstance(obj, Notification)]
+    if not new_rows:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for n in new_rows:
+        topic = topic_for_notification(n)
+        if topic:
+            pending.append((topic, notification_event(n)))
+
+
+_COMMITTED_KEY = "presenza_notifications_committed"
+
+
+@event.listens_for(Session, "after_commit")
+def _note_commit(session):
+    # also fires when a savepoint is released; after_transaction_end tells the two apart
+    session.info[_COMMITTED_KEY] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _publish_committed_notifications(session, transaction):
+    committed = session.info.pop(_COMMITTED_KEY, False)
+    if transaction.parent is not None:
+        return
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not committed or not pending:
+        return
+    # the rows are already committed: a broker problem must not turn this request into a 500
+    try:
+        broker = get_broker()
+    except Exception:
+        logger.exception("notification broker unavailable; %d event(s) not pushed", len(pending))
+        return
+    for topic, payload in pending:
+        broker.publish(topic, payload)
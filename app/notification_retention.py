@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.models import Notification
+
+
+# Read notifications are dropped after this many days.
+READ_RETENTION_DAYS = int(os.getenv("NOTIFICATION_READ_RETENTION_DAYS", "30"))
+# Anything still left (i.e. unread) older than this is moved to the monthly archive files.
+ARCHIVE_AFTER_DAYS = int(os.getenv("NOTIFICATION_ARCHIVE_AFTER_DAYS", "120"))
+# Rows per DELETE; each batch is its own short transaction.
+BATCH_SIZE = int(os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", "500"))
+
+ARCHIVE_DIR = os.getenv("NOTIFICATION_ARCHIVE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "archive", "notifications"
+)
+
+
+def _archive_path(created_at: datetime | None) -> str:
+    month = (created_at or datetime.utcnow()).strftime("%Y-%m")
+    return os.path.join(ARCHIVE_DIR, f"notifications-{month}.ndjson.gz")
+
+
+def _archive_record(n: Notification) -> dict:
+    return {
+        "id": n.id,
+        "recipient_student_id": n.recipient_student_id,
+        "recipient_admin_id": n.recipient_admin_id,
+        "recipient_role": n.recipient_role,
+        "notification_type": n.notification_type,
+        "message": n.message,
+        "meta": n.meta,
+        "is_read": bool(n.is_read),
+        "created_at": n.created_at.isoformat() if n.created_at else None,
+    }
+
+
+def purge_read_notifications(
+    db: Session,
+    *,
+    older_than_days: int = READ_RETENTION_DAYS,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """Delete read notifications older than the cutoff, one bounded batch per commit."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    deleted = 0
+    batches = 0
+
+    while True:
+        ids = [
+            row[0]
+            for row in db.query(Notification.id)
+            .filter(Notification.is_read.is_(True), Notification.created_at < cutoff)
+            .order_by(Notification.id.asc())
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            break
+
+        db.query(Notification).filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+
+        deleted += len(ids)
+        batches += 1
+
+    return {"deleted": deleted, "batches": batches, "cutoff": cutoff.isoformat()}
+
+
+def archive_old_notifications(
+    db: Session,
+    *,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """Move notifications older than the cutoff into gzip NDJSON files, one per month.
+
+    Each batch is appended (as a new gzip member) and flushed to disk before the
+    rows are deleted, so a crash can at worst archive a batch twice, never lose it.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    batches = 0
+    files: set[str] = set()
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    while True:
+        rows = (
+            db.query(Notification)
+            .filter(Notification.created_at < cutoff)
+            .order_by(Notification.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        by_file: dict[str, list[dict]] = {}
+        for n in rows:
+            by_file.setdefault(_archive_path(n.created_at), []).append(_archive_record(n))
+
+        for path, records in by_file.items():
+            with open(path, "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                    for rec in records:
+                        gz.write((json.dumps(rec, default=str) + "\n").encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+            files.add(os.path.basename(path))
+
+        ids = [n.id for n in rows]
+        db.query(Notification).filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+
+        archived += len(ids)
+        batches += 1
+
+    return {
+        "archived": archived,
+        "batches": batches,
+        "cutoff": cutoff.isoformat(),
+        "files": sorted(files),
+    }
+
+
+def run_notification_retention(
+    db: Session,
+    *,
+    read_older_than_days: int = READ_RETENTION_DAYS,
+    archive_older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """Purge old read rows first, then archive whatever old rows remain."""
+    purged = purge_read_notifications(
+        db, older_than_days=read_older_than_days, batch_size=batch_size
+    )
+    archived = archive_old_notifications(
+        db, older_than_days=archive_older_than_days, batch_size=batch_size
+    )
+    return {
+        "reclaimed_rows": purged["deleted"] + archived["archived"],
+        "deleted_read": purged["deleted"],
+        "archived": archived["archived"],
+        "archive_files": archived["files"],
+        "batches": purged["batches"] + archived["batches"],
+    }
+
+
+if __name__ == "__main__":
+    # database-wide, so operators run it (cron) rather than section admins:
+    #   python -m app.notification_retention --read-days 30 --archive-days 120
+    import argparse
+
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Purge read and archive old notifications")
+    parser.add_argument("--read-days", type=int, default=READ_RETENTION_DAYS)
+    parser.add_argument("--archive-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    args = parser.parse_args()
+    if args.read_days < 1 or args.archive_days < 1:
+        parser.error("retention windows must be at least 1 day")
+
+    _db = SessionLocal()
+    try:
+        print(
+            run_notification_retention(
+                _db, read_older_than_days=args.read_days, archive_older_than_days=args.archive_days
+            )
+        )
+    finally:
+        _db.close()
@@ -1,11 +1,46 @@
 from __future__ import annotations
 
 from datetime import datetime, date
+from sqlalchemy import func, literal_column
 from sqlalchemy.orm import Session
 
 from app.models import Notification, Student, Admin
 
 
+# meta keys with an expression index (created in schema_upgrades.migrate_notification_meta)
+META_INDEXED_KEYS = ("od_request_id", "absence_request_id", "grievance_id", "date")
+
+
+def meta_key_expression(dialect_name: str, key: str):
+    """SQL expression for meta[key], spelled exactly like its expression index.
+
+    The key is inlined as a literal (not a bound parameter) so the planner can
+    match the index; only whitelisted keys are accepted.
+    """
+    if key not in META_INDEXED_KEYS:
+        raise ValueError(f"meta key {key!r} is not indexed")
+    if dialect_name == "postgresql":
+        return Notification.meta.op("->>")(literal_column(f"'{key}'"))
+    return func.json_extract(Notification.meta, literal_column(f"'$.{key}'"))
+
+
+def filter_by_meta(query, db: Session, key: str, value):
+    """Narrow a Notification query to rows whose meta[key] equals value (indexed)."""
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        # ->> yields text
+        value = str(value)
+    return query.filter(meta_key_expression(dialect_name, key) == value)
+
+
+def find_notifications_by_meta(db: Session, key: str, value, *, notification_type: str | None = None):
+    """E.g. find_notifications_by_meta(db, "od_request_id", od.id) -> the OD's notifications."""
+    q = filter_by_meta(db.query(Notification), db, key, value)
+    if notification_type:
+        q = q.filter(Notification.notification_type == notification_type)
+    return q.order_by(Notification.created_at.desc()).all()
+
+
 def _ensure_notification_target(db: Session, student_id: int | None = None, admin_id: str | None = None):
     if student_id is None and admin_id is None:
         return
@@ -65,6 +100,24 @@ def create_notification_for_student(
     db.commit()
 
 
+def add_student_notifications(db: Session, notifications: list[dict]) -> None:
+    """Queue many student notifications in the caller's transaction; published when it commits.
+
+    Each item: student_id, message, notification_type and optional meta.
+    """
+    db.add_all(
+        Notification(
+            recipient_admin_id=None,
+            recipient_student_id=n["student_id"],
+            recipient_role="student",
+            message=n["message"],
+            notification_type=n["notification_type"],
+            meta=n.get("meta"),
+        )
+        for n in notifications
+    )
+
+
 def create_notification_for_students_in_section(
     db: Session,
     *,
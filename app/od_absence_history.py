@@ -31,6 +31,8 @@ def get_student_od_history(db: Session, student_id: int) -> list[dict]:
                 "id": r.id,
                 "request_date": _normalize_date(r.request_date),
                 "date": _normalize_date(r.request_date),
+                "start_date": _normalize_date(r.start_date or r.request_date),
+                "end_date": _normalize_date(r.end_date or r.request_date),
                 "category": r.category,
                 "slots": r.slots,
                 "reason": r.reason,
@@ -57,6 +59,8 @@ def get_student_absence_history(db: Session, student_id: int) -> list[dict]:
                 "id": r.id,
                 "request_date": _normalize_date(r.request_date),
                 "date": _normalize_date(r.request_date),
+                "start_date": _normalize_date(r.start_date or r.request_date),
+                "end_date": _normalize_date(r.end_date or r.request_date),
                 "category": r.category,
                 "slots": r.slots,
                 "reason": r.reason,
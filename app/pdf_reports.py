@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from io import BytesIO
+
+import pytz
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+MINDURA_LOGO = os.path.join(ASSETS_DIR, "mindura_logo.png")
+PRESENZA_LOGO = os.path.join(ASSETS_DIR, "presenza_logo.png")
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))  # 0 = render in the calling thread
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+
+IST = pytz.timezone("Asia/Kolkata")
+
+LOGO_DPI = 150  # logos are resampled to this for their printed size
+
+_CHROME_FORM = "presenza_page_chrome"
+_ROW_HEIGHT = 0.4 * cm
+_BOTTOM_MARGIN = 3.2 * cm  # keep rows clear of the footer block
+
+
+@dataclass(frozen=True)
+class ReportScope:
+    department: str
+    year: str
+    section: str
+    day: date
+
+
+@dataclass(frozen=True)
+class ReportColumn:
+    label: str
+    x_cm: float
+
+
+# -------------------- SHARED TEMPLATE --------------------
+@lru_cache(maxsize=None)
+def _logo(path: str, printed_cm: float) -> ImageReader | None:
+    """Decode a logo once per process, downsampled for printed_cm (None if the asset is missing)."""
+    if not os.path.exists(path):
+        return None
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.load()
+        target = round(printed_cm / 2.54 * LOGO_DPI)
+        if max(img.size) > target:
+            img.thumbnail((target, target), Image.LANCZOS)
+        return ImageReader(img.copy())
+
+
+def _now_ist() -> datetime:
+    return pytz.utc.localize(datetime.utcnow()).astimezone(IST)
+
+
+def _define_page_chrome(c: canvas.Canvas, width: float, height: float, generated_at: str) -> None:
+    """Watermark, logo and footer as one form XObject: stored once, referenced per page."""
+    c.beginForm(_CHROME_FORM)
+
+    watermark = _logo(PRESENZA_LOGO, 12)
+    if watermark is not None:
+        c.saveState()
+        c.setFillAlpha(0.08)
+        c.drawImage(
+            watermark,
+            width / 2 - 6 * cm,
+            height / 2 - 6 * cm,
+            width=12 * cm,
+            height=12 * cm,
+            mask="auto",
+        )
+        c.restoreState()
+
+    logo = _logo(MINDURA_LOGO, 3)
+    if logo is not None:
+        c.drawImage(
+            logo,
+            width / 2 - 1.5 * cm,
+            height - 3 * cm,
+            width=3 * cm,
+            height=3 * cm,
+            mask="auto",
+        )
+
+    c.setFont("Helvetica-Bold", 12)
+    c.drawCentredString(width / 2, height - 3.6 * cm, "MINDURA TECHNOLOGIES")
+
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(width / 2, 2.6 * cm, f"Report generated on : {generated_at}")
+    c.setFont("Helvetica-Bold", 9)
+    c.drawCentredString(width / 2, 2.0 * cm, "MINDURA TECHNOLOGIES")
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(width / 2, 1.4 * cm, "© 2026 MINDURA TECHNOLOGIES. All rights reserved.")
+
+    c.endForm()
+
+
+def _start_page(c, width, height, title, scope: ReportScope, page_no: int, date_label: str | None = None) -> float:
+    c.doForm(_CHROME_FORM)
+
+    y = height - 5 * cm
+    c.setFont("Helvetica-Bold", 14)
+    c.drawCentredString(width / 2, y, title)
+
+    y -= 1 * cm
+    c.setFont("Helvetica", 10)
+    c.drawString(2 * cm, y, f"Department : {scope.department}")
+    y -= 0.5 * cm
+    c.drawString(2 * cm, y, f"Year / Section : {scope.year} {scope.section}")
+    y -= 0.5 * cm
+    c.drawString(2 * cm, y, date_label or f"Date : {scope.day.strftime('%d-%m-%Y')}")
+    c.drawRightString(width - 2 * cm, y, f"Page {page_no}")
+    return y - 1 * cm
+
+
+def _column_headings(c, y: float, columns: list[ReportColumn]) -> float:
+    c.setFont("Helvetica-Bold", 10)
+    for col in columns:
+        c.drawString(col.x_cm * cm, y, col.label)
+    c.setFont("Helvetica", 10)
+    return y - 0.5 * cm
+
+
+def render_roster_pdf(
+    title: str,
+    scope: ReportScope,
+    columns: list[ReportColumn],
+    rows: list[tuple],
+    generated_at: str | None = None,
+) -> bytes:
+    """Render a header / table / footer report; rows are tuples of cell strings."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    generated_at = generated_at or _now_ist().strftime("%d-%m-%Y %I:%M %p")
+
+    _define_page_chrome(c, width, height, generated_at)
+
+    page_no = 1
+    y = _column_headings(c, _start_page(c, width, height, title, scope, page_no), columns)
+    for row in rows:
+        if y < _BOTTOM_MARGIN:
+            c.showPage()
+            page_no += 1
+            y = _column_headings(c, _start_page(c, width, height, title, scope, page_no), columns)
+        for col, value in zip(columns, row):
+            c.drawString(col.x_cm * cm, y, str(value) if value is not None else "-")
+        y -= _ROW_HEIGHT
+
+    c.save()
+    return buffer.getvalue()
+
+
+def render_register_pdf(
+    title: str,
+    scope: ReportScope,
+    days: list[date],
+    rows: list[tuple],
+    generated_at: str | None = None,
+) -> bytes:
+    """Monthly register on landscape pages: one row per student, one column per day.
+
+    rows are (roll_number, name, [mark per day], present_count); scope.day is
+    any day in the month.
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=landscape(A4))
+    width, height = landscape(A4)
+    generated_at = generated_at or _now_ist().strftime("%d-%m-%Y %I:%M %p")
+    month_label = f"Month : {scope.day.strftime('%B %Y')}"
+
+    _define_page_chrome(c, width, height, generated_at)
+
+    left = 1.5 * cm
+    name_x = left + 2.6 * cm
+    grid_x = name_x + 4.2 * cm
+    total_w = 1.2 * cm
+    day_w = (width - 1.5 * cm - grid_x - total_w) / max(len(days), 1)
+
+    def headings(y: float) -> float:
+        c.setFont("Helvetica-Bold", 7)
+        c.drawString(left, y, "Roll Number")
+        c.drawString(name_x, y, "Name")
+        for i, d in enumerate(days):
+            c.drawCentredString(grid_x + (i + 0.5) * day_w, y, d.strftime("%d"))
+        c.drawCentredString(grid_x + len(days) * day_w + total_w / 2, y, "P / N")
+        c.setFont("Helvetica", 7)
+        return y - 0.4 * cm
+
+    page_no = 1
+    y = headings(_start_page(c, width, height, title, scope, page_no, month_label))
+    for roll, name, marks, present in rows:
+        if y < _BOTTOM_MARGIN:
+            c.showPage()
+            page_no += 1
+            y = headings(_start_page(c, width, height, title, scope, page_no, month_label))
+        c.drawString(left, y, str(roll))
+        c.drawString(name_x, y, str(name)[:28])
+        for i, mark in enumerate(marks):
+            c.drawCentredString(grid_x + (i + 0.5) * day_w, y, mark)
+        c.drawCentredString(grid_x + len(days) * day_w + total_w / 2, y, f"{present} / {len(days)}")
+        y -= 0.35 * cm
+
+    c.save()
+    return buffer.getvalue()
+
+
+# -------------------- RENDER POOL --------------------
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def init_render_worker() -> None:
+    """Process-wide reportlab settings for a render worker (pool initializer)."""
+    # Reports are served over HTTP, never 7-bit mail: skip the pure-Python ASCII85
+    # pass over image streams, which was ~75% of the render time (and +25% size).
+    rl_config.useA85 = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the web process already runs threads and holds pooled DB connections
+                _pool = ProcessPoolExecutor(
+                    max_workers=PDF_RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_render_worker,
+                )
+    return _pool
+
+
+def _recycle_pool(stale: ProcessPoolExecutor) -> None:
+    """Replace a pool whose worker is stuck on a render, killing its processes.
+
+    Renders still queued on the old pool fail (BrokenProcessPool) rather than
+    waiting behind the stuck one; the next request starts a fresh pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is stale:
+            _pool = None
+    # no public API stops a running task: terminate the workers directly
+    for process in list((stale._processes or {}).values()):
+        process.terminate()
+    stale.shutdown(wait=False, cancel_futures=True)
+
+
+def render_report(
+    title: str,
+    scope: ReportScope,
+    columns: list[ReportColumn],
+    rows: list[tuple],
+) -> bytes:
+    """render_roster_pdf in the bounded worker pool (PDF_RENDER_WORKERS processes).
+
+    Excess requests queue for a worker instead of each burning a web thread's
+    share of the GIL; workers keep their decoded logos between reports.
+    """
+    if PDF_RENDER_WORKERS <= 0:
+        init_render_worker()
+        return render_roster_pdf(title, scope, columns, rows)
+    generated_at = _now_ist().strftime("%d-%m-%Y %I:%M %p")
+    pool = _get_pool()
+    future = pool.submit(render_roster_pdf, title, scope, columns, rows, generated_at)
+    try:
+        return future.result(timeout=PDF_RENDER_TIMEOUT)
+    except FutureTimeoutError:
+        # still queued: just drop it; already rendering: that worker is stuck
+        if not future.cancel():
+            _recycle_pool(pool)
+        raise
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from itertools import islice
+
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+
+from app.models import ProofBlob
+from app.proof_store import LEGACY_PROOF_SUBDIRS, PROOF_MODELS, PROOF_STORE_SUBDIR
+from app.proof_previews import PREVIEW_SUBDIR
+from app.uploads import STATIC_DIR
+
+
+PROOF_GC_GRACE_HOURS = float(os.getenv("PROOF_GC_GRACE_HOURS", "24"))
+PROOF_GC_BATCH_SIZE = int(os.getenv("PROOF_GC_BATCH_SIZE", "500"))
+# outside static/ so quarantined files are no longer served
+PROOF_GC_QUARANTINE_DIR = os.getenv(
+    "PROOF_GC_QUARANTINE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "quarantine", "proofs"),
+)
+
+# last report-mode scan, read by the storage usage endpoint instead of rescanning
+PROOF_USAGE_REPORT_PATH = os.getenv(
+    "PROOF_USAGE_REPORT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_cache", "proof_usage.json"),
+)
+PROOF_USAGE_MAX_AGE_MINUTES = float(os.getenv("PROOF_USAGE_MAX_AGE_MINUTES", "60"))
+
+GC_MODES = ("report", "delete", "quarantine")
+
+_usage_lock = threading.Lock()
+
+
+def iter_files(root: str, prefix: str):
+    """Yield (relpath, stat) for every file under root, one directory listing at a time."""
+    if not os.path.isdir(root):
+        return
+    stack = [(root, prefix)]
+    while stack:
+        path, rel = stack.pop()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, f"{rel}{entry.name}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    yield f"{rel}{entry.name}", entry.stat(follow_symlinks=False)
+
+
+def _batched(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _area_for(relpath: str) -> str:
+    top = relpath.split("/", 1)[0]
+    if top != PROOF_STORE_SUBDIR:
+        return top  # legacy od_proofs / absence_proofs / grievance_proofs
+    if relpath.startswith(PREVIEW_SUBDIR + "/"):
+        return "previews"
+    if relpath.startswith(f"{PROOF_STORE_SUBDIR}/.incoming/"):
+        return "incoming"
+    return "store"
+
+
+def _referenced(db: Session, area: str, relpaths: list[str]) -> dict[str, tuple | None]:
+    """Which of relpaths (all in one area) are still referenced.
+
+    Maps each referenced legacy file to the (department, year, section) of a
+    row using it; store/preview hits map to None (they are attributed per
+    section from proof_blobs instead).
+    """
+    if area == "incoming":
+        return {}  # temp files of in-flight uploads; only the grace period protects them
+    if area == "store":
+        rows = db.query(ProofBlob.path).filter(ProofBlob.path.in_(relpaths)).all()
+        return {row[0]: None for row in rows}
+    if area == "previews":
+        rows = db.query(ProofBlob.preview_path).filter(ProofBlob.preview_path.in_(relpaths)).all()
+        return {row[0]: None for row in rows}
+
+    urls = [f"/static/{rel}" for rel in relpaths]
+    owners: dict[str, tuple | None] = {}
+    for model in PROOF_MODELS:
+        rows = (
+            db.query(model.proof_url, model.department, model.year, model.section)
+            .filter(model.proof_url.in_(urls))
+            .all()
+        )
+        for url, department, year, section in rows:
+            owners.setdefault(url[len("/static/"):], (department, year, section))
+    return owners
+
+
+def _dispose(relpath: str, mode: str) -> None:
+    src = os.path.join(STATIC_DIR, *relpath.split("/"))
+    try:
+        if mode == "delete":
+            os.remove(src)
+        elif mode == "quarantine":
+            dest = os.path.join(PROOF_GC_QUARANTINE_DIR, *relpath.split("/"))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.move(src, dest)
+    except FileNotFoundError:
+        pass
+
+
+def _store_usage_by_section(db: Session) -> list[tuple]:
+    """(department, year, section, blobs, bytes) for content-addressed proofs, one grouped query."""
+    pairs = union(
+        *[
+            select(m.department, m.year, m.section, m.proof_sha256).where(m.proof_sha256.isnot(None))
+            for m in PROOF_MODELS
+        ]
+    ).subquery()
+    return (
+        db.query(
+            pairs.c.department,
+            pairs.c.year,
+            pairs.c.section,
+            func.count(ProofBlob.sha256),
+            func.coalesce(func.sum(ProofBlob.size), 0),
+        )
+        .join(ProofBlob, ProofBlob.sha256 == pairs.c.proof_sha256)
+        .group_by(pairs.c.department, pairs.c.year, pairs.c.section)
+        .all()
+    )
+
+
+def collect_orphan_proofs(
+    db: Session,
+    *,
+    mode: str = "report",
+    grace_hours: float | None = None,
+    batch_size: int | None = None,
+) -> dict:
+    """Find proof files nothing points at and report (or delete / quarantine) them.
+
+    Every proof directory is streamed with scandir and checked against the DB
+    batch_size entries at a time (one IN query per batch and area), so memory
+    stays bounded no matter how many files there are. Files younger than the
+    grace period are never touched: their row may simply not be committed yet.
+    """
+    if mode not in GC_MODES:
+        raise ValueError(f"mode must be one of {GC_MODES}")
+    grace_hours = PROOF_GC_GRACE_HOURS if grace_hours is None else grace_hours
+    batch_size = batch_size or PROOF_GC_BATCH_SIZE
+    cutoff = time.time() - grace_hours * 3600
+
+    areas: dict[str, dict] = {}
+    per_section: dict[tuple, dict] = {}
+    orphans = {"files": 0, "bytes": 0, "disposed": 0}
+
+    roots = [(os.path.join(STATIC_DIR, d), f"{d}/") for d in LEGACY_PROOF_SUBDIRS]
+    roots.append((os.path.join(STATIC_DIR, PROOF_STORE_SUBDIR), f"{PROOF_STORE_SUBDIR}/"))
+
+    for root, prefix in roots:
+        for batch in _batched(iter_files(root, prefix), batch_size):
+            by_area: dict[str, list] = {}
+            for rel, st in batch:
+                by_area.setdefault(_area_for(rel), []).append((rel, st))
+
+            for area, items in by_area.items():
+                stats = areas.setdefault(
+                    area, {"files": 0, "bytes": 0, "recent": 0, "orphans": 0, "orphan_bytes": 0}
+                )
+                referenced = _referenced(db, area, [rel for rel, _ in items])
+
+                for rel, st in items:
+                    stats["files"] += 1
+                    stats["bytes"] += st.st_size
+                    if rel in referenced:
+                        owner = referenced[rel]
+                        if owner is not None:
+                            usage = per_section.setdefault(owner, {"files": 0, "bytes": 0})
+                            usage["files"] += 1
+                            usage["bytes"] += st.st_size
+                        continue
+                    if st.st_mtime > cutoff:
+                        stats["recent"] += 1
+                        continue
+                    stats["orphans"] += 1
+                    stats["orphan_bytes"] += st.st_size
+                    orphans["files"] += 1
+                    orphans["bytes"] += st.st_size
+                    if mode != "report":
+                        _dispose(rel, mode)
+                        orphans["disposed"] += 1
+
+    for department, year, section, blobs, size in _store_usage_by_section(db):
+        usage = per_section.setdefault((department, year, section), {"files": 0, "bytes": 0})
+        usage["files"] += blobs
+        usage["bytes"] += int(size or 0)
+
+    report = {
+        "mode": mode,
+        "grace_hours": grace_hours,
+        "scanned": {
+            "files": sum(a["files"] for a in areas.values()),
+            "bytes": sum(a["bytes"] for a in areas.values()),
+        },
+        "areas": areas,
+        "orphans": orphans,
+        "sections": [
+            {"department": d, "year": y, "section": s, **usage}
+            for (d, y, s), usage in sorted(per_section.items(), key=lambda kv: tuple(str(p) for p in kv[0]))
+        ],
+    }
+    if mode == "report":
+        _save_usage_report(report)
+    else:
+        # files were removed: the saved numbers are stale, rescan on next read
+        try:
+            os.remove(PROOF_USAGE_REPORT_PATH)
+        except FileNotFoundError:
+            pass
+    return report
+
+
+def _save_usage_report(report: dict) -> None:
+    os.makedirs(os.path.dirname(PROOF_USAGE_REPORT_PATH), exist_ok=True)
+    tmp_path = f"{PROOF_USAGE_REPORT_PATH}.{os.getpid()}.part"
+    with open(tmp_path, "w") as fh:
+        json.dump(report, fh)
+    os.replace(tmp_path, PROOF_USAGE_REPORT_PATH)
+
+
+def _load_usage_report() -> dict | None:
+    """The saved report if it is younger than PROOF_USAGE_MAX_AGE_MINUTES."""
+    try:
+        if time.time() - os.stat(PROOF_USAGE_REPORT_PATH).st_mtime > PROOF_USAGE_MAX_AGE_MINUTES * 60:
+            return None
+        with open(PROOF_USAGE_REPORT_PATH) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def proof_storage_report(db: Session) -> dict:
+    """Latest report-mode scan, rescanning only once the saved one is too old."""
+    report = _load_usage_report()
+    if report is not None:
+        return report
+    with _usage_lock:
+        # another request may have rescanned while we waited
+        report = _load_usage_report()
+        if report is None:
+            report = collect_orphan_proofs(db, mode="report")
+    return report
+
+
+if __name__ == "__main__":
+    # cron: python -m app.proof_gc [report|delete|quarantine]
+    import sys
+
+    from app.database import SessionLocal
+
+    _db = SessionLocal()
+    try:
+        print(collect_orphan_proofs(_db, mode=sys.argv[1] if len(sys.argv) > 1 else "report"))
+    finally:
+        _db.close()
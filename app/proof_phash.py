@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from app.models import (
+    AbsenceRequest,
+    GrievanceRequest,
+    ODRequest,
+    ProofBlob,
+    ProofPhashBand,
+)
+
+
+PHASH_BITS = 64
+PHASH_BANDS = 8  # 8-bit bands: any pair within 7 bits shares a band
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "6"))
+
+_BAND_BITS = PHASH_BITS // PHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+REQUEST_KINDS = {ODRequest: "OD", AbsenceRequest: "ABSENCE", GrievanceRequest: "GRIEVANCE"}
+
+
+# -------------------- HASHING (runs in the preview worker processes) --------------------
+def dhash(img) -> str:
+    """Difference hash of a PIL image: 64 bits of 'is this pixel brighter than its right neighbour'."""
+    from PIL import Image
+
+    small = img.convert("L").resize((9, 8), Image.LANCZOS)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def phash_bands(phash: str) -> list[int]:
+    value = int(phash, 16)
+    return [(value >> (i * _BAND_BITS)) & _BAND_MASK for i in range(PHASH_BANDS)]
+
+
+def hamming(a: str, b: str) -> int:
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+
+# -------------------- INDEX --------------------
+def index_phash(db: Session, sha256: str, phash: str) -> None:
+    """Store phash on the blob and (re)write its band rows; caller commits."""
+    db.query(ProofBlob).filter(ProofBlob.sha256 == sha256).update(
+        {ProofBlob.phash: phash}, synchronize_session=False
+    )
+    db.query(ProofPhashBand).filter(ProofPhashBand.sha256 == sha256).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        ProofPhashBand,
+        [{"sha256": sha256, "band": i, "value": v} for i, v in enumerate(phash_bands(phash))],
+    )
+
+
+def unindex_phash(db: Session, sha256: str) -> None:
+    db.query(ProofPhashBand).filter(ProofPhashBand.sha256 == sha256).delete(synchronize_session=False)
+
+
+def near_duplicate_blobs(db: Session, phashes: dict[str, str]) -> dict[str, dict[str, int]]:
+    """For each {sha256: phash}, the other blobs within PHASH_MAX_DISTANCE -> {sha256: distance}.
+
+    One indexed query over the band table for the whole batch.
+    """
+    probes = {(i, v) for ph in phashes.values() for i, v in enumerate(phash_bands(ph))}
+    if not probes:
+        return {}
+
+    candidates = (
+        db.query(ProofPhashBand.sha256, ProofBlob.phash)
+        .join(ProofBlob, ProofBlob.sha256 == ProofPhashBand.sha256)
+        .filter(tuple_(ProofPhashBand.band, ProofPhashBand.value).in_(list(probes)))
+        .distinct()
+        .all()
+    )
+
+    out: dict[str, dict[str, int]] = {}
+    for sha, ph in phashes.items():
+        near = {}
+        for cand_sha, cand_ph in candidates:
+            if cand_sha == sha or not cand_ph:
+                continue
+            d = hamming(ph, cand_ph)
+            if d <= PHASH_MAX_DISTANCE:
+                near[cand_sha] = d
+        out[sha] = near
+    return out
+
+
+def possible_duplicates(db: Session, rows: list) -> dict[tuple[str, int], dict | None]:
+    """Map (kind, id) of each request row to the earliest *other* request whose proof is
+    the same file or a near-duplicate image, or None.
+
+    A match in the row's own section names the request and roll number; one in
+    another section is only flagged (other_section, distance), so a CR never
+    learns who filed requests outside their class.
+
+    rows are OD / absence / grievance rows (e.g. one pending list). Cost is one
+    blob query, one band query and one grouped query per request table,
+    independent of how many proofs exist.
+    """
+    result: dict[tuple[str, int], dict | None] = {
+        (REQUEST_KINDS[type(r)], r.id): None for r in rows
+    }
+    own_shas = {r.proof_sha256 for r in rows if r.proof_sha256}
+    if not own_shas:
+        return result
+
+    phashes = {
+        sha: ph
+        for sha, ph in db.query(ProofBlob.sha256, ProofBlob.phash)
+        .filter(ProofBlob.sha256.in_(own_shas), ProofBlob.phash.isnot(None))
+        .all()
+    }
+    near = near_duplicate_blobs(db, phashes)
+
+    # sha -> distance from each row's own proof (0 for the identical file)
+    related = {sha: {sha: 0, **near.get(sha, {})} for sha in own_shas}
+    all_shas = set().union(*related.values())
+
+    # earliest request per blob, per table
+    firsts: dict[str, list[tuple]] = {}
+    for model, kind in REQUEST_KINDS.items():
+        earliest = (
+            db.query(func.min(model.id).label("id"))
+            .filter(model.proof_sha256.in_(all_shas))
+            .group_by(model.proof_sha256)
+            .subquery()
+        )
+        for rid, sha, roll, created_at, department, year, section in (
+            db.query(
+                model.id,
+                model.proof_sha256,
+                model.student_roll_number,
+                model.created_at,
+                model.department,
+                model.year,
+                model.section,
+            )
+            .join(earliest, model.id == earliest.c.id)
+            .all()
+        ):
+            firsts.setdefault(sha, []).append((created_at, kind, rid, roll, (department, year, section)))
+
+    for r in rows:
+        kind = REQUEST_KINDS[type(r)]
+        if not r.proof_sha256:
+            continue
+        own_section = (r.department, r.year, r.section)
+        best = None
+        for sha, distance in related[r.proof_sha256].items():
+            for created_at, other_kind, other_id, roll, other_section in firsts.get(sha, []):
+                # only point backwards: the first use of a file is the original, not a duplicate
+                if (other_kind, other_id) == (kind, r.id):
+                    continue
+                if r.created_at and created_at and created_at > r.created_at:
+                    continue
+                key = (created_at is None, created_at or datetime.min, distance)
+                if best is None or key < best[0]:
+                    if other_section == own_section:
+                        match = {
+                            "request_type": other_kind,
+                            "request_id": other_id,
+                            "roll": roll,
+                            "distance": distance,
+                            "other_section": False,
+                        }
+                    else:
+                        match = {"other_section": True, "distance": distance}
+                    best = (key, match)
+        result[(kind, r.id)] = best[1] if best else None
+    return result
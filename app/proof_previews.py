@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import ProofBlob
+from app.proof_phash import dhash, index_phash
+from app.uploads import STATIC_DIR
+
+
+PREVIEW_SUBDIR = "proofs/previews"
+PREVIEW_MAX_SIDE = int(os.getenv("PROOF_PREVIEW_MAX_SIDE", "480"))
+PREVIEW_QUALITY = int(os.getenv("PROOF_PREVIEW_QUALITY", "70"))
+PREVIEW_WORKERS = int(os.getenv("PROOF_PREVIEW_WORKERS", "2"))
+
+
+def preview_relpath(sha256: str) -> str:
+    return f"{PREVIEW_SUBDIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}.webp"
+
+
+def preview_url(preview_path: str | None) -> str | None:
+    return f"/static/{preview_path}" if preview_path else None
+
+
+# -------------------- RENDERING (runs in worker processes) --------------------
+def _first_pdf_page(src_path: str):
+    """Render page 1 of a PDF if PyMuPDF is installed; None otherwise."""
+    try:
+        import fitz  # PyMuPDF, optional
+    except ImportError:
+        return None
+
+    from PIL import Image
+
+    with fitz.open(src_path) as doc:
+        if doc.page_count == 0:
+            return None
+        page = doc.load_page(0)
+        zoom = PREVIEW_MAX_SIDE / max(page.rect.width, page.rect.height)
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def _load_image(src_path: str, content_type: str):
+    from PIL import Image, ImageOps
+
+    if content_type == "application/pdf":
+        return _first_pdf_page(src_path)
+    with Image.open(src_path) as opened:
+        # bake in EXIF orientation before the metadata is dropped
+        img = ImageOps.exif_transpose(opened)
+        img.load()
+    return img
+
+
+def _write_preview(img, dest_path: str) -> None:
+    from PIL import Image
+
+    mode = "RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB"
+    img = img.convert(mode)
+    img.thumbnail((PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE), Image.LANCZOS)
+
+    # copy pixels only: no EXIF/GPS/ICC/XMP survives into the preview
+    clean = Image.new(mode, img.size)
+    clean.paste(img)
+
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + ".part"
+    clean.save(tmp_path, format="WEBP", quality=PREVIEW_QUALITY, method=4)
+    os.replace(tmp_path, dest_path)
+
+
+def render_preview(src_path: str, dest_path: str, content_type: str) -> bool:
+    """Write a downscaled, metadata-free WebP of src_path to dest_path. False if unsupported."""
+    img = _load_image(src_path, content_type)
+    if img is None:
+        return False
+    _write_preview(img, dest_path)
+    return True
+
+
+def process_proof(src_path: str, dest_path: str | None, content_type: str) -> tuple[bool, str | None]:
+    """Decode once, then write the preview (unless dest_path is None) and compute the dHash.
+
+    Returns (preview_written, phash); (False, None) for unsupported content.
+    """
+    img = _load_image(src_path, content_type)
+    if img is None:
+        return False, None
+    phash = dhash(img)
+    if dest_path is None:
+        return False, phash
+    _write_preview(img, dest_path)
+    return True, phash
+
+
+# -------------------- SCHEDULING (web process) --------------------
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the web process already runs threads and holds pooled DB connections
+                _pool = ProcessPoolExecutor(
+                    max_workers=PREVIEW_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def _record_result(sha256: str, relpath: str | None, future) -> None:
+    try:
+        wrote_preview, phash = future.result()
+    except Exception:
+        # previews/hashes are best-effort; the full proof is always available
+        return
+    if not wrote_preview and not phash:
+        return
+
+    db = SessionLocal()
+    try:
+        if wrote_preview:
+            db.query(ProofBlob).filter(ProofBlob.sha256 == sha256).update(
+                {ProofBlob.preview_path: relpath}, synchronize_session=False
+            )
+        if phash:
+            index_phash(db, sha256, phash)
+        db.commit()
+    finally:
+        db.close()
+
+
+def schedule_proof_preview(sha256: str | None) -> None:
+    """Queue preview + perceptual hash for a committed blob (no-op if it has both)."""
+    if not sha256:
+        return
+    db = SessionLocal()
+    try:
+        blob = db.get(ProofBlob, sha256)
+        if blob is None or (blob.preview_path and blob.phash):
+            return
+        src_path = os.path.join(STATIC_DIR, blob.path)
+        content_type = blob.content_type
+        relpath = None if blob.preview_path else preview_relpath(sha256)
+    finally:
+        db.close()
+
+    try:
+        future = _get_pool().submit(
+            process_proof,
+            src_path,
+            os.path.join(STATIC_DIR, relpath) if relpath else None,
+            content_type,
+        )
+    except RuntimeError:
+        # pool shut down (interpreter exiting)
+        return
+    future.add_done_callback(lambda f: _record_result(sha256, relpath, f))
+
+
+def generate_missing_previews(db: Session, *, batch_size: int = 100) -> int:
+    """Backfill previews and perceptual hashes for existing blobs, synchronously.
+
+    Returns how many blobs were updated.
+    """
+    made = 0
+    last_sha = ""
+    while True:
+        blobs = (
+            db.query(ProofBlob)
+            .filter(
+                ProofBlob.sha256 > last_sha,
+                (ProofBlob.preview_path.is_(None)) | (ProofBlob.phash.is_(None)),
+            )
+            .order_by(ProofBlob.sha256.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not blobs:
+            break
+        jobs = {}
+        for blob in blobs:
+            last_sha = blob.sha256
+            relpath = None if blob.preview_path else preview_relpath(blob.sha256)
+            jobs[blob.sha256] = (
+                relpath,
+                _get_pool().submit(
+                    process_proof,
+                    os.path.join(STATIC_DIR, blob.path),
+                    os.path.join(STATIC_DIR, relpath) if relpath else None,
+                    blob.content_type,
+                ),
+            )
+        for blob in blobs:
+            relpath, future = jobs[blob.sha256]
+            try:
+                wrote_preview, phash = future.result()
+            except Exception:
+                continue
+            if wrote_preview:
+                blob.preview_path = relpath
+            if phash:
+                index_phash(db, blob.sha256, phash)
+            if wrote_preview or phash:
+                made += 1
+        db.commit()
+    return made
+
+
+if __name__ == "__main__":
+    # backfill: python -m app.proof_previews
+    _db = SessionLocal()
+    try:
+        print({"previews_generated": generate_missing_previews(_db)})
+    finally:
+        _db.close()
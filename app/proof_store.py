@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import uuid
+
+from fastapi import UploadFile
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import AbsenceRequest, GrievanceRequest, ODRequest, ProofBlob
+from app.uploads import (
+    PROOF_TYPES,
+    STATIC_DIR,
+    StoredUpload,
+    hash_upload,
+    proof_extension,
+    safe_filename,
+    stream_to_temp,
+)
+
+
+PROOF_STORE_SUBDIR = "proofs"
+PROOF_STORE_DIR = os.path.join(STATIC_DIR, PROOF_STORE_SUBDIR)
+INCOMING_DIR = os.path.join(PROOF_STORE_DIR, ".incoming")
+
+# models that reference proofs (each has proof_url / proof_type / proof_sha256)
+PROOF_MODELS = (ODRequest, AbsenceRequest, GrievanceRequest)
+
+# flat, pre-content-addressed directories under static/
+LEGACY_PROOF_SUBDIRS = ("od_proofs", "absence_proofs", "grievance_proofs")
+
+
+def blob_relpath(sha256: str, ext: str) -> str:
+    """proofs/ab/cd/<sha256><ext> - two shard levels keep directories small."""
+    return f"{PROOF_STORE_SUBDIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def blob_url(blob: ProofBlob) -> str:
+    return f"/static/{blob.path}"
+
+
+def _ext_for(content_type: str) -> str:
+    return ".jpg" if content_type == "image/jpeg" else next(
+        ext for ext, ct in PROOF_TYPES.items() if ct == content_type
+    )
+
+
+def _add_reference(db: Session, sha256: str, *, path: str, size: int, content_type: str) -> ProofBlob:
+    """Increment ref_count, creating the blob row on first reference (race-safe)."""
+    blob = db.get(ProofBlob, sha256)
+    if blob is None:
+        try:
+            with db.begin_nested():
+                blob = ProofBlob(
+                    sha256=sha256, path=path, size=size, content_type=content_type, ref_count=1
+                )
+                db.add(blob)
+            return blob
+        except IntegrityError:
+            # a concurrent upload of the same content won the insert
+            blob = db.get(ProofBlob, sha256)
+
+    db.query(ProofBlob).filter(ProofBlob.sha256 == sha256).update(
+        {ProofBlob.ref_count: ProofBlob.ref_count + 1}, synchronize_session=False
+    )
+    db.refresh(blob)
+    return blob
+
+
+def store_proof_upload(db: Session, upload: UploadFile) -> StoredUpload:
+    """Validate + hash the upload, then store it once per distinct content.
+
+    The hash is computed from the (already spooled) upload before anything is
+    written, so re-uploading known content costs no disk writes. The caller
+    commits; the new reference is part of the caller's transaction.
+    """
+    return store_proof_file(db, upload.file, upload.filename)
+
+
+def store_proof_file(
+    db: Session,
+    fileobj,
+    filename: str | None,
+    *,
+    source_path: str | None = None,
+) -> StoredUpload:
+    """store_proof_upload for any seekable file object.
+
+    When fileobj is already a complete file on disk (source_path, e.g. an
+    assembled upload session), new content is hard-linked into the store
+    instead of being copied. source_path itself is only removed once the
+    caller's transaction commits, so a rolled-back caller can try again.
+    """
+    ext = proof_extension(filename)
+    content_type = PROOF_TYPES[ext]
+
+    sha256, size = hash_upload(fileobj, expected_type=content_type)
+
+    existing = db.get(ProofBlob, sha256)
+    if existing is not None and os.path.exists(os.path.join(STATIC_DIR, existing.path)):
+        blob = _add_reference(db, sha256, path=existing.path, size=size, content_type=content_type)
+        if source_path:
+            remove_after_commit(db, source_path)
+        return StoredUpload(
+            path=os.path.join(STATIC_DIR, blob.path),
+            url=blob_url(blob),
+            sha256=sha256,
+            size=size,
+            content_type=blob.content_type,
+        )
+
+    relpath = blob_relpath(sha256, _ext_for(content_type))
+    final_path = os.path.join(STATIC_DIR, relpath)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+
+    if source_path:
+        _link_or_copy(source_path, final_path)
+        remove_after_commit(db, source_path)
+    else:
+        tmp_path, written_sha, size = stream_to_temp(
+            fileobj, dest_dir=INCOMING_DIR, expected_type=content_type
+        )
+        if written_sha != sha256:
+            os.remove(tmp_path)
+            raise RuntimeError("Upload changed while being stored")
+        os.replace(tmp_path, final_path)
+
+    blob = _add_reference(db, sha256, path=relpath, size=size, content_type=content_type)
+    return StoredUpload(
+        path=final_path,
+        url=blob_url(blob),
+        sha256=sha256,
+        size=size,
+        content_type=content_type,
+    )
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _link_or_copy(source_path: str, final_path: str) -> None:
+    if os.path.exists(final_path):
+        # same content, left by an attempt whose transaction rolled back
+        return
+    try:
+        os.link(source_path, final_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        # another filesystem: copy beside the target, then rename so readers never see a partial blob
+        tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+        shutil.copy2(source_path, tmp_path)
+        os.replace(tmp_path, final_path)
+
+
+# -------------------- REMOVE ON COMMIT --------------------
+_REMOVE_KEY = "presenza_remove_after_commit"
+_COMMITTED_KEY = "presenza_transaction_committed"
+
+
+def remove_after_commit(db: Session, path: str) -> None:
+    """Delete path once db's current transaction commits; a rollback (or close) keeps it."""
+    db.info.setdefault(_REMOVE_KEY, []).append(path)
+
+
+@event.listens_for(Session, "after_commit")
+def _note_commit(session):
+    # also fires when a savepoint is released; after_transaction_end tells the two apart
+    session.info[_COMMITTED_KEY] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _remove_committed_sources(session, transaction):
+    committed = session.info.pop(_COMMITTED_KEY, False)
+    if transaction.parent is not None:
+        return
+    paths = session.info.pop(_REMOVE_KEY, ())
+    if committed:
+        for path in paths:
+            _discard(path)
+
+
+# -------------------- MIGRATION (flat dirs -> content-addressed) --------------------
+def _hash_file(path: str) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _legacy_path(proof_url: str | None) -> str | None:
+    if not proof_url or not proof_url.startswith("/static/"):
+        return None
+    rel = proof_url[len("/static/"):]
+    if rel.split("/", 1)[0] not in LEGACY_PROOF_SUBDIRS:
+        return None
+    return os.path.join(STATIC_DIR, *rel.split("/"))
+
+
+def migrate_legacy_proofs(db: Session, *, batch_size: int = 200) -> dict:
+    """Rehash proofs in the flat *_proofs dirs, move them into the store, rewrite proof_url.
+
+    Idempotent and resumable: rows that already have proof_sha256 are skipped, and
+    each batch commits on its own. Files are copied (hard-linked when possible) into
+    the store and the legacy copies removed only after the batch that rewrote their
+    rows has committed, so an interrupted run never strands a row. Duplicate files
+    collapse onto one blob.
+    """
+    report = {"rows": 0, "blobs_created": 0, "duplicates_removed": 0, "missing_files": 0}
+    moved: dict[str, str] = {}  # legacy path -> sha256 (several rows can share one file)
+
+    for model in PROOF_MODELS:
+        last_id = 0
+        while True:
+            rows = (
+                db.query(model)
+                .filter(
+                    model.id > last_id,
+                    model.proof_sha256.is_(None),
+                    model.proof_url.isnot(None),
+                )
+                .order_by(model.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            legacy_to_remove: list[str] = []
+            for row in rows:
+                last_id = row.id
+                path = _legacy_path(row.proof_url)
+                if path is None:
+                    continue
+
+                if path in moved:
+                    sha256 = moved[path]
+                    blob = _add_reference(db, sha256, path="", size=0, content_type="")
+                else:
+                    if not os.path.exists(path):
+                        report["missing_files"] += 1
+                        continue
+                    ext = os.path.splitext(safe_filename(path))[1].lower()
+                    content_type = PROOF_TYPES.get(ext, row.proof_type or "application/octet-stream")
+                    sha256, size = _hash_file(path)
+                    existing = db.get(ProofBlob, sha256)
+                    if existing is not None:
+                        report["duplicates_removed"] += 1
+                        blob = _add_reference(db, sha256, path=existing.path, size=size, content_type=content_type)
+                    else:
+                        relpath = blob_relpath(sha256, ext)
+                        final_path = os.path.join(STATIC_DIR, relpath)
+                        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                        if not os.path.exists(final_path):
+                            try:
+                                os.link(path, final_path)
+                            except OSError:
+                                shutil.copy2(path, final_path)
+                        report["blobs_created"] += 1
+                        blob = _add_reference(db, sha256, path=relpath, size=size, content_type=content_type)
+                    moved[path] = sha256
+                    legacy_to_remove.append(path)
+
+                row.proof_sha256 = sha256
+                row.proof_url = blob_url(blob)
+                report["rows"] += 1
+
+            db.commit()
+            for path in legacy_to_remove:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    return report
+
+
+if __name__ == "__main__":
+    # one-off: python -m app.proof_store
+    from app.database import SessionLocal, engine
+    from app import models
+    from app.schema_upgrades import upgrade_schema
+
+    models.Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    _db = SessionLocal()
+    try:
+        print(migrate_legacy_proofs(_db))
+    finally:
+        _db.close()
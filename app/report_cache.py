@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import stat
+from datetime import date, datetime
+from itertools import chain
+from typing import Callable
+
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import DailyAttendance, SectionAttendanceVersion, Student
+from app.pdf_reports import ReportScope
+
+
+REPORT_CACHE_DIR = os.getenv(
+    "REPORT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_cache"),
+)
+LIVE_DIR = os.path.join(REPORT_CACHE_DIR, "live")
+ARCHIVE_DIR = os.path.join(REPORT_CACHE_DIR, "archive")
+
+# downloads always revalidate: late edits to a closed day still bump its version
+REPORT_CACHE_CONTROL = "private, no-cache"
+
+_ARTIFACT_NAME = re.compile(r"^(?P<type>[a-z_]+)-v(?P<version>\d+)\.pdf$")
+
+
+# -------------------- VERSIONS --------------------
+def _scope_filter(q, department: str, year: str, section: str, day: date):
+    return q.filter(
+        SectionAttendanceVersion.department == department,
+        SectionAttendanceVersion.year == year,
+        SectionAttendanceVersion.section == section,
+        SectionAttendanceVersion.day == day,
+    )
+
+
+def current_version(db: Session, scope: ReportScope) -> int:
+    row = _scope_filter(
+        db.query(SectionAttendanceVersion.version),
+        scope.department, scope.year, scope.section, scope.day,
+    ).first()
+    return row[0] if row else 0
+
+
+def _bump(session: Session, department: str, year: str, section: str, day: date) -> None:
+    """Atomic upsert (+1) in the session's transaction; safe under concurrent writers."""
+    dialect = session.get_bind().dialect.name
+    values = {
+        "department": department,
+        "year": year,
+        "section": section,
+        "day": day,
+        "version": 1,
+        "updated_at": datetime.utcnow(),
+    }
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(SectionAttendanceVersion).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["department", "year", "section", "day"],
+            set_={
+                "version": SectionAttendanceVersion.version + 1,
+                "updated_at": values["updated_at"],
+            },
+        )
+        session.execute(stmt)
+        return
+
+    updated = _scope_filter(
+        session.query(SectionAttendanceVersion), department, year, section, day
+    ).update(
+        {SectionAttendanceVersion.version: SectionAttendanceVersion.version + 1},
+        synchronize_session=False,
+    )
+    if not updated:
+        session.execute(SectionAttendanceVersion.__table__.insert().values(**values))
+
+
+def bump_all_versions(db: Session, section: tuple[str, str, str] | None = None) -> None:
+    """Invalidate every cached report, or one section's (after bulk changes that bypass the ORM)."""
+    q = db.query(SectionAttendanceVersion)
+    if section is not None:
+        department, year, sec = section
+        q = q.filter(
+            SectionAttendanceVersion.department == department,
+            SectionAttendanceVersion.year == year,
+            SectionAttendanceVersion.section == sec,
+        )
+    q.update(
+        {SectionAttendanceVersion.version: SectionAttendanceVersion.version + 1},
+        synchronize_session=False,
+    )
+
+
+# student fields printed on (or deciding membership of) a section's reports
+_REPORTED_STUDENT_FIELDS = ("roll_number", "name", "department", "year", "section")
+
+
+def _student_changes_reports(obj: Student, session: Session) -> bool:
+    if obj in session.new or obj in session.deleted:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in _REPORTED_STUDENT_FIELDS)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_versions_on_attendance_write(session, flush_context, instances):
+    touched: set[tuple[int, date]] = set()
+    student_sections: set[tuple[str, str, str]] = set()
+    stored_ids: set[int] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, DailyAttendance):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            if obj.student_id is not None and obj.date is not None:
+                touched.add((obj.student_id, obj.date))
+        elif isinstance(obj, Student) and _student_changes_reports(obj, session):
+            # every report lists roll/name, and the absentee report every unmarked student
+            student_sections.add((obj.department, obj.year, obj.section))
+            if obj.id is not None:
+                stored_ids.add(obj.id)
+
+    if not touched and not student_sections:
+        return
+
+    scopes = set()
+    with session.no_autoflush:
+        if touched:
+            section_of = {
+                sid: (department, year, section)
+                for sid, department, year, section in session.query(
+                    Student.id, Student.department, Student.year, Student.section
+                ).filter(Student.id.in_({sid for sid, _ in touched}))
+            }
+            scopes |= {(*section_of[sid], day) for sid, day in touched if sid in section_of}
+        if stored_ids:
+            # still the stored values: the section a moved student is leaving
+            student_sections |= {
+                tuple(row)
+                for row in session.query(Student.department, Student.year, Student.section)
+                .filter(Student.id.in_(stored_ids))
+                .distinct()
+            }
+        for section in student_sections:
+            # every day's reports, plus a row for today in case it has none yet
+            bump_all_versions(session, section)
+            scopes.add((*section, date.today()))
+
+        for department, year, section, day in scopes:
+            _bump(session, department, year, section, day)
+
+
+# -------------------- ARTIFACTS --------------------
+def _safe(part: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(part))
+
+
+def _scope_dir(root: str, scope: ReportScope) -> str:
+    return os.path.join(
+        root,
+        _safe(scope.department),
+        _safe(scope.year),
+        _safe(scope.section),
+        scope.day.isoformat(),
+    )
+
+
+def artifact_path(scope: ReportScope, report_type: str, version: int, *, archived: bool = False) -> str:
+    root = ARCHIVE_DIR if archived else LIVE_DIR
+    return os.path.join(_scope_dir(root, scope), f"{report_type}-v{version}.pdf")
+
+
+def report_etag(scope: ReportScope, report_type: str, version: int) -> str:
+    key = f"{scope.department}|{scope.year}|{scope.section}|{scope.day.isoformat()}|{report_type}|{version}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:24] + '"'
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _prune_other_versions(path: str) -> None:
+    keep = os.path.basename(path)
+    report_type = _ARTIFACT_NAME.match(keep).group("type")
+    for entry in os.scandir(os.path.dirname(path)):
+        m = _ARTIFACT_NAME.match(entry.name)
+        if m and m.group("type") == report_type and entry.name != keep:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def cached_report_response(
+    db: Session,
+    *,
+    scope: ReportScope,
+    report_type: str,
+    filename: str,
+    request_headers,
+    render: Callable[[], bytes],
+) -> Response:
+    """Serve a daily report from the artifact cache, rendering it only when its version changed.
+
+    A matching If-None-Match costs one indexed version lookup; a cache hit adds
+    one stat and a sendfile.
+    """
+    version = current_version(db, scope)
+    etag = report_etag(scope, report_type, version)
+    headers = {"ETag": etag, "Cache-Control": REPORT_CACHE_CONTROL}
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    path = artifact_path(scope, report_type, version, archived=True)
+    if not os.path.exists(path):
+        path = artifact_path(scope, report_type, version)
+        if not os.path.exists(path):
+            _write_atomic(path, render())
+            _prune_other_versions(path)
+
+    return FileResponse(path, media_type="application/pdf", filename=filename, headers=headers)
+
+
+def finalize_closed_days(db: Session, *, today: date | None = None) -> dict:
+    """Move artifacts of days before `today` into the read-only archive.
+
+    Only the artifact matching the day's current version is kept; stale
+    versions are dropped. A later edit to an archived day bumps its version, so
+    a fresh artifact is rendered alongside instead of the archive being rewritten.
+    """
+    today = today or date.today()
+    report = {"archived": 0, "stale_removed": 0}
+    if not os.path.isdir(LIVE_DIR):
+        return report
+
+    for dirpath, dirnames, filenames in os.walk(LIVE_DIR):
+        try:
+            day = date.fromisoformat(os.path.basename(dirpath))
+        except ValueError:
+            continue
+        if day >= today:
+            continue
+
+        rel = os.path.relpath(dirpath, LIVE_DIR).split(os.sep)
+        if len(rel) != 4:
+            continue
+        department, year, section = rel[:3]
+        row = (
+            db.query(SectionAttendanceVersion)
+            .filter(
+                SectionAttendanceVersion.day == day,
+                SectionAttendanceVersion.department.in_({department, _safe(department)}),
+                SectionAttendanceVersion.year.in_({year, _safe(year)}),
+                SectionAttendanceVersion.section.in_({section, _safe(section)}),
+            )
+            .first()
+        )
+        version = row.version if row else 0
+
+        for name in filenames:
+            src = os.path.join(dirpath, name)
+            m = _ARTIFACT_NAME.match(name)
+            if not m or int(m.group("version")) != version:
+                os.remove(src)
+                report["stale_removed"] += 1
+                continue
+            dest = os.path.join(ARCHIVE_DIR, *rel, name)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(src, dest)
+            os.chmod(dest, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            report["archived"] += 1
+
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
+
+    return report
+
+
+if __name__ == "__main__":
+    # nightly: python -m app.report_cache
+    from app.database import SessionLocal
+
+    _db = SessionLocal()
+    try:
+        print(finalize_closed_days(_db))
+    finally:
+        _db.close()
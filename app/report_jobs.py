@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import csv
+import io
+import multiprocessing
+import os
+import threading
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import DailyAttendance, ReportJob, Student
+from app.pdf_reports import ReportScope, init_render_worker, render_register_pdf
+from app.section_calendar import section_holidays, section_timetables, working_days
+
+
+REPORT_JOB_DIR = os.getenv(
+    "REPORT_JOB_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_jobs"),
+)
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_MAX_DAYS = int(os.getenv("REPORT_JOB_MAX_DAYS", "366"))
+REPORT_JOB_STALE_HOURS = float(os.getenv("REPORT_JOB_STALE_HOURS", "2"))
+
+REPORT_JOB_FORMATS = ("pdf", "csv")
+
+_MARKS = {"PRESENT": "P", "ABSENT": "A", "OD": "OD"}
+
+
+# -------------------- DATA --------------------
+def month_ranges(start: date, end: date) -> list[tuple[date, date]]:
+    """[start, end] cut at month boundaries: one register per section and month."""
+    ranges = []
+    d = start
+    while d <= end:
+        next_month = date(d.year + d.month // 12, d.month % 12 + 1, 1)
+        ranges.append((d, min(end, next_month - timedelta(days=1))))
+        d = next_month
+    return ranges
+
+
+def section_register_rows(db: Session, *, department: str, year: str, section: str, days: list[date]) -> list[tuple]:
+    """(roll_number, name, [mark per day], present_count) for every student of the section.
+
+    A day on which nobody in the section was marked is shown as "-" (no class);
+    otherwise a missing mark counts as absent, as in the daily absentee report.
+    """
+    students = (
+        db.query(Student.id, Student.roll_number, Student.name)
+        .filter(Student.department == department, Student.year == year, Student.section == section)
+        .order_by(Student.roll_number.asc())
+        .all()
+    )
+    if not students or not days:
+        return []
+
+    marks: dict[tuple[int, date], str] = {}
+    for student_id, day, status in (
+        db.query(DailyAttendance.student_id, DailyAttendance.date, DailyAttendance.status)
+        .join(Student, Student.id == DailyAttendance.student_id)
+        .filter(
+            Student.department == department,
+            Student.year == year,
+            Student.section == section,
+            DailyAttendance.date >= days[0],
+            DailyAttendance.date <= days[-1],
+        )
+    ):
+        marks[(student_id, day)] = _MARKS.get((status or "").upper(), "A")
+    class_days = {day for _, day in marks}
+
+    rows = []
+    for student_id, roll, name in students:
+        cells = [
+            marks.get((student_id, d), "A") if d in class_days else "-"
+            for d in days
+        ]
+        rows.append((roll, name, cells, sum(1 for m in cells if m in ("P", "OD"))))
+    return rows
+
+
+def register_csv(days: list[date], rows: list[tuple]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["roll_number", "name", *[d.isoformat() for d in days], "present", "working_days"])
+    for roll, name, cells, present in rows:
+        writer.writerow([roll, name, *cells, present, len(days)])
+    return buf.getvalue().encode("utf-8")
+
+
+# -------------------- EXECUTION --------------------
+_coordinator: ThreadPoolExecutor | None = None
+_render_pool: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def _executors() -> tuple[ThreadPoolExecutor, ProcessPoolExecutor]:
+    global _coordinator, _render_pool
+    if _coordinator is None:
+        with _lock:
+            if _coordinator is None:
+                # one job at a time; each job fans its PDFs out to the process pool
+                # spawn, not fork: the web process already runs threads and holds pooled DB connections
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=REPORT_JOB_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_render_worker,
+                )
+                _coordinator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-job")
+    return _coordinator, _render_pool
+
+
+def _entry_name(department: str, year: str, section: str, days: list[date], ext: str) -> str:
+    folder = "_".join(part.replace(" ", "-").replace("/", "-") for part in (department, year, section))
+    return f"{folder}/{days[0].strftime('%Y-%m')}_register.{ext}"
+
+
+def _run_job(job_id: str) -> None:
+    db = SessionLocal()
+    tmp_path = None
+    try:
+        # claim it: a job that was expired, or already picked up (resubmitted at startup), is left alone
+        claimed = (
+            db.query(ReportJob)
+            .filter(ReportJob.id == job_id, ReportJob.status == "QUEUED")
+            .update({"status": "RUNNING", "started_at": datetime.utcnow()}, synchronize_session=False)
+        )
+        db.commit()
+        if not claimed:
+            return
+        job = db.get(ReportJob, job_id)
+
+        params = job.params
+        start = date.fromisoformat(params["start_date"])
+        end = date.fromisoformat(params["end_date"])
+        formats = params["formats"]
+        months = month_ranges(start, end)
+        sections = [tuple(s) for s in params["sections"]]
+        timetables = section_timetables(db, set(sections))
+
+        _, render_pool = _executors()
+        in_flight: deque = deque()
+        max_in_flight = max(2, REPORT_JOB_WORKERS * 2)  # bounds rendered-but-unwritten PDFs
+
+        os.makedirs(REPORT_JOB_DIR, exist_ok=True)
+        final_path = os.path.join(REPORT_JOB_DIR, f"{job_id}.zip")
+        tmp_path = final_path + ".part"
+
+        def unit_done():
+            job.done_units += 1
+            db.commit()
+
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+
+            def drain(block_until: int) -> None:
+                while len(in_flight) > block_until:
+                    wait([f for _, f in in_flight], return_when=FIRST_COMPLETED)
+                    for item in [i for i in in_flight if i[1].done()]:
+                        in_flight.remove(item)
+                        name, future = item
+                        # PDFs are already compressed streams
+                        zf.writestr(name, future.result(), compress_type=zipfile.ZIP_STORED)
+                        unit_done()
+
+            for department, year, section in sections:
+                section_key = (department, year, section)
+                holidays = section_holidays(db, section_key, start, end)
+                for month_start, month_end in months:
+                    days = working_days(month_start, month_end, timetables[section_key], holidays)
+                    if not days:
+                        # nothing scheduled that month: no register, but the units are done
+                        for _ in formats:
+                            unit_done()
+                        continue
+                    rows = section_register_rows(
+                        db, department=department, year=year, section=section, days=days
+                    )
+                    if "csv" in formats:
+                        zf.writestr(_entry_name(department, year, section, days, "csv"), register_csv(days, rows))
+                        unit_done()
+                    if "pdf" in formats:
+                        future = render_pool.submit(
+                            render_register_pdf,
+                            "ATTENDANCE REGISTER",
+                            ReportScope(department, year, section, days[0]),
+                            days,
+                            rows,
+                        )
+                        in_flight.append((_entry_name(department, year, section, days, "pdf"), future))
+                        drain(max_in_flight)
+            drain(0)
+
+        os.replace(tmp_path, final_path)
+        tmp_path = None
+        finished = (
+            db.query(ReportJob)
+            .filter(ReportJob.id == job_id, ReportJob.status == "RUNNING")
+            .update(
+                {
+                    "status": "DONE",
+                    "artifact_path": final_path,
+                    "artifact_size": os.path.getsize(final_path),
+                    "finished_at": datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not finished:
+            # expired as stale while it ran; the job stays FAILED
+            os.remove(final_path)
+    except Exception as e:
+        db.rollback()
+        job = db.get(ReportJob, job_id)
+        if job is not None and job.status == "RUNNING":
+            job.status = "FAILED"
+            job.error = f"{type(e).__name__}: {e}"[:500]
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db.close()
+
+
+def submit_report_job(
+    db: Session,
+    *,
+    admin_id: str,
+    start: date,
+    end: date,
+    sections: list[tuple[str, str, str]],
+    formats: list[str],
+) -> ReportJob:
+    """Record the job and hand it to the background coordinator; returns immediately."""
+    units_per_section = len(month_ranges(start, end)) * len(formats)
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        admin_id=admin_id,
+        params={
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "sections": [list(s) for s in sections],
+            "formats": list(formats),
+        },
+        status="QUEUED",
+        total_units=units_per_section * len(sections),
+        done_units=0,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    coordinator, _ = _executors()
+    coordinator.submit(_run_job, job.id)
+    return job
+
+
+def resume_report_jobs() -> int:
+    """Hand QUEUED jobs left by a previous process back to the coordinator; called once at startup."""
+    db = SessionLocal()
+    try:
+        job_ids = [
+            job_id
+            for (job_id,) in db.query(ReportJob.id)
+            .filter(ReportJob.status == "QUEUED")
+            .order_by(ReportJob.created_at.asc())
+        ]
+    finally:
+        db.close()
+    if job_ids:
+        coordinator, _ = _executors()
+        for job_id in job_ids:
+            coordinator.submit(_run_job, job_id)
+    return len(job_ids)
+
+
+def expire_stale_job(db: Session, job: ReportJob) -> None:
+    """A RUNNING job far past its start was lost with its process (restart / crash).
+
+    QUEUED jobs are never expired: they may be waiting behind a long pack, and
+    resume_report_jobs re-queues them after a restart.
+    """
+    if job.status != "RUNNING" or not job.started_at:
+        return
+    if datetime.utcnow() - job.started_at > timedelta(hours=REPORT_JOB_STALE_HOURS):
+        job.status = "FAILED"
+        job.error = "Job interrupted (server restarted?) — please resubmit"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+
+def job_progress(job: ReportJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "done_units": job.done_units,
+        "total_units": job.total_units,
+        "percent": round(100 * job.done_units / job.total_units, 1) if job.total_units else 100.0,
+        "params": job.params,
+        "artifact_size": job.artifact_size,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.models import AbsenceRequest, Attendance, DailyAttendance, ODRequest, Student
+from app.notifications_utils import add_student_notifications
+from app.section_calendar import section_holidays, section_timetables, working_days
+
+
+DECISIONS = ("APPROVED", "REJECTED")
+
+# longest date range a single OD/absence request may cover
+REQUEST_MAX_DAYS = int(os.getenv("REQUEST_MAX_DAYS", "31"))
+# how many days before today a request may start (0 = today or later)
+REQUEST_BACKDATE_DAYS = int(os.getenv("REQUEST_BACKDATE_DAYS", "0"))
+
+
+@dataclass(frozen=True)
+class RequestKind:
+    """What approving one kind of request writes and how its student is told."""
+
+    model: type
+    label: str  # notification text
+    id_key: str  # meta key (indexed, see notifications_utils.META_INDEXED_KEYS)
+    notification_prefix: str
+    daily_status: str
+    daily_source: str
+    slot_status: str
+
+
+OD_KIND = RequestKind(ODRequest, "OD request", "od_request_id", "OD", "OD", "CR OD", "OD")
+ABSENCE_KIND = RequestKind(
+    AbsenceRequest, "Absence request", "absence_request_id", "ABSENCE", "Absent", "CR ABSENT", "ABSENT"
+)
+
+
+class DecisionError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+# -------------------- DATE RANGES --------------------
+def request_range(req) -> tuple[date, date]:
+    return req.start_date or req.request_date, req.end_date or req.start_date or req.request_date
+
+
+def overlapping_pending_request(db: Session, model, student_id: int, start: date, end: date):
+    """The student's first PENDING request of this kind whose range intersects [start, end], if any.
+
+    Two ranges overlap iff each starts before the other ends: an index range
+    scan on (student_id, status, start_date, end_date).
+    """
+    return (
+        db.query(model)
+        .filter(
+            model.student_id == student_id,
+            model.status == "PENDING",
+            model.start_date <= end,
+            model.end_date >= start,
+        )
+        .order_by(model.start_date)
+        .first()
+    )
+
+
+def request_days(start: date, end: date, timetable: dict[str, list], holidays: set[date]) -> list[date]:
+    """Days a request covers. A single day is taken as asked; a range keeps the
+    section's working days (see section_calendar.working_days).
+    """
+    if start == end:
+        return [start]
+    return working_days(start, end, timetable, holidays)
+
+
+# -------------------- ATTENDANCE --------------------
+def upsert_attendance_marks(
+    db: Session,
+    daily: dict[tuple[int, date], dict],
+    slots: dict[tuple[int, date, int], str],
+) -> dict[str, int]:
+    """Write many daily rows ({(student_id, day): {status, source, marked_by}}) and slot rows
+    ({(student_id, day, slot): status}) with one read per table and a single flush.
+
+    Existing rows (all of them, should legacy duplicates exist) are updated in
+    place, the rest inserted. It goes through the unit of work rather than raw
+    INSERT/UPDATE so the flush hooks still run: semester stamping, report cache
+    versions and attendance bitmaps. The caller commits.
+    """
+    counts = {"daily_inserted": 0, "daily_updated": 0, "slots_inserted": 0, "slots_updated": 0}
+
+    if daily:
+        student_ids = {sid for sid, _ in daily}
+        days = {d for _, d in daily}
+        found = set()
+        for row in db.query(DailyAttendance).filter(
+            DailyAttendance.student_id.in_(student_ids), DailyAttendance.date.in_(days)
+        ):
+            values = daily.get((row.student_id, row.date))
+            if values is None:
+                continue
+            for field, value in values.items():
+                setattr(row, field, value)
+            found.add((row.student_id, row.date))
+            counts["daily_updated"] += 1
+        new = [
+            DailyAttendance(student_id=sid, date=d, **values)
+            for (sid, d), values in daily.items()
+            if (sid, d) not in found
+        ]
+        db.add_all(new)
+        counts["daily_inserted"] = len(new)
+
+    if slots:
+        student_ids = {sid for sid, _, _ in slots}
+        days = {d for _, d, _ in slots}
+        found = set()
+        for row in db.query(Attendance).filter(Attendance.student_id.in_(student_ids), Attendance.date.in_(days)):
+            status = slots.get((row.student_id, row.date, row.slot))
+            if status is None:
+                continue
+            row.status = status
+            found.add((row.student_id, row.date, row.slot))
+            counts["slots_updated"] += 1
+        new = [
+            Attendance(student_id=sid, date=d, slot=slot, status=status)
+            for (sid, d, slot), status in slots.items()
+            if (sid, d, slot) not in found
+        ]
+        db.add_all(new)
+        counts["slots_inserted"] = len(new)
+
+    db.flush()
+    return counts
+
+
+# -------------------- DECISIONS --------------------
+def decide_requests(db: Session, kind: RequestKind, cr_student: Student, items: list) -> list[dict]:
+    """Apply CR decisions [(id, decision, remarks)] to OD or absence requests of the CR's section.
+
+    Loads every request, the section timetable and its holidays once, expands
+    date ranges over working days, writes all attendance through
+    upsert_attendance_marks and queues every notification; the caller
+    commits once. Items that cannot be applied get an "error" (with an HTTP
+    status code) instead of a "status"; they don't stop the rest.
+    """
+    model = kind.model
+    ids = {item.id for item in items}
+    requests = {r.id: r for r in db.query(model).filter(model.id.in_(ids))} if ids else {}
+    section = (cr_student.department, cr_student.year, cr_student.section)
+
+    results: list[dict] = []
+    approved = []
+    seen: set[int] = set()
+    for item in items:
+        req = requests.get(item.id)
+        decision = (item.decision or "").upper().strip()
+        if item.id in seen:
+            results.append({"id": item.id, "error": "Duplicate id in batch", "status_code": 400})
+            continue
+        seen.add(item.id)
+        if req is None:
+            results.append({"id": item.id, "error": f"{kind.label} not found", "status_code": 404})
+            continue
+        if (req.department, req.year, req.section) != section:
+            results.append({"id": item.id, "error": "Not in your section", "status_code": 403})
+            continue
+        if decision not in DECISIONS:
+            results.append({"id": item.id, "error": "Invalid decision", "status_code": 400})
+            continue
+        req.status = decision
+        req.cr_remarks = item.remarks.strip() if item.remarks else None
+        if decision == "APPROVED":
+            approved.append(req)
+        results.append({"id": req.id, "status": req.status})
+
+    daily: dict[tuple[int, date], dict] = {}
+    slots: dict[tuple[int, date, int], str] = {}
+    timetable = section_timetables(db, {section}).get(section, {}) if approved else {}
+    ranges = {req.id: request_range(req) for req in approved}
+    holidays = (
+        section_holidays(db, section, min(r[0] for r in ranges.values()), max(r[1] for r in ranges.values()))
+        if any(start != end for start, end in ranges.values())
+        else set()
+    )
+    for req in approved:
+        names = {s.strip() for s in (req.slots or "").split(",") if s.strip()}
+        for day in request_days(*ranges[req.id], timetable, holidays):
+            day_slots = timetable.get(day.strftime("%A"), [])
+            if req.category != "FULL_DAY":
+                day_slots = [ts for ts in day_slots if ts.slot_name in names]
+            for ts in day_slots:
+                slots[(req.student_id, day, ts.id)] = kind.slot_status
+            # full-day requests also set the consolidated daily row; slot requests are per-slot only
+            if req.category == "FULL_DAY":
+                daily[(req.student_id, day)] = {
+                    "status": kind.daily_status,
+                    "source": kind.daily_source,
+                    "marked_by": cr_student.id,
+                }
+    if daily or slots:
+        upsert_attendance_marks(db, daily, slots)
+
+    decided = [requests[r["id"]] for r in results if "status" in r]
+    notifications = []
+    for req in decided:
+        start, end = request_range(req)
+        span = start.isoformat() if start == end else f"{start.isoformat()} to {end.isoformat()}"
+        notifications.append(
+            {
+                "student_id": req.student_id,
+                "message": f"{kind.label} {req.status.title()} ({span})",
+                "notification_type": f"{kind.notification_prefix}_{req.status}",
+                "meta": {
+                    kind.id_key: req.id,
+                    "date": start.isoformat(),
+                    "end_date": end.isoformat(),
+                    "category": req.category,
+                    "slots": req.slots,
+                    "cr_remarks": req.cr_remarks,
+                },
+            }
+        )
+    add_student_notifications(db, notifications)
+    return results
+
+
+def decide_request(db: Session, kind: RequestKind, cr_student: Student, item) -> str:
+    """Single decision through the batch path; raises DecisionError where it would be skipped."""
+    (result,) = decide_requests(db, kind, cr_student, [item])
+    if "error" in result:
+        raise DecisionError(result["status_code"], result["error"])
+    return result["status"]
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, File, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect, text, func, distinct
+from sqlalchemy import func, select
+import calendar
+import os
 import secrets
 from datetime import date
 
+import numpy as np
+
 from app.database import SessionLocal
 from app.models import (
     Student,
@@ -12,12 +17,16 @@ from app.models import (
     DailyAttendance,
     SemesterSettings,
     Slot,
-    Attendance,
     Timetable,
     Subject,
     TimeSlot,
     CRAssignment,
     HolidayDeclaration,
+    SmsAlert,
+    ReportJob,
+    Semester,
+    StudentAttendanceBitmap,
+    SectionCalendarBitmap,
 )
 
 
@@ -33,12 +42,45 @@ from app.schemas import (
     CRAssignmentBackupUpsertSchema,
     CRAssignmentRemoveSchema,
     HolidayDeclareSchema,
+    ReportJobCreateSchema,
+    YearPromotionSchema,
 )
 
 
 from app.dependencies import admin_required
 from app.utils.qr import generate_dynamic_qr, cleanup_old_qr
-from app.semester_year_utils import advance_year_value
+from app.semester_year_utils import YEAR_ADVANCE_MAP
+from app.year_promotion import PromotionConflict, promote_years, promotion_preview
+from app.student_import import import_students_csv
+from app.student_search import search_students
+from app.grievance_search import search_grievances
+from app.sms_alerts import send_section_absentee_alerts
+from app.proof_previews import preview_url
+from app.proof_gc import collect_orphan_proofs, proof_storage_report
+from app.report_cache import bump_all_versions
+from app.attendance_matrix import (
+    DEFAULTER_THRESHOLD,
+    PRESENT,
+    UNMARKED,
+    load_section_matrix,
+    section_date_range,
+)
+from app.semesters import schedule_archive, semester_progress, switch_semester
+from app.semester_snapshots import list_snapshots, load_snapshot, semester_summary
+from app.attendance_export import (
+    EXPORT_FORMATS,
+    EXPORT_GRANULARITIES,
+    EXPORT_MAX_DAYS,
+    MEDIA_TYPES,
+    stream_attendance_matrix,
+)
+from app.report_jobs import (
+    REPORT_JOB_FORMATS,
+    REPORT_JOB_MAX_DAYS,
+    expire_stale_job,
+    job_progress,
+    submit_report_job,
+)
 
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -279,6 +321,29 @@ def register_student(
     }
 
 
+@router.post("/students/import")
+def import_students(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Bulk-register students from a CSV (spreadsheets: save as CSV); returns a per-row error report.
+
+    Columns: roll_number, name, mobile, optional department/year/section
+    (default: the admin's section) and is_cr.
+    """
+    if not (file.filename or "").lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Upload a .csv file")
+    defaults = {"department": admin["department"], "year": admin["year"], "section": admin["section"]}
+    try:
+        report = import_students_csv(db, file.file, defaults)
+    except ValueError as e:
+        # bad header or undecodable bytes; chunks before the failure are already committed
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Imported {report['imported']} of {report['rows']} students", **report}
+
+
 @router.get("/students")
 def list_students_for_admin_cr(
     db: Session = Depends(get_db),
@@ -308,6 +373,31 @@ def list_students_for_admin_cr(
     }
 
 
+@router.get("/students/search")
+def search_students_for_admin(
+    q: str,
+    scope: str = "section",
+    limit: int = 20,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Autocomplete by roll-number prefix or part of the name, ranked and paginated."""
+    if scope not in ("section", "department"):
+        raise HTTPException(status_code=400, detail="scope must be 'section' or 'department'")
+    in_section = scope == "section"
+    total, results = search_students(
+        db,
+        q,
+        department=admin["department"],
+        year=admin["year"] if in_section else None,
+        section=admin["section"] if in_section else None,
+        limit=limit,
+        offset=offset,
+    )
+    return {"query": q, "total": total, "limit": limit, "offset": offset, "students": results}
+
+
 
 # --------------------------------------------------
 # ADMIN: SEMESTER
@@ -339,34 +429,65 @@ def reset_semester(
     db: Session = Depends(get_db),
     admin=Depends(admin_required),
 ):
+    """Close the admin's section semester and start a new one.
 
+    The switch is two row writes; the closed semester is snapshotted and its
+    attendance moved to the archive tables in the background (poll GET
+    /admin/semester/archive).
+    """
+    section = (admin["department"], admin["year"], admin["section"])
 
+    closed, opened = switch_semester(db, section)
 
-    inspector = inspect(db.bind)
-
-    tables_to_reset = [
-        "daily_attendance",
-        "attendance",
-        "timetable",
-        "subjects",
-        "qr_sessions",
-    ]
-
-    for table in tables_to_reset:
-        if inspector.has_table(table):
-            # SQLite does not support TRUNCATE. Use DELETE.
-            # Use raw SQL so it works consistently with SQLAlchemy models.
-            db.execute(text(f"DELETE FROM {table}"))
-
-
+    # this admin's timetable setup belongs to the closed semester
+    for model in (Timetable, Subject, QRSession):
+        db.query(model).filter(model.admin_id == admin["admin_id"]).delete(synchronize_session=False)
 
+    # bitmaps restart at the new semester's origin
+    section_students = select(Student.id).where(
+        Student.department == admin["department"],
+        Student.year == admin["year"],
+        Student.section == admin["section"],
+    )
+    db.query(StudentAttendanceBitmap).filter(
+        StudentAttendanceBitmap.student_id.in_(section_students)
+    ).delete(synchronize_session=False)
+    db.query(SectionCalendarBitmap).filter(
+        SectionCalendarBitmap.department == admin["department"],
+        SectionCalendarBitmap.year == admin["year"],
+        SectionCalendarBitmap.section == admin["section"],
+    ).delete(synchronize_session=False)
+
+    # archived rows leave the live table without ORM events; invalidate cached daily PDFs explicitly
+    bump_all_versions(db, section)
 
     db.commit()
+    schedule_archive(closed.id)
+
+    return {
+        "message": "Semester reset successful. Students retained.",
+        "semester_id": opened.id,
+        "archive": semester_progress(closed),
+    }
 
-    # Optional: keep backward compatibility for frontend calls
-    # (no-op default; actual year advance is handled by /semester/reset/advance-year)
 
-    return {"message": "Semester reset successful. Students retained."}
+@router.get("/semester/archive")
+def semester_archive_status(
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Semesters of the admin's section, newest first, with archive progress."""
+    semesters = (
+        db.query(Semester)
+        .filter(
+            Semester.department == admin["department"],
+            Semester.year == admin["year"],
+            Semester.section == admin["section"],
+        )
+        .order_by(Semester.id.desc())
+        .all()
+    )
+    return {"semesters": [semester_progress(s) for s in semesters]}
 
 
 @router.post("/semester/reset/advance-year")
@@ -374,29 +495,60 @@ def advance_student_years_after_reset(
     db: Session = Depends(get_db),
     admin=Depends(admin_required),
 ):
-    # Advance student.year by +1 for the admin's department/year/section scope.
-    # This is best-effort and only affects students in the current admin scope.
+    # Advance the admin's section by one year (I->II->III->IV, IV stays IV) in one UPDATE per table.
+    try:
+        updated = promote_years(db, admin["department"], section=admin["section"], years=[admin["year"]])
+    except PromotionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "conflicts": e.conflicts})
+    db.commit()
 
-    # Map roman years I->II->III->IV (IV stays IV)
-    today = date.today()  # kept for future extensions
+    return {"message": "Student years advanced successfully", "updated": updated["students"], "tables": updated}
 
-    # Update all students in current admin scope
-    students = (
-        db.query(Student)
-        .filter(
-            Student.department == admin["department"],
-            Student.year == admin["year"],
-            Student.section == admin["section"],
+
+@router.post("/semester/promote")
+def promote_section_years(
+    payload: YearPromotionSchema,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Year-end promotion of the admin's own section; dry_run (default) only counts.
+
+    Department-wide promotion rewrites other admins' sections, so it is run by
+    an operator: python -m app.year_promotion DEPARTMENT --apply
+    """
+    if payload.scope == "department":
+        raise HTTPException(
+            status_code=403,
+            detail="Department-wide promotion is run by an operator (python -m app.year_promotion)",
         )
-        .all()
-    )
+    if payload.scope != "section":
+        raise HTTPException(status_code=400, detail="scope must be 'section'")
+    unknown = sorted(set(payload.years or []) - set(YEAR_ADVANCE_MAP))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown years: {', '.join(unknown)}")
+    if payload.years is not None and set(payload.years) != {admin["year"]}:
+        raise HTTPException(status_code=403, detail="You can only promote your own year and section")
 
-    for s in students:
-        s.year = advance_year_value(s.year)
+    section = admin["section"]
+    years = [admin["year"]]
 
-    db.commit()
+    preview = promotion_preview(db, admin["department"], section=section, years=years)
+    if payload.dry_run:
+        return {"dry_run": True, "scope": payload.scope, **preview}
 
-    return {"message": "Student years advanced successfully", "updated": len(students)}
+    try:
+        updated = promote_years(db, admin["department"], section=section, years=years)
+    except PromotionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "conflicts": e.conflicts})
+    db.commit()
+    return {
+        "dry_run": False,
+        "scope": payload.scope,
+        "year_map": preview["year_map"],
+        "updated": updated,
+        # the admin's token still carries the old year until they sign in again
+        "relogin_required": bool(updated["admins"]),
+    }
 
 
 
@@ -475,20 +627,20 @@ def admin_dashboard_stats(
 ):
     today = date.today()
 
-    total_students = db.query(Student).filter(
-        Student.department == admin["department"],
-        Student.year == admin["year"],
-        Student.section == admin["section"],
-    ).count()
+    matrix = load_section_matrix(
+        db,
+        department=admin["department"],
+        year=admin["year"],
+        section=admin["section"],
+        start=today,
+        end=today,
+    )
+    total_students = len(matrix.rolls)
 
     sections = db.query(Student.department, Student.year, Student.section).distinct().count()
 
-    present_today = db.query(DailyAttendance).filter(
-        DailyAttendance.date == today,
-        DailyAttendance.status == "Present",
-    ).count()
-
-    total_marked_today = db.query(DailyAttendance).filter(DailyAttendance.date == today).count()
+    present_today = int((matrix.daily[:, 0] == PRESENT).sum())
+    total_marked_today = int((matrix.daily[:, 0] != UNMARKED).sum())
 
     present_percent = (
         round((present_today / total_marked_today) * 100)
@@ -520,21 +672,27 @@ def admin_dashboard_stats(
 @router.get("/grievances")
 def admin_grievances(
     status: str | None = None,
+    q: str | None = None,
+    grievance_type: str | None = None,
+    month: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
     db: Session = Depends(get_db),
     admin=Depends(admin_required),
 ):
-    query = db.query(GrievanceRequest).filter(
-        GrievanceRequest.department == admin["department"],
-        GrievanceRequest.year == admin["year"],
-        GrievanceRequest.section == admin["section"],
+    grievances, total, facets = search_grievances(
+        db,
+        department=admin["department"],
+        year=admin["year"],
+        section=admin["section"],
+        q=q,
+        status=status,
+        grievance_type=grievance_type,
+        month=month,
+        limit=limit,
+        offset=offset,
     )
 
-    if status:
-        normalized_status = status.strip().upper().replace(" ", "_")
-        query = query.filter(GrievanceRequest.status == normalized_status)
-
-    grievances = query.order_by(GrievanceRequest.created_at.desc()).all()
-
     return {
         "requests": [
             {
@@ -546,11 +704,14 @@ def admin_grievances(
                 "request_date": str(g.request_date),
                 "description": g.description,
                 "proof_url": g.proof_url,
+                "preview_url": preview_url(preview_path),
                 "status": g.status.title().replace("_", " "),
                 "review_remarks": g.review_remarks,
             }
-            for g in grievances
-        ]
+            for g, preview_path in grievances
+        ],
+        "total": total,
+        "facets": facets,
     }
 
 
@@ -623,34 +784,37 @@ def get_slot_attendance(
 ):
     today = date.today()
 
-    data = db.query(
+    timetable = db.query(
         Subject.name.label("subject"),
+        TimeSlot.id.label("slot_id"),
         TimeSlot.slot_name.label("slot"),
-        func.count(Attendance.id).label("present"),
     ).join(
         Timetable, Timetable.subject_id == Subject.id
     ).join(
         TimeSlot, Timetable.slot_id == TimeSlot.id
-    ).outerjoin(
-        Attendance,
-        (Attendance.slot == TimeSlot.id)
-        & (Attendance.date == today)
-        & (Attendance.status == "PRESENT"),
     ).filter(
         Timetable.admin_id == admin["admin_id"]
-    ).group_by(
-        Subject.name, TimeSlot.slot_name
-    ).all()
+    ).distinct().all()
 
-    total_students = db.query(Student).filter(
-        Student.department == admin["department"],
-        Student.year == admin["year"],
-        Student.section == admin["section"],
-    ).count()
+    matrix = load_section_matrix(
+        db,
+        department=admin["department"],
+        year=admin["year"],
+        section=admin["section"],
+        start=today,
+        end=today,
+        include_slots=True,
+    )
+    present_by_slot = dict(zip(matrix.slot_ids, (matrix.slots[:, 0, :] == PRESENT).sum(axis=0).tolist()))
+
+    present: dict[tuple[str, str], int] = {}
+    for row in timetable:
+        key = (row.subject, row.slot)
+        present[key] = present.get(key, 0) + present_by_slot.get(row.slot_id, 0)
 
     return [
-        {"subject": row.subject, "slot": row.slot, "present": row.present, "total": total_students}
-        for row in data
+        {"subject": subject, "slot": slot, "present": count, "total": len(matrix.rolls)}
+        for (subject, slot), count in present.items()
     ]
 
 
@@ -659,34 +823,166 @@ def attendance_report(
     db: Session = Depends(get_db),
     admin=Depends(admin_required),
 ):
-    students = db.query(Student).filter(
-        Student.department == admin["department"],
-        Student.year == admin["year"],
-        Student.section == admin["section"],
-    ).all()
+    scope = {"department": admin["department"], "year": admin["year"], "section": admin["section"]}
+    start, end = section_date_range(db, **scope) or (date.today(), date.today())
+    matrix = load_section_matrix(db, **scope, start=start, end=end)
 
-    working_days = db.query(func.count(distinct(DailyAttendance.date))).scalar() or 0
+    working_days = matrix.working_days
+    present_days = matrix.present_days().tolist()
+    percentages = matrix.percentages().tolist()
+
+    return [
+        {
+            "roll": roll,
+            "name": name,
+            "working_days": working_days,
+            "present_days": present,
+            "percentage": percentage,
+        }
+        for roll, name, present, percentage in zip(matrix.rolls, matrix.names, present_days, percentages)
+    ]
 
-    report = []
-    for s in students:
-        present_days = db.query(DailyAttendance).filter(
-            DailyAttendance.student_id == s.id,
-            DailyAttendance.status == "PRESENT",
-        ).count()
 
-        percentage = round((present_days / working_days) * 100, 2) if working_days > 0 else 0
+@router.get("/attendance/analytics")
+def attendance_analytics(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    threshold: float = DEFAULTER_THRESHOLD,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Defaulters, weekday / slot heatmaps and absence streaks for the admin's section (OD counts as present)."""
+    scope = {"department": admin["department"], "year": admin["year"], "section": admin["section"]}
+    if start_date is None or end_date is None:
+        first, last = section_date_range(db, **scope) or (date.today(), date.today())
+        start_date = start_date or first
+        end_date = end_date or last
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    matrix = load_section_matrix(db, **scope, start=start_date, end=end_date, include_slots=True)
+    percentages = matrix.percentages(count_od=True)
+    longest, current = matrix.absence_streaks()
+    slot_names = dict(db.query(TimeSlot.id, TimeSlot.slot_name).filter(TimeSlot.id.in_(matrix.slot_ids)).all())
+
+    def rate(value):
+        return None if np.isnan(value) else float(value)
 
-        report.append(
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "students": len(matrix.rolls),
+        "working_days": matrix.working_days,
+        "average_percentage": round(float(percentages.mean()), 2) if len(percentages) else 0,
+        "defaulters": [
             {
-                "roll": s.roll_number,
-                "name": s.name,
-                "working_days": working_days,
-                "present_days": present_days,
-                "percentage": percentage,
+                "roll": matrix.rolls[i],
+                "name": matrix.names[i],
+                "percentage": float(percentages[i]),
+                "current_absence_streak": int(current[i]),
             }
-        )
+            for i in matrix.defaulters(threshold).tolist()
+        ],
+        "weekday_heatmap": {
+            calendar.day_name[wd]: rate(value)
+            for wd, value in enumerate(matrix.weekday_heatmap())
+            if wd < 5 or not np.isnan(value)
+        },
+        "slot_heatmap": [
+            {"slot_id": slot_id, "slot": slot_names.get(slot_id), "present_percent": rate(value)}
+            for slot_id, value in zip(matrix.slot_ids, matrix.slot_heatmap())
+        ],
+        "longest_absence_streaks": sorted(
+            (
+                {"roll": roll, "name": name, "longest": int(run), "current": int(now)}
+                for roll, name, run, now in zip(matrix.rolls, matrix.names, longest, current)
+                if run > 0
+            ),
+            key=lambda row: -row["longest"],
+        )[:10],
+    }
+
+
+@router.get("/attendance/export")
+def export_attendance_matrix(
+    start_date: date,
+    end_date: date,
+    format: str = "csv",
+    granularity: str = "day",
+    scope: str = "section",
+    admin=Depends(admin_required),
+):
+    """Stream a students x dates matrix (granularity=slot: x date-slots) as CSV or NDJSON.
+
+    scope=department covers every section of the admin's department.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if granularity not in EXPORT_GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(EXPORT_GRANULARITIES)}")
+    if scope not in ("section", "department"):
+        raise HTTPException(status_code=400, detail="scope must be section or department")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (end_date - start_date).days + 1 > EXPORT_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {EXPORT_MAX_DAYS} days")
+
+    whole_department = scope == "department"
+    label = admin["department"] if whole_department else f"{admin['department']}_{admin['year']}_{admin['section']}"
+    filename = f"attendance_{label}_{start_date.isoformat()}_{end_date.isoformat()}.{format}".replace(" ", "-")
+    return StreamingResponse(
+        stream_attendance_matrix(
+            department=admin["department"],
+            year=None if whole_department else admin["year"],
+            section=None if whole_department else admin["section"],
+            start=start_date,
+            end=end_date,
+            fmt=format,
+            granularity=granularity,
+        ),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/semesters/snapshots")
+def list_semester_snapshots(admin=Depends(admin_required)):
+    return [
+        {k: v for k, v in manifest.items() if k not in ("path", "files")}
+        for manifest in list_snapshots(admin["department"], admin["year"], admin["section"])
+    ]
+
+
+@router.get("/semesters/compare")
+def compare_semesters(
+    include_current: bool = True,
+    threshold: float = DEFAULTER_THRESHOLD,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Side-by-side summaries of past semesters (memory-mapped snapshots, no DB reads) and the live one."""
+    semesters = [
+        {
+            "start_date": manifest["start_date"],
+            "end_date": manifest["end_date"],
+            "archived": True,
+            **semester_summary(load_snapshot(manifest["path"]), threshold),
+        }
+        for manifest in list_snapshots(admin["department"], admin["year"], admin["section"])
+    ]
 
-    return report
+    if include_current:
+        scope = {"department": admin["department"], "year": admin["year"], "section": admin["section"]}
+        span = section_date_range(db, **scope)
+        if span is not None:
+            semesters.append({
+                "start_date": span[0].isoformat(),
+                "end_date": span[1].isoformat(),
+                "archived": False,
+                **semester_summary(load_section_matrix(db, **scope, start=span[0], end=span[1]), threshold),
+            })
+
+    return {"semesters": semesters}
 
 
 # -------------------- Timetable Management (keep as-is) --------------------
@@ -865,3 +1161,177 @@ def declare_holiday(
     }
 
 
+# ===================== ABSENTEE SMS ALERTS (Admin) =====================
+@router.post("/alerts/absentees")
+def send_absentee_alerts(
+    day: date | None = None,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Queue + send end-of-day absentee SMS for the admin's section (idempotent per day)."""
+    report = send_section_absentee_alerts(
+        db,
+        department=admin["department"],
+        year=admin["year"],
+        section=admin["section"],
+        day=day or date.today(),
+    )
+    return {"message": "Absentee alerts processed", "date": (day or date.today()).isoformat(), **report}
+
+
+@router.get("/alerts/absentees")
+def list_absentee_alerts(
+    day: date | None = None,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    day = day or date.today()
+    rows = (
+        db.query(SmsAlert, Student)
+        .join(Student, Student.id == SmsAlert.student_id)
+        .filter(
+            SmsAlert.alert_date == day,
+            Student.department == admin["department"],
+            Student.year == admin["year"],
+            Student.section == admin["section"],
+        )
+        .order_by(Student.roll_number)
+        .all()
+    )
+    return {
+        "date": day.isoformat(),
+        "alerts": [
+            {
+                "roll_number": s.roll_number,
+                "name": s.name,
+                "mobile": a.mobile,
+                "status": a.status,
+                "attempts": a.attempts,
+                "error": a.error,
+            }
+            for a, s in rows
+        ],
+    }
+
+
+# --------------------------------------------------
+# PROOF STORAGE (orphan GC + usage)
+# --------------------------------------------------
+@router.post("/proofs/gc")
+def run_proof_gc(
+    grace_hours: float | None = None,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Report unreferenced proof files; deleting or quarantining them is done by
+    the operator with ``python -m app.proof_gc delete|quarantine``."""
+    if grace_hours is not None and grace_hours < 1:
+        raise HTTPException(status_code=400, detail="grace_hours must be at least 1")
+
+    report = collect_orphan_proofs(db, mode="report", grace_hours=grace_hours)
+    return {"message": "Proof GC completed", **report}
+
+
+@router.get("/proofs/storage")
+def proof_storage_usage(
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    report = proof_storage_report(db)
+    own = next(
+        (
+            row
+            for row in report["sections"]
+            if (row["department"], row["year"], row["section"])
+            == (admin["department"], admin["year"], admin["section"])
+        ),
+        {"department": admin["department"], "year": admin["year"], "section": admin["section"], "files": 0, "bytes": 0},
+    )
+    return {
+        "section": own,
+        "total": report["scanned"],
+        "orphans": report["orphans"],
+    }
+
+
+# --------------------------------------------------
+# BULK REPORT JOBS (section registers, zipped)
+# --------------------------------------------------
+def _own_report_job(db: Session, job_id: str, admin) -> ReportJob:
+    job = db.get(ReportJob, job_id)
+    if not job or job.admin_id != admin["admin_id"]:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    expire_stale_job(db, job)
+    return job
+
+
+@router.post("/reports/jobs", status_code=202)
+def submit_bulk_report_job(
+    payload: ReportJobCreateSchema,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    """Queue per-section, per-month attendance registers (PDF/CSV) as one zip; poll for progress."""
+    if payload.start_date > payload.end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (payload.end_date - payload.start_date).days + 1 > REPORT_JOB_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {REPORT_JOB_MAX_DAYS} days")
+
+    formats = list(dict.fromkeys(f.lower() for f in payload.formats))
+    if not formats or any(f not in REPORT_JOB_FORMATS for f in formats):
+        raise HTTPException(status_code=400, detail=f"formats must be from {', '.join(REPORT_JOB_FORMATS)}")
+
+    if payload.sections:
+        sections = list(dict.fromkeys((s.department, s.year, s.section) for s in payload.sections))
+        if any(dept != admin["department"] for dept, _, _ in sections):
+            raise HTTPException(status_code=403, detail="Not allowed for other departments")
+    else:
+        sections = [
+            tuple(row)
+            for row in db.query(Student.department, Student.year, Student.section)
+            .filter(Student.department == admin["department"])
+            .distinct()
+            .order_by(Student.year, Student.section)
+            .all()
+        ]
+    if not sections:
+        raise HTTPException(status_code=404, detail="No sections to report on")
+
+    job = submit_report_job(
+        db,
+        admin_id=admin["admin_id"],
+        start=payload.start_date,
+        end=payload.end_date,
+        sections=sections,
+        formats=formats,
+    )
+    return {"message": "Report job queued", **job_progress(job)}
+
+
+@router.get("/reports/jobs/{job_id}")
+def get_bulk_report_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    return job_progress(_own_report_job(db, job_id, admin))
+
+
+@router.get("/reports/jobs/{job_id}/download")
+def download_bulk_report_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_required),
+):
+    job = _own_report_job(db, job_id, admin)
+    if job.status != "DONE":
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    if not job.artifact_path or not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=410, detail="Report artifact is no longer available")
+
+    params = job.params
+    return FileResponse(
+        job.artifact_path,
+        media_type="application/zip",
+        filename=f"attendance_registers_{params['start_date']}_{params['end_date']}.zip",
+    )
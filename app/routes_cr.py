@@ -1,29 +1,19 @@
 # presenza-backend/app/routes_cr.py
 
-from fastapi import APIRouter, Depends, HTTPException, Form, Body
+from fastapi import APIRouter, Depends, HTTPException, Form, Body, Request
 from sqlalchemy.orm import Session
 from datetime import date, datetime
-from io import BytesIO
-import os
 import pytz
 
-from fastapi.responses import StreamingResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-
 from app.database import SessionLocal
 from app.models import (
     AbsenceRequest,
-    Admin,
-    Attendance,
     DailyAttendance,
     GrievanceRequest,
     ODRequest,
+    ProofBlob,
     Student,
     Subject,
-    Timetable,
-    TimeSlot,
 )
 from app.dependencies import cr_required, student_required
 from app.schemas import (
@@ -32,9 +22,19 @@ from app.schemas import (
     CRAttendanceEditBulkSchema,
     CRManualAttendanceBulkSchema,
     GrievanceDecisionSchema,
+    RequestDecisionBatchSchema,
+    RequestDecisionItem,
 )
 
 from app.notifications_utils import create_notification_for_student
+from app.utils.attendance import section_absentees_query
+from app.proof_previews import preview_url
+from app.proof_phash import possible_duplicates
+from app.pdf_reports import ReportColumn, ReportScope, render_report
+from app.report_cache import cached_report_response
+from app.student_search import search_students
+from app.grievance_search import search_grievances
+from app.request_decisions import ABSENCE_KIND, OD_KIND, DecisionError, decide_request, decide_requests
 
 
 
@@ -52,84 +52,23 @@ def get_db():
         db.close()
 
 
-def _apply_od_slot_attendance(db: Session, od: ODRequest, admin: Admin) -> None:
-    """Upsert per-slot attendance as OD (Attendance.slot stores TimeSlot.id)."""
-    weekday = od.request_date.strftime("%A")
-    base_q = (
-        db.query(TimeSlot)
-        .join(Timetable, Timetable.slot_id == TimeSlot.id)
-        .filter(
-            Timetable.admin_id == admin.admin_id,
-            Timetable.day == weekday,
-        )
-    )
-    if od.category == "FULL_DAY":
-        time_slots = base_q.all()
-    else:
-        names = {s.strip() for s in (od.slots or "").split(",") if s.strip()}
-        time_slots = [ts for ts in base_q.all() if ts.slot_name in names]
-
-    for ts in time_slots:
-        row = (
-            db.query(Attendance)
-            .filter(
-                Attendance.student_id == od.student_id,
-                Attendance.date == od.request_date,
-                Attendance.slot == ts.id,
-            )
-            .first()
-        )
-        if row:
-            row.status = "OD"
-        else:
-            db.add(
-                Attendance(
-                    student_id=od.student_id,
-                    date=od.request_date,
-                    slot=ts.id,
-                    status="OD",
-                )
-            )
-
+def _cr_student(db: Session, cr: dict) -> Student:
+    if not cr["is_cr"]:
+        raise HTTPException(status_code=403, detail="Only CR allowed")
+    cr_student = db.query(Student).filter(Student.id == cr["student_id"]).first()
+    if not cr_student:
+        raise HTTPException(status_code=404, detail="CR not found")
+    return cr_student
 
-def _apply_absent_slot_attendance(db: Session, req: AbsenceRequest, admin: Admin) -> None:
-    """Upsert per-slot attendance as ABSENT (Attendance.slot stores TimeSlot.id)."""
-    weekday = req.request_date.strftime("%A")
-    base_q = (
-        db.query(TimeSlot)
-        .join(Timetable, Timetable.slot_id == TimeSlot.id)
-        .filter(
-            Timetable.admin_id == admin.admin_id,
-            Timetable.day == weekday,
-        )
-    )
-    if req.category == "FULL_DAY":
-        time_slots = base_q.all()
-    else:
-        names = {s.strip() for s in (req.slots or "").split(",") if s.strip()}
-        time_slots = [ts for ts in base_q.all() if ts.slot_name in names]
 
-    for ts in time_slots:
-        row = (
-            db.query(Attendance)
-            .filter(
-                Attendance.student_id == req.student_id,
-                Attendance.date == req.request_date,
-                Attendance.slot == ts.id,
-            )
-            .first()
-        )
-        if row:
-            row.status = "ABSENT"
-        else:
-            db.add(
-                Attendance(
-                    student_id=req.student_id,
-                    date=req.request_date,
-                    slot=ts.id,
-                    status="ABSENT",
-                )
-            )
+def _batch_response(results: list[dict]) -> dict:
+    applied = [r for r in results if "status" in r]
+    return {
+        "message": f"{len(applied)} of {len(results)} decisions saved",
+        "results": results,
+        "applied": len(applied),
+        "failed": len(results) - len(applied),
+    }
 
 
 # ===================== HELPERS =====================
@@ -139,73 +78,19 @@ def to_ist(dt: datetime | None):
     if dt.tzinfo is None:
         dt = pytz.utc.localize(dt)
     return dt.astimezone(IST)
-def draw_watermark(c, width, height):
-    if os.path.exists(PRESENZA_LOGO):
-        c.saveState()
-        c.setFillAlpha(0.08)
-        c.drawImage(
-            PRESENZA_LOGO,
-            width / 2 - 6 * cm,
-            height / 2 - 6 * cm,
-            width=12 * cm,
-            height=12 * cm,
-            mask="auto",
-        )
-        c.restoreState()
 
 
-def draw_header(c, width, height, title, cr_student, today):
-    draw_watermark(c, width, height)
-
-    if os.path.exists(MINDURA_LOGO):
-        c.drawImage(
-            MINDURA_LOGO,
-            width / 2 - 1.5 * cm,
-            height - 3 * cm,
-            width=3 * cm,
-            height=3 * cm,
-            mask="auto",
-        )
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawCentredString(width / 2, height - 3.6 * cm, "MINDURA TECHNOLOGIES")
-
-    y = height - 5 * cm
-    c.setFont("Helvetica-Bold", 14)
-    c.drawCentredString(width / 2, y, title)
-
-    y -= 1 * cm
-    c.setFont("Helvetica", 10)
-    c.drawString(2 * cm, y, f"Department : {cr_student.department}")
-    y -= 0.5 * cm
-    c.drawString(2 * cm, y, f"Year / Section : {cr_student.year} {cr_student.section}")
-    y -= 0.5 * cm
-    c.drawString(2 * cm, y, f"Date : {today.strftime('%d-%m-%Y')}")
-
-    return y - 1 * cm
-
-
-def draw_footer(c, width):
-    c.setFont("Helvetica", 9)
-    c.drawCentredString(
-        width / 2,
-        2.6 * cm,
-        f"Report generated on : {to_ist(datetime.now()).strftime('%d-%m-%Y %I:%M %p')}",
-    )
-    c.setFont("Helvetica-Bold", 9)
-    c.drawCentredString(width / 2, 2.0 * cm, "MINDURA TECHNOLOGIES")
-    c.setFont("Helvetica", 9)
-    c.drawCentredString(
-        width / 2,
-        1.4 * cm,
-        "© 2026 MINDURA TECHNOLOGIES. All rights reserved.",
+def _report_scope(cr_student: Student, day: date) -> ReportScope:
+    return ReportScope(
+        department=cr_student.department,
+        year=cr_student.year,
+        section=cr_student.section,
+        day=day,
     )
-# ===================== ASSETS =====================
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 
-MINDURA_LOGO = os.path.join(ASSETS_DIR, "mindura_logo.png")
-PRESENZA_LOGO = os.path.join(ASSETS_DIR, "presenza_logo.png")
+
+PRESENT_COLUMNS = [ReportColumn("Roll Number", 2), ReportColumn("Name", 7), ReportColumn("Time", 14)]
+ABSENT_COLUMNS = [ReportColumn("Roll Number", 2), ReportColumn("Name", 7)]
 
 
 # ===================== SCAN =====================
@@ -514,6 +399,26 @@ def get_students_for_manual_attendance(
     }
 
 
+@router.get("/students/search")
+def search_class_students(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    cr=Depends(cr_required),
+):
+    total, results = search_students(
+        db,
+        q,
+        department=cr["department"],
+        year=cr["year"],
+        section=cr["section"],
+        limit=limit,
+        offset=offset,
+    )
+    return {"query": q, "total": total, "limit": limit, "offset": offset, "students": results}
+
+
 # ===================== PRESENT LIST =====================
 @router.get("/attendance/daily/today")
 def get_today_present(
@@ -569,23 +474,13 @@ def get_today_absent(
         Student.id == cr["student_id"]
     ).first()
 
-    present_ids = (
-        db.query(DailyAttendance.student_id)
-        .filter(DailyAttendance.date == today)
-        .subquery()
-    )
-
-    absentees = (
-        db.query(Student)
-        .filter(
-            Student.department == cr_student.department,
-            Student.year == cr_student.year,
-            Student.section == cr_student.section,
-            ~Student.id.in_(present_ids),
-        )
-        .order_by(Student.roll_number)
-        .all()
-    )
+    absentees = section_absentees_query(
+        db,
+        department=cr_student.department,
+        year=cr_student.year,
+        section=cr_student.section,
+        day=today,
+    ).all()
 
     return {
         "absent": [
@@ -609,7 +504,8 @@ def get_pending_od_requests(
         raise HTTPException(status_code=404, detail="CR not found")
 
     pending = (
-        db.query(ODRequest)
+        db.query(ODRequest, ProofBlob.preview_path)
+        .outerjoin(ProofBlob, ProofBlob.sha256 == ODRequest.proof_sha256)
         .filter(
             ODRequest.status == "PENDING",
             ODRequest.department == cr_student.department,
@@ -619,6 +515,7 @@ def get_pending_od_requests(
         .order_by(ODRequest.created_at.desc())
         .all()
     )
+    duplicates = possible_duplicates(db, [r for r, _ in pending])
 
     return {
         "requests": [
@@ -629,13 +526,17 @@ def get_pending_od_requests(
                 "category": r.category,
                 "slots": r.slots,
                 "date": r.request_date.isoformat(),
+                "start_date": (r.start_date or r.request_date).isoformat(),
+                "end_date": (r.end_date or r.request_date).isoformat(),
                 "reason": r.reason,
                 "proof_url": r.proof_url,
+                "preview_url": preview_url(preview_path),
                 "proof_type": r.proof_type,
+                "possible_duplicate_of": duplicates[("OD", r.id)],
                 "status": r.status,
                 "cr_remarks": r.cr_remarks,
             }
-            for r in pending
+            for r, preview_path in pending
         ]
     }
 
@@ -648,88 +549,29 @@ def decide_od_request(
     db: Session = Depends(get_db),
     cr=Depends(student_required),
 ):
-    if not cr["is_cr"]:
-        raise HTTPException(status_code=403, detail="Only CR allowed")
-
-    cr_student = db.query(Student).filter(Student.id == cr["student_id"]).first()
-    if not cr_student:
-        raise HTTPException(status_code=404, detail="CR not found")
-
-    od = db.query(ODRequest).filter(ODRequest.id == od_request_id).first()
-    if not od:
-        raise HTTPException(status_code=404, detail="OD request not found")
-
-    # ensure belongs to same section
-    if not (
-        od.department == cr_student.department
-        and od.year == cr_student.year
-        and od.section == cr_student.section
-    ):
-        raise HTTPException(status_code=403, detail="Not in your section")
-
-    decision_norm = decision.upper().strip()
-    if decision_norm not in ["APPROVED", "REJECTED"]:
-        raise HTTPException(status_code=400, detail="Invalid decision")
-
-    od.status = decision_norm
-    od.cr_remarks = remarks.strip() if remarks else None
-
-    if decision_norm == "APPROVED":
-        admin = (
-            db.query(Admin)
-            .filter(
-                Admin.department == od.department,
-                Admin.year == od.year,
-                Admin.section == od.section,
-            )
-            .first()
-        )
-        if admin:
-            _apply_od_slot_attendance(db, od, admin)
-
-        # Full-day OD also updates consolidated daily row; slot-only OD is per-slot only.
-        if od.category == "FULL_DAY":
-            existing = db.query(DailyAttendance).filter(
-                DailyAttendance.student_id == od.student_id,
-                DailyAttendance.date == od.request_date,
-            ).first()
-
-            if existing:
-                existing.status = "OD"
-                existing.source = "CR OD"
-                existing.marked_by = cr["student_id"]
-            else:
-                db.add(
-                    DailyAttendance(
-                        student_id=od.student_id,
-                        date=od.request_date,
-                        status="OD",
-                        source="CR OD",
-                        marked_by=cr["student_id"],
-                    )
-                )
-
-    # notify the student for both APPROVED and REJECTED (user requested APPROVED + REJECTED)
+    cr_student = _cr_student(db, cr)
     try:
-        create_notification_for_student(
-            db,
-            student_id=od.student_id,
-            message=f"OD request {decision_norm.title()} ({od.request_date.isoformat()})",
-            notification_type="OD_APPROVED" if decision_norm == "APPROVED" else "OD_REJECTED",
-            meta={
-                "od_request_id": od.id,
-                "date": od.request_date.isoformat(),
-                "category": od.category,
-                "slots": od.slots,
-                "cr_remarks": od.cr_remarks,
-            },
+        status = decide_request(
+            db, OD_KIND, cr_student, RequestDecisionItem(id=od_request_id, decision=decision, remarks=remarks)
         )
-    except Exception:
-        pass
-
+    except DecisionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     db.commit()
 
-    return {"message": "Decision saved", "od_request_id": od_request_id, "status": od.status}
+    return {"message": "Decision saved", "od_request_id": od_request_id, "status": status}
+
+
+@router.post("/od/decisions")
+def decide_od_requests(
+    payload: RequestDecisionBatchSchema,
+    db: Session = Depends(get_db),
+    cr=Depends(student_required),
+):
+    """Decide many OD requests at once; per-item errors are reported, the rest applied in one commit."""
+    cr_student = _cr_student(db, cr)
+    results = decide_requests(db, OD_KIND, cr_student, payload.decisions)
+    db.commit()
+    return _batch_response(results)
 
 
 
@@ -746,7 +588,8 @@ def get_pending_absence_requests(
         raise HTTPException(status_code=404, detail="CR not found")
 
     pending = (
-        db.query(AbsenceRequest)
+        db.query(AbsenceRequest, ProofBlob.preview_path)
+        .outerjoin(ProofBlob, ProofBlob.sha256 == AbsenceRequest.proof_sha256)
         .filter(
             AbsenceRequest.status == "PENDING",
             AbsenceRequest.department == cr_student.department,
@@ -756,6 +599,7 @@ def get_pending_absence_requests(
         .order_by(AbsenceRequest.created_at.desc())
         .all()
     )
+    duplicates = possible_duplicates(db, [r for r, _ in pending])
 
     return {
         "requests": [
@@ -766,13 +610,17 @@ def get_pending_absence_requests(
                 "category": r.category,
                 "slots": r.slots,
                 "date": r.request_date.isoformat(),
+                "start_date": (r.start_date or r.request_date).isoformat(),
+                "end_date": (r.end_date or r.request_date).isoformat(),
                 "reason": r.reason,
                 "proof_url": r.proof_url,
+                "preview_url": preview_url(preview_path),
                 "proof_type": r.proof_type,
+                "possible_duplicate_of": duplicates[("ABSENCE", r.id)],
                 "status": r.status,
                 "cr_remarks": r.cr_remarks,
             }
-            for r in pending
+            for r, preview_path in pending
         ]
     }
 
@@ -785,92 +633,39 @@ def decide_absence_request(
     db: Session = Depends(get_db),
     cr=Depends(student_required),
 ):
-    if not cr["is_cr"]:
-        raise HTTPException(status_code=403, detail="Only CR allowed")
-
-    cr_student = db.query(Student).filter(Student.id == cr["student_id"]).first()
-    if not cr_student:
-        raise HTTPException(status_code=404, detail="CR not found")
-
-    req = db.query(AbsenceRequest).filter(AbsenceRequest.id == absence_request_id).first()
-    if not req:
-        raise HTTPException(status_code=404, detail="Absence request not found")
-
-    if not (
-        req.department == cr_student.department
-        and req.year == cr_student.year
-        and req.section == cr_student.section
-    ):
-        raise HTTPException(status_code=403, detail="Not in your section")
-
-    decision_norm = decision.upper().strip()
-    if decision_norm not in ["APPROVED", "REJECTED"]:
-        raise HTTPException(status_code=400, detail="Invalid decision")
-
-    req.status = decision_norm
-    req.cr_remarks = remarks.strip() if remarks else None
-
-    if decision_norm == "APPROVED":
-        admin = (
-            db.query(Admin)
-            .filter(
-                Admin.department == req.department,
-                Admin.year == req.year,
-                Admin.section == req.section,
-            )
-            .first()
-        )
-        if admin:
-            _apply_absent_slot_attendance(db, req, admin)
-
-        if req.category == "FULL_DAY":
-            existing = db.query(DailyAttendance).filter(
-                DailyAttendance.student_id == req.student_id,
-                DailyAttendance.date == req.request_date,
-            ).first()
-
-            if existing:
-                existing.status = "Absent"
-                existing.source = "CR ABSENT"
-                existing.marked_by = cr["student_id"]
-            else:
-                db.add(
-                    DailyAttendance(
-                        student_id=req.student_id,
-                        date=req.request_date,
-                        status="Absent",
-                        source="CR ABSENT",
-                        marked_by=cr["student_id"],
-                    )
-                )
-
-    # notify the student for both APPROVED and REJECTED (user requested APPROVED + REJECTED)
+    cr_student = _cr_student(db, cr)
     try:
-        create_notification_for_student(
+        status = decide_request(
             db,
-            student_id=req.student_id,
-            message=f"Absence request {decision_norm.title()} ({req.request_date.isoformat()})",
-            notification_type="ABSENCE_APPROVED" if decision_norm == "APPROVED" else "ABSENCE_REJECTED",
-            meta={
-                "absence_request_id": req.id,
-                "date": req.request_date.isoformat(),
-                "category": req.category,
-                "slots": req.slots,
-                "cr_remarks": req.cr_remarks,
-            },
+            ABSENCE_KIND,
+            cr_student,
+            RequestDecisionItem(id=absence_request_id, decision=decision, remarks=remarks),
         )
-    except Exception:
-        pass
-
+    except DecisionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     db.commit()
 
     return {
         "message": "Decision saved",
         "absence_request_id": absence_request_id,
-        "status": req.status,
+        "status": status,
     }
 
 
+@router.post("/absent/decisions")
+def decide_absence_requests(
+    payload: RequestDecisionBatchSchema,
+    db: Session = Depends(get_db),
+    cr=Depends(student_required),
+):
+    """Decide many absence requests at once; per-item errors are reported, the rest applied in one commit."""
+    cr_student = _cr_student(db, cr)
+    results = decide_requests(db, ABSENCE_KIND, cr_student, payload.decisions)
+    db.commit()
+    return _batch_response(results)
+
+
+
 
 @router.get("/dashboard/summary")
 def cr_dashboard_summary(
@@ -972,21 +767,27 @@ def cr_dashboard_summary(
 @router.get("/grievances")
 def get_class_grievances(
     status: str | None = None,
+    q: str | None = None,
+    grievance_type: str | None = None,
+    month: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
     db: Session = Depends(get_db),
     cr=Depends(cr_required),
 ):
-    query = db.query(GrievanceRequest).filter(
-        GrievanceRequest.department == cr.department,
-        GrievanceRequest.year == cr.year,
-        GrievanceRequest.section == cr.section,
+    grievances, total, facets = search_grievances(
+        db,
+        department=cr["department"],
+        year=cr["year"],
+        section=cr["section"],
+        q=q,
+        status=status,
+        grievance_type=grievance_type,
+        month=month,
+        limit=limit,
+        offset=offset,
     )
 
-    if status:
-        normalized_status = status.strip().upper().replace(" ", "_")
-        query = query.filter(GrievanceRequest.status == normalized_status)
-
-    grievances = query.order_by(GrievanceRequest.created_at.desc()).all()
-
     return {
         "requests": [
             {
@@ -1001,8 +802,10 @@ def get_class_grievances(
                 "status": g.status.title().replace("_", " "),
                 "review_remarks": g.review_remarks,
             }
-            for g in grievances
-        ]
+            for g, _ in grievances
+        ],
+        "total": total,
+        "facets": facets,
     }
 
 
@@ -1020,97 +823,63 @@ def review_grievance(
 
 
 # ===================== PDF PRESENT =====================
+def _cr_report_context(db: Session, cr: dict, day: date | None):
+    if not cr["is_cr"]:
+        raise HTTPException(status_code=403, detail="CR only")
+
+    day = day or date.today()
+    if day > date.today():
+        raise HTTPException(status_code=400, detail="Cannot export a future date")
+
+    cr_student = db.query(Student).filter(Student.id == cr["student_id"]).first()
+    if not cr_student:
+        raise HTTPException(status_code=404, detail="CR not found")
+    return cr_student, day
+
+
 @router.get("/attendance/daily/export/present/pdf")
 def export_present_pdf(
+    request: Request,
+    day: date | None = None,
     cr=Depends(student_required),
     db: Session = Depends(get_db),
 ):
     # 🔐 CR ONLY
-    if not cr["is_cr"]:
-        raise HTTPException(status_code=403, detail="CR only")
-
-    today = date.today()
-
-    # ✅ Fetch attendance with student join
-    records = (
-        db.query(DailyAttendance, Student)
-        .join(Student, DailyAttendance.student_id == Student.id)
-        .filter(
-            DailyAttendance.date == today,
-            Student.department == cr.department,
-            Student.year == cr.year,
-            Student.section == cr.section,
+    cr_student, day = _cr_report_context(db, cr, day)
+    scope = _report_scope(cr_student, day)
+
+    def render() -> bytes:
+        # ✅ Fetch attendance with student join
+        records = (
+            db.query(Student.roll_number, Student.name, DailyAttendance.created_at)
+            .join(Student, DailyAttendance.student_id == Student.id)
+            .filter(
+                DailyAttendance.date == day,
+                Student.department == cr_student.department,
+                Student.year == cr_student.year,
+                Student.section == cr_student.section,
+            )
+            .order_by(DailyAttendance.created_at)
+            .all()
         )
-        .order_by(DailyAttendance.created_at)
-        .all()
-    )
-
-    # ===== PDF SETUP =====
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    y = height - 2 * cm
-
-    # ===== HEADER =====
-    c.setFont("Helvetica-Bold", 14)
-    c.drawCentredString(width / 2, y, "DAILY ATTENDANCE REPORT")
-    y -= 1 * cm
-
-    c.setFont("Helvetica", 10)
-    c.drawString(2 * cm, y, f"Department : {cr['department']}")
-    y -= 0.5 * cm
-    c.drawString(2 * cm, y, f"Year / Section : {cr['year']} {cr['section']}")
-    y -= 0.5 * cm
-    c.drawString(2 * cm, y, f"Date : {today}")
-    y -= 1 * cm
-
-    # ===== TABLE HEADER =====
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(2 * cm, y, "Roll Number")
-    c.drawString(7 * cm, y, "Name")
-    c.drawString(14 * cm, y, "Time")
-    y -= 0.6 * cm
-
-    c.setFont("Helvetica", 10)
-
-    # ===== DATA ROWS =====
-    for attendance, student in records:
-        if y < 2 * cm:
-            c.showPage()
-            y = height - 2 * cm
-
-        c.drawString(2 * cm, y, student.roll_number)
-        c.drawString(7 * cm, y, student.name)
-        c.drawString(
-            14 * cm,
-            y,
-            attendance.created_at.strftime("%I:%M %p")
-            if attendance.created_at else "-"
+        return render_report(
+            "DAILY ATTENDANCE REPORT",
+            scope,
+            PRESENT_COLUMNS,
+            [
+                (roll, name, to_ist(created_at).strftime("%I:%M %p") if created_at else "-")
+                for roll, name, created_at in records
+            ],
         )
-        y -= 0.4 * cm
-
-    # ===== FOOTER =====
-    c.setFont("Helvetica-Oblique", 9)
-    c.drawString(
-        2 * cm,
-        1.5 * cm,
-        f"Report generated at {datetime.now().strftime('%d-%m-%Y %I:%M %p')}",
-    )
-    c.drawRightString(
-        width - 2 * cm,
-        1.5 * cm,
-        "© 2026 MINDURA TECHNOLOGIES. All rights reserved."
-    )
-
-    c.save()
-    buffer.seek(0)
 
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=present_{today}.pdf"
-        },
+    # cached per (section, day, version); re-rendered only after attendance changes
+    return cached_report_response(
+        db,
+        scope=scope,
+        report_type="present",
+        filename=f"present_{day}.pdf",
+        request_headers=request.headers,
+        render=render,
     )
 
 
@@ -1118,60 +887,34 @@ def export_present_pdf(
 # ===================== PDF ABSENT =====================
 @router.get("/attendance/daily/export/absent/pdf")
 def export_absent_pdf(
+    request: Request,
+    day: date | None = None,
     db: Session = Depends(get_db),
     cr=Depends(student_required),
 ):
-    if not cr["is_cr"]:
-        raise HTTPException(status_code=403, detail="CR only")
+    cr_student, day = _cr_report_context(db, cr, day)
+    scope = _report_scope(cr_student, day)
 
-    today = date.today()
-    cr_student = db.query(Student).filter(Student.id == cr["student_id"]).first()
-
-    present_ids = (
-        db.query(DailyAttendance.student_id)
-        .filter(DailyAttendance.date == today)
-        .subquery()
-    )
-
-    students = (
-        db.query(Student)
-        .filter(
-            Student.department == cr_student.department,
-            Student.year == cr_student.year,
-            Student.section == cr_student.section,
-            ~Student.id.in_(present_ids),
+    def render() -> bytes:
+        students = section_absentees_query(
+            db,
+            department=cr_student.department,
+            year=cr_student.year,
+            section=cr_student.section,
+            day=day,
+        ).all()
+        return render_report(
+            "ABSENTEE REPORT",
+            scope,
+            ABSENT_COLUMNS,
+            [(s.roll_number, s.name) for s in students],
         )
-        .order_by(Student.roll_number)
-        .all()
-    )
-
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    y = draw_header(c, width, height, "ABSENTEE REPORT", cr_student, today)
 
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(2 * cm, y, "Roll Number")
-    c.drawString(7 * cm, y, "Name")
-    y -= 0.5 * cm
-    c.setFont("Helvetica", 10)
-
-    for s in students:
-        if y < 3 * cm:
-            c.showPage()
-            y = draw_header(c, width, height, "ABSENTEE REPORT", cr_student, today)
-
-        c.drawString(2 * cm, y, s.roll_number)
-        c.drawString(7 * cm, y, s.name)
-        y -= 0.4 * cm
-
-    draw_footer(c, width)
-    c.save()
-    buffer.seek(0)
-
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=absent_{today}.pdf"},
-    )
\ No newline at end of file
+    return cached_report_response(
+        db,
+        scope=scope,
+        report_type="absent",
+        filename=f"absent_{day}.pdf",
+        request_headers=request.headers,
+        render=render,
+    )
@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
 from app.database import SessionLocal
 from app.models import Admin, Student, Notification
 from app.dependencies import admin_required, student_required, cr_required
+from app.notifications_utils import filter_by_meta
+from app.security import SECRET_KEY, ALGORITHM
+from app.notification_broker import (
+    get_broker,
+    notification_event,
+    topic_for_admin,
+    topic_for_student,
+)
 
 
 router = APIRouter(tags=["Notifications"])
@@ -18,16 +32,33 @@ def get_db():
         db.close()
 
 
+def _apply_meta_filters(q, db: Session, od_request_id, absence_request_id, grievance_id, date):
+    # each key is backed by an expression index on notifications.meta
+    for key, value in (
+        ("od_request_id", od_request_id),
+        ("absence_request_id", absence_request_id),
+        ("grievance_id", grievance_id),
+        ("date", date),
+    ):
+        if value is not None:
+            q = filter_by_meta(q, db, key, value)
+    return q
+
+
 # -------------------- ADMIN --------------------
 @router.get("/admin/notifications")
 def admin_list_notifications(
+    od_request_id: int | None = None,
+    absence_request_id: int | None = None,
+    grievance_id: int | None = None,
+    date: str | None = None,
     db: Session = Depends(get_db),
     admin=Depends(admin_required),
 ):
+    q = db.query(Notification).filter(Notification.recipient_admin_id == admin["admin_id"])
+    q = _apply_meta_filters(q, db, od_request_id, absence_request_id, grievance_id, date)
     notes = (
-        db.query(Notification)
-        .filter(Notification.recipient_admin_id == admin["admin_id"])
-        .order_by(desc(Notification.created_at))
+        q.order_by(desc(Notification.created_at))
         .limit(100)
         .all()
     )
@@ -73,14 +104,18 @@ def admin_mark_notification_read(
 # -------------------- STUDENT --------------------
 @router.get("/students/notifications")
 def student_list_notifications(
+    od_request_id: int | None = None,
+    absence_request_id: int | None = None,
+    grievance_id: int | None = None,
+    date: str | None = None,
     db: Session = Depends(get_db),
     user=Depends(student_required),
 ):
     sid = user["student_id"]
+    q = db.query(Notification).filter(Notification.recipient_student_id == sid)
+    q = _apply_meta_filters(q, db, od_request_id, absence_request_id, grievance_id, date)
     notes = (
-        db.query(Notification)
-        .filter(Notification.recipient_student_id == sid)
-        .order_by(desc(Notification.created_at))
+        q.order_by(desc(Notification.created_at))
         .limit(200)
         .all()
     )
@@ -128,14 +163,18 @@ def student_mark_notification_read(
 # -------------------- CR (same as student endpoint, but separate router prefix) --------------------
 @router.get("/cr/notifications")
 def cr_list_notifications(
+    od_request_id: int | None = None,
+    absence_request_id: int | None = None,
+    grievance_id: int | None = None,
+    date: str | None = None,
     db: Session = Depends(get_db),
     cr=Depends(cr_required),
 ):
     sid = cr["student_id"]
+    q = db.query(Notification).filter(Notification.recipient_student_id == sid)
+    q = _apply_meta_filters(q, db, od_request_id, absence_request_id, grievance_id, date)
     notes = (
-        db.query(Notification)
-        .filter(Notification.recipient_student_id == sid)
-        .order_by(desc(Notification.created_at))
+        q.order_by(desc(Notification.created_at))
         .limit(200)
         .all()
     )
@@ -179,3 +218,99 @@ def cr_mark_notification_read(
 
     return {"message": "Notification marked as read"}
 
+
+# -------------------- REAL-TIME PUSH (SSE) --------------------
+SSE_KEEPALIVE_SECONDS = 15
+SSE_REPLAY_LIMIT = 100
+
+
+def _stream_topic(request: Request, access_token: str | None) -> tuple[str, dict]:
+    # EventSource cannot send headers, so the token may also come as ?access_token=...
+    token = access_token
+    auth = request.headers.get("authorization") or ""
+    if auth.lower().startswith("bearer "):
+        token = auth[7:].strip()
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    role = payload.get("role")
+    if role == "admin" and payload.get("admin_id"):
+        return topic_for_admin(payload["admin_id"]), {"recipient_admin_id": payload["admin_id"]}
+    if role == "student" and payload.get("student_id"):
+        return topic_for_student(payload["student_id"]), {"recipient_student_id": payload["student_id"]}
+    raise HTTPException(status_code=403, detail="Invalid role")
+
+
+def _missed_notifications(recipient: dict, after_id: int) -> list[dict]:
+    db = SessionLocal()
+    try:
+        q = db.query(Notification).filter(Notification.id > after_id)
+        if "recipient_admin_id" in recipient:
+            q = q.filter(Notification.recipient_admin_id == recipient["recipient_admin_id"])
+        else:
+            q = q.filter(Notification.recipient_student_id == recipient["recipient_student_id"])
+        rows = q.order_by(Notification.id.asc()).limit(SSE_REPLAY_LIMIT).all()
+        return [notification_event(n) for n in rows]
+    finally:
+        db.close()
+
+
+def _sse(payload: dict) -> str:
+    return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+@router.get("/notifications/stream")
+async def notifications_stream(
+    request: Request,
+    access_token: str | None = None,
+):
+    """Server-sent events for the caller's notifications (admin, student or CR).
+
+    Polling the list endpoints still works; clients should only fall back to it
+    when the stream cannot be opened. On reconnect the browser sends Last-Event-ID
+    and anything committed in between is replayed first.
+    """
+    topic, recipient = _stream_topic(request, access_token)
+
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        after_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        after_id = None
+
+    broker = get_broker()
+    queue = broker.subscribe(topic)
+
+    async def event_source():
+        try:
+            yield "retry: 5000\n\n"
+            replayed_upto = 0
+            if after_id is not None:
+                for payload in await run_in_threadpool(_missed_notifications, recipient, after_id):
+                    replayed_upto = max(replayed_upto, payload["id"])
+                    yield _sse(payload)
+
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload["id"] <= replayed_upto:
+                    continue
+                yield _sse(payload)
+        finally:
+            broker.unsubscribe(topic, queue)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -26,15 +26,18 @@ from .security import SECRET_KEY, ALGORITHM
 from .dependencies import student_required
 from app.utils.qr import validate_dynamic_qr
 from app.utils.attendance import auto_mark_daily_attendance
-from sqlalchemy import func
 
+from .proof_store import store_proof_upload
+from .upload_sessions import consume_upload_session
+from .proof_previews import schedule_proof_preview
+from .attendance_bitmaps import student_attendance_stats
+from .request_decisions import REQUEST_BACKDATE_DAYS, REQUEST_MAX_DAYS, overlapping_pending_request
 from .od_absence_history import (
     get_student_od_history,
     get_student_absence_history,
 )
 
 
-import os
 from datetime import date
 from fastapi import status
 
@@ -396,6 +399,35 @@ def get_today_attendance_detail(
     }
 
 
+# --------------------------------------------------
+# PROOF: direct multipart file or a finished resumable upload
+# --------------------------------------------------
+def _resolve_proof(db: Session, student_id: int, proof: Optional[UploadFile], upload_id: str | None):
+    if upload_id and upload_id.strip():
+        return consume_upload_session(db, upload_id.strip(), student_id)
+    if proof is not None and getattr(proof, "filename", None) and str(proof.filename).strip():
+        return store_proof_upload(db, proof)
+    return None
+
+
+def _requested_range(start_date: date | None, end_date: date | None) -> tuple[date, date]:
+    """Validated [start, end]; both default to today (a single-day request)."""
+    today = date.today()
+    start = start_date or today
+    end = end_date or start
+    if start < today - timedelta(days=REQUEST_BACKDATE_DAYS):
+        if REQUEST_BACKDATE_DAYS:
+            detail = f"start_date can be at most {REQUEST_BACKDATE_DAYS} days in the past"
+        else:
+            detail = "start_date must not be in the past"
+        raise HTTPException(status_code=400, detail=detail)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end - start).days + 1 > REQUEST_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"A request can cover at most {REQUEST_MAX_DAYS} days")
+    return start, end
+
+
 # --------------------------------------------------
 # OD APPLICATION (student)
 # --------------------------------------------------
@@ -404,7 +436,10 @@ def apply_od(
     category: str = Form(...),
     slots: str | None = Form(None),
     reason: str = Form(...),
-    proof: UploadFile = File(...),
+    start_date: date | None = Form(None),
+    end_date: date | None = Form(None),
+    proof: Optional[UploadFile] = File(None),
+    upload_id: str | None = Form(None),
     db: Session = Depends(get_db),
     student=Depends(student_required),
 ):
@@ -432,23 +467,14 @@ def apply_od(
     else:
         slots_value = None
 
-    # Save proof under backend static folder
-    proofs_dir = os.path.join(os.path.dirname(__file__), "static", "od_proofs")
-    os.makedirs(proofs_dir, exist_ok=True)
-
-    safe_name = proof.filename.replace("\\", "_").replace("/", "_")
-    file_ext = os.path.splitext(safe_name)[1].lower()
-    if file_ext not in [".pdf", ".png", ".jpg", ".jpeg", ".webp"]:
-        raise HTTPException(status_code=400, detail="Unsupported proof file type")
-
-    stored_name = f"od_{student_row.roll_number}_{int(datetime.utcnow().timestamp())}_{safe_name}"
-    stored_path = os.path.join(proofs_dir, stored_name)
-
-    content = proof.file.read()
-    with open(stored_path, "wb") as f:
-        f.write(content)
+    start, end = _requested_range(start_date, end_date)
+    if overlapping_pending_request(db, ODRequest, student_row.id, start, end):
+        raise HTTPException(status_code=400, detail="You already have a pending OD request for these dates")
 
-    proof_url = f"/static/od_proofs/{stored_name}"
+    # Store proof once per distinct content (streamed, size-capped, type-checked)
+    stored = _resolve_proof(db, student_row.id, proof, upload_id)
+    if stored is None:
+        raise HTTPException(status_code=400, detail="Proof file is required")
 
     od = ODRequest(
         student_id=student_row.id,
@@ -457,12 +483,15 @@ def apply_od(
         department=student_row.department,
         year=student_row.year,
         section=student_row.section,
-        request_date=date.today(),
+        request_date=start,
+        start_date=start,
+        end_date=end,
         category=normalized_category,
         slots=slots_value,
         reason=reason.strip(),
-        proof_url=proof_url,
-        proof_type=proof.content_type or file_ext,
+        proof_url=stored.url,
+        proof_type=stored.content_type,
+        proof_sha256=stored.sha256,
         status="PENDING",
         cr_remarks=None,
     )
@@ -470,6 +499,7 @@ def apply_od(
     db.add(od)
     db.commit()
     db.refresh(od)
+    schedule_proof_preview(od.proof_sha256)
 
     return {
         "message": "OD applied successfully",
@@ -483,7 +513,10 @@ def declare_absent(
     category: str = Form(...),
     slots: str | None = Form(None),
     reason: str = Form(...),
+    start_date: date | None = Form(None),
+    end_date: date | None = Form(None),
     proof: Optional[UploadFile] = File(None),
+    upload_id: str | None = Form(None),
     db: Session = Depends(get_db),
     student=Depends(student_required),
 ):
@@ -497,19 +530,13 @@ def declare_absent(
     if not student_row:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    pending = (
-        db.query(AbsenceRequest)
-        .filter(
-            AbsenceRequest.student_id == student_row.id,
-            AbsenceRequest.request_date == date.today(),
-            AbsenceRequest.status == "PENDING",
-        )
-        .first()
-    )
-    if pending:
+    start, end = _requested_range(start_date, end_date)
+    if overlapping_pending_request(db, AbsenceRequest, student_row.id, start, end):
         raise HTTPException(
             status_code=400,
-            detail="You already have a pending absence request for today",
+            detail="You already have a pending absence request for today"
+            if start == end == date.today()
+            else "You already have a pending absence request for these dates",
         )
 
     category = category.upper().strip()
@@ -530,26 +557,12 @@ def declare_absent(
 
     proof_url = None
     proof_type = None
-    if proof is not None and getattr(proof, "filename", None) and str(proof.filename).strip():
-        proofs_dir = os.path.join(os.path.dirname(__file__), "static", "absence_proofs")
-        os.makedirs(proofs_dir, exist_ok=True)
-
-        safe_name = proof.filename.replace("\\", "_").replace("/", "_")
-        file_ext = os.path.splitext(safe_name)[1].lower()
-        if file_ext not in [".pdf", ".png", ".jpg", ".jpeg", ".webp"]:
-            raise HTTPException(status_code=400, detail="Unsupported proof file type")
-
-        stored_name = (
-            f"abs_{student_row.roll_number}_{int(datetime.utcnow().timestamp())}_{safe_name}"
-        )
-        stored_path = os.path.join(proofs_dir, stored_name)
-
-        content = proof.file.read()
-        with open(stored_path, "wb") as f:
-            f.write(content)
-
-        proof_url = f"/static/absence_proofs/{stored_name}"
-        proof_type = proof.content_type or file_ext
+    proof_sha256 = None
+    stored = _resolve_proof(db, student_row.id, proof, upload_id)
+    if stored is not None:
+        proof_url = stored.url
+        proof_type = stored.content_type
+        proof_sha256 = stored.sha256
 
     ab = AbsenceRequest(
         student_id=student_row.id,
@@ -558,12 +571,15 @@ def declare_absent(
         department=student_row.department,
         year=student_row.year,
         section=student_row.section,
-        request_date=date.today(),
+        request_date=start,
+        start_date=start,
+        end_date=end,
         category=normalized_category,
         slots=slots_value,
         reason=reason.strip(),
         proof_url=proof_url,
         proof_type=proof_type,
+        proof_sha256=proof_sha256,
         status="PENDING",
         cr_remarks=None,
     )
@@ -571,6 +587,7 @@ def declare_absent(
     db.add(ab)
     db.commit()
     db.refresh(ab)
+    schedule_proof_preview(ab.proof_sha256)
 
     return {
         "message": "Absence request submitted",
@@ -647,7 +664,8 @@ def submit_grievance(
     request_date: date = Form(...),
     slot: str | None = Form(None),
     description: str = Form(...),
-    proof: UploadFile = File(...),
+    proof: Optional[UploadFile] = File(None),
+    upload_id: str | None = Form(None),
     db: Session = Depends(get_db),
     student=Depends(student_required),
 ):
@@ -669,22 +687,9 @@ def submit_grievance(
     if normalized_type == "SLOT" and (not slot or not slot.strip()):
         raise HTTPException(status_code=400, detail="Slot is required for slot grievances")
 
-    proofs_dir = os.path.join(os.path.dirname(__file__), "static", "grievance_proofs")
-    os.makedirs(proofs_dir, exist_ok=True)
-
-    safe_name = proof.filename.replace("\\", "_").replace("/", "_")
-    file_ext = os.path.splitext(safe_name)[1].lower()
-    if file_ext not in [".pdf", ".png", ".jpg", ".jpeg", ".webp"]:
-        raise HTTPException(status_code=400, detail="Unsupported proof file type")
-
-    stored_name = f"grievance_{student_row.roll_number}_{int(datetime.utcnow().timestamp())}_{safe_name}"
-    stored_path = os.path.join(proofs_dir, stored_name)
-
-    content = proof.file.read()
-    with open(stored_path, "wb") as f:
-        f.write(content)
-
-    proof_url = f"/static/grievance_proofs/{stored_name}"
+    stored = _resolve_proof(db, student_row.id, proof, upload_id)
+    if stored is None:
+        raise HTTPException(status_code=400, detail="Proof file is required")
 
     grievance = GrievanceRequest(
         student_id=student_row.id,
@@ -697,8 +702,9 @@ def submit_grievance(
         grievance_type=normalized_type,
         slot=slot.strip() if slot else None,
         description=description.strip(),
-        proof_url=proof_url,
-        proof_type=proof.content_type or file_ext,
+        proof_url=stored.url,
+        proof_type=stored.content_type,
+        proof_sha256=stored.sha256,
         status="OPEN",
         review_remarks=None,
     )
@@ -706,6 +712,7 @@ def submit_grievance(
     db.add(grievance)
     db.commit()
     db.refresh(grievance)
+    schedule_proof_preview(grievance.proof_sha256)
 
     # Notification: inform admins of this student's section
     try:
@@ -737,37 +744,17 @@ def submit_grievance(
 
 
 @router.get("/attendance/report")
-
-
 def student_attendance_report(
     student=Depends(student_required),
     db: Session = Depends(get_db),
 ):
     student_id = student["student_id"]
+    student_row = db.query(Student).filter(Student.id == student_id).first()
+    if not student_row:
+        raise HTTPException(status_code=404, detail="Student not found")
 
-    # 🔢 Total days attendance exists
-    total_days = (
-        db.query(func.count(func.distinct(DailyAttendance.date)))
-        .scalar()
-    )
-
-    # ✅ Days present
-    present_days = (
-        db.query(DailyAttendance)
-        .filter(
-            DailyAttendance.student_id == student_id,
-            DailyAttendance.status == "Present",
-        )
-        .count()
-    )
-
-    absent_days = total_days - present_days if total_days else 0
-
-    percentage = (
-        round((present_days / total_days) * 100, 2)
-        if total_days > 0
-        else 0
-    )
+    # 🔢 Semester counts from the attendance bitmaps (popcounts, no row scans)
+    stats = student_attendance_stats(db, student_row)
 
     # 📅 Day-wise records
     records = (
@@ -779,10 +766,13 @@ def student_attendance_report(
 
     return {
         "summary": {
-            "total_days": total_days,
-            "present_days": present_days,
-            "absent_days": absent_days,
-            "percentage": percentage,
+            "total_days": stats.class_days,
+            "present_days": stats.present_days,
+            "od_days": stats.od_days,
+            "absent_days": stats.absent_days,
+            "percentage": stats.percentage,
+            "longest_absence_streak": stats.longest_absence_streak,
+            "current_absence_streak": stats.current_absence_streak,
         },
         "records": [
             {
@@ -799,23 +789,14 @@ def student_daily_report(
     db: Session = Depends(get_db),
     student=Depends(student_required),
 ):
-    # 1️⃣ TOTAL WORKING DAYS (GLOBAL – based on days where student has any daily record)
-    total_days = (
-        db.query(DailyAttendance.date)
-        .filter(DailyAttendance.student_id == student["student_id"])
-        .distinct()
-        .count()
-    )
+    student_row = db.query(Student).filter(Student.id == student["student_id"]).first()
+    if not student_row:
+        raise HTTPException(status_code=404, detail="Student not found")
 
-    # 2️⃣ STUDENT PRESENT DAYS (ONLY PRESENT)
-    present_days = (
-        db.query(DailyAttendance)
-        .filter(
-            DailyAttendance.student_id == student["student_id"],
-            DailyAttendance.status == "PRESENT",
-        )
-        .count()
-    )
+    # 1️⃣ TOTAL WORKING DAYS (days where student has any daily record) + 2️⃣ PRESENT DAYS, from the bitmaps
+    stats = student_attendance_stats(db, student_row)
+    total_days = stats.marked_days
+    present_days = stats.present_days
 
     # 3️⃣ ATTENDANCE %
     percentage = (
@@ -864,18 +845,15 @@ def student_attendance_summary(
     MIN_REQUIRED_PRESENT = 57
     MAX_ALLOWED_ABSENT = TOTAL_WORKING_DAYS - MIN_REQUIRED_PRESENT  # 18
 
-    # Count present days
-    present_days = (
-        db.query(func.count(DailyAttendance.id))
-        .filter(
-            DailyAttendance.student_id == student["student_id"],
-            DailyAttendance.status == "PRESENT"
-        )
-        .scalar()
-    ) or 0
+    student_row = db.query(Student).filter(Student.id == student["student_id"]).first()
+    if not student_row:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    stats = student_attendance_stats(db, student_row)
+    present_days = stats.present_days
 
-    # Absent days so far
-    absent_days = TOTAL_WORKING_DAYS - present_days
+    # Absent days so far: class days held without PRESENT / OD
+    absent_days = stats.absent_days
     leave_remaining = MAX_ALLOWED_ABSENT - absent_days
 
     return {
@@ -884,5 +862,6 @@ def student_attendance_summary(
         "absent_days": absent_days,
         "attendance_percent": round((present_days / TOTAL_WORKING_DAYS) * 100, 2),
         "leave_allowed": max(0, leave_remaining),
-        "min_required_present": MIN_REQUIRED_PRESENT
+        "min_required_present": MIN_REQUIRED_PRESENT,
+        "longest_absence_streak": stats.longest_absence_streak,
     }
\ No newline at end of file
@@ -0,0 +1,116 @@
+#presenza-backend/app/routes_uploads.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .dependencies import student_required
+from .schemas import UploadSessionCreateSchema
+from .upload_sessions import (
+    UPLOAD_SESSION_MAX_CHUNK,
+    append_chunk,
+    create_upload_session,
+    delete_upload_session,
+    get_upload_session,
+    session_progress,
+)
+
+
+# Resumable proof uploads:
+#   POST   /students/uploads                      -> {upload_id, offset: 0, ...}
+#   PUT    /students/uploads/{id}?offset=N        raw bytes (<= chunk_size) -> new offset
+#   GET    /students/uploads/{id}                 -> current offset (resume point)
+#   DELETE /students/uploads/{id}                 cancel
+# then pass upload_id (instead of a proof file) to /students/od/apply,
+# /students/absent/declare or /students/grievances.
+router = APIRouter(prefix="/students/uploads", tags=["Uploads"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _student_id(student: dict) -> int:
+    if not student.get("student_id"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session expired — please log in again",
+        )
+    return student["student_id"]
+
+
+@router.post("")
+def create_upload(
+    data: UploadSessionCreateSchema,
+    db: Session = Depends(get_db),
+    student=Depends(student_required),
+):
+    s = create_upload_session(
+        db,
+        student_id=_student_id(student),
+        filename=data.filename,
+        total_size=data.total_size,
+    )
+    return session_progress(s)
+
+
+def _append(upload_id: str, student_id: int, offset: int, data: bytes) -> dict:
+    db = SessionLocal()
+    try:
+        s = append_chunk(db, upload_id=upload_id, student_id=student_id, offset=offset, data=data)
+        return session_progress(s)
+    finally:
+        db.close()
+
+
+@router.put("/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    student=Depends(student_required),
+):
+    student_id = _student_id(student)
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > UPLOAD_SESSION_MAX_CHUNK:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Chunk too large (max {UPLOAD_SESSION_MAX_CHUNK} bytes)",
+        )
+
+    # read the body with a cap so a missing/lying Content-Length cannot make us buffer more
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > UPLOAD_SESSION_MAX_CHUNK:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Chunk too large (max {UPLOAD_SESSION_MAX_CHUNK} bytes)",
+            )
+
+    # disk + DB work off the event loop
+    return await run_in_threadpool(_append, upload_id, student_id, offset, bytes(data))
+
+
+@router.get("/{upload_id}")
+def upload_progress(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    student=Depends(student_required),
+):
+    return session_progress(get_upload_session(db, upload_id, _student_id(student)))
+
+
+@router.delete("/{upload_id}")
+def cancel_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    student=Depends(student_required),
+):
+    delete_upload_session(db, upload_id, _student_id(student))
+    return {"message": "Upload cancelled"}
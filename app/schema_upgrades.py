@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import ast
+import json
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from .database import Base
+from . import models  # noqa: F401  (registers tables on Base.metadata)
+from .notifications_utils import META_INDEXED_KEYS
+from .student_search import STUDENTS_FTS
+from .grievance_search import GRIEVANCES_FTS, SEARCH_VECTOR
+from .semesters import active_semester_ids
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """Create indexes declared on models that are missing from existing tables.
+
+    create_all() only emits indexes for tables it creates, so indexes added to a
+    model later never reach databases created before the change.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name and index.name not in present:
+                index.create(bind=engine)
+
+
+def ensure_columns(engine: Engine) -> None:
+    """Add nullable columns declared on models but missing from existing tables.
+
+    Only additive, nullable columns are handled; anything else needs a real migration.
+    Foreign keys are left out on purpose (SQLite cannot add them via ALTER TABLE).
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present or not column.nullable:
+                continue
+            col_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+
+
+def _parse_legacy_meta(raw):
+    """Legacy meta was str(dict) (Python repr), occasionally JSON or free text."""
+    if raw is None:
+        return None
+    if not isinstance(raw, str):
+        return raw
+    try:
+        return json.loads(raw)
+    except ValueError:
+        pass
+    try:
+        value = ast.literal_eval(raw)
+        json.dumps(value)
+        return value
+    except (ValueError, SyntaxError, TypeError):
+        return {"text": raw}
+
+
+def _backfill_meta_rows(conn, select_sql: str) -> int:
+    """Rewrite meta rows returned by select_sql (id, meta; keyset on :last_id) as JSON text."""
+    fixed = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(text(select_sql), {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        for row_id, raw in rows:
+            last_id = row_id
+            value = _parse_legacy_meta(raw)
+            encoded = json.dumps(value)
+            if encoded != raw:
+                conn.execute(
+                    text("UPDATE notifications SET meta = :meta WHERE id = :id"),
+                    {"meta": encoded, "id": row_id},
+                )
+                fixed += 1
+    return fixed
+
+
+def migrate_notification_meta(engine: Engine) -> None:
+    """Convert notifications.meta to JSON and add expression indexes on common keys."""
+    inspector = inspect(engine)
+    if not inspector.has_table("notifications"):
+        return
+
+    dialect = engine.dialect.name
+
+    if dialect == "sqlite":
+        with engine.begin() as conn:
+            _backfill_meta_rows(
+                conn,
+                "SELECT id, meta FROM notifications "
+                "WHERE id > :last_id AND meta IS NOT NULL AND json_valid(meta) = 0 "
+                "ORDER BY id LIMIT :limit",
+            )
+            for key in META_INDEXED_KEYS:
+                conn.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS ix_notifications_meta_{key} "
+                        f"ON notifications (json_extract(meta, '$.{key}'))"
+                    )
+                )
+
+    elif dialect == "postgresql":
+        meta_col = next(c for c in inspector.get_columns("notifications") if c["name"] == "meta")
+        with engine.begin() as conn:
+            if meta_col["type"].__class__.__name__.upper() != "JSONB":
+                _backfill_meta_rows(
+                    conn,
+                    "SELECT id, meta FROM notifications "
+                    "WHERE id > :last_id AND meta IS NOT NULL "
+                    "ORDER BY id LIMIT :limit",
+                )
+                conn.execute(
+                    text("ALTER TABLE notifications ALTER COLUMN meta TYPE JSONB USING meta::jsonb")
+                )
+            for key in META_INDEXED_KEYS:
+                conn.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS ix_notifications_meta_{key} "
+                        f"ON notifications ((meta->>'{key}'))"
+                    )
+                )
+
+
+def ensure_student_search_index(engine: Engine) -> None:
+    """Roll-number prefix index plus a name index: FTS5 trigram (SQLite) or pg_trgm GIN (Postgres).
+
+    Either name index is optional; without it search falls back to an in-memory
+    trie (SQLite) or an unindexed ILIKE (Postgres).
+    """
+    if not inspect(engine).has_table("students"):
+        return
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        # expression index: declared here because SQLite reflection skips expression indexes
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_students_roll_number_upper ON students (upper(roll_number))")
+        )
+
+    if dialect == "sqlite":
+        try:
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": STUDENTS_FTS},
+                ).first()
+                conn.execute(
+                    text(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {STUDENTS_FTS} USING fts5("
+                        "name, content='students', content_rowid='id', tokenize='trigram')"
+                    )
+                )
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS {STUDENTS_FTS}_ai AFTER INSERT ON students BEGIN
+                        INSERT INTO {STUDENTS_FTS}(rowid, name) VALUES (new.id, new.name);
+                    END"""))
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS {STUDENTS_FTS}_ad AFTER DELETE ON students BEGIN
+                        INSERT INTO {STUDENTS_FTS}({STUDENTS_FTS}, rowid, name) VALUES ('delete', old.id, old.name);
+                    END"""))
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS {STUDENTS_FTS}_au AFTER UPDATE OF name ON students BEGIN
+                        INSERT INTO {STUDENTS_FTS}({STUDENTS_FTS}, rowid, name) VALUES ('delete', old.id, old.name);
+                        INSERT INTO {STUDENTS_FTS}(rowid, name) VALUES (new.id, new.name);
+                    END"""))
+                if not exists:
+                    conn.execute(text(f"INSERT INTO {STUDENTS_FTS}({STUDENTS_FTS}) VALUES ('rebuild')"))
+        except DBAPIError:
+            # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer)
+            pass
+
+    elif dialect == "postgresql":
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(
+                    text("CREATE INDEX IF NOT EXISTS ix_students_name_trgm ON students USING gin (name gin_trgm_ops)")
+                )
+        except DBAPIError:
+            # the extension needs a privileged role; search still works, unindexed
+            pass
+
+
+def ensure_grievance_search_index(engine: Engine) -> None:
+    """Full-text index over grievance description + review remarks.
+
+    SQLite: external-content FTS5 table maintained by triggers. Postgres: a
+    generated tsvector column with a GIN index. Both follow every insert and
+    review without application code; search falls back to ILIKE without them.
+    """
+    if not inspect(engine).has_table("grievance_requests"):
+        return
+    dialect = engine.dialect.name
+
+    if dialect == "sqlite":
+        try:
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": GRIEVANCES_FTS},
+                ).first()
+                conn.execute(
+                    text(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {GRIEVANCES_FTS} USING fts5("
+                        "description, review_remarks, content='grievance_requests', content_rowid='id', "
+                        "tokenize='porter unicode61')"
+                    )
+                )
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS {GRIEVANCES_FTS}_ai AFTER INSERT ON grievance_requests BEGIN
+                        INSERT INTO {GRIEVANCES_FTS}(rowid, description, review_remarks)
+                        VALUES (new.id, new.description, new.review_remarks);
+                    END"""))
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS {GRIEVANCES_FTS}_ad AFTER DELETE ON grievance_requests BEGIN
+                        INSERT INTO {GRIEVANCES_FTS}({GRIEVANCES_FTS}, rowid, description, review_remarks)
+                        VALUES ('delete', old.id, old.description, old.review_remarks);
+                    END"""))
+                conn.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS {GRIEVANCES_FTS}_au
+                    AFTER UPDATE OF description, review_remarks ON grievance_requests BEGIN
+                        INSERT INTO {GRIEVANCES_FTS}({GRIEVANCES_FTS}, rowid, description, review_remarks)
+                        VALUES ('delete', old.id, old.description, old.review_remarks);
+                        INSERT INTO {GRIEVANCES_FTS}(rowid, description, review_remarks)
+                        VALUES (new.id, new.description, new.review_remarks);
+                    END"""))
+                if not exists:
+                    conn.execute(text(f"INSERT INTO {GRIEVANCES_FTS}({GRIEVANCES_FTS}) VALUES ('rebuild')"))
+        except DBAPIError:
+            # SQLite built without FTS5
+            pass
+
+    elif dialect == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"ALTER TABLE grievance_requests ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR} tsvector "
+                "GENERATED ALWAYS AS (to_tsvector('english', "
+                "coalesce(description, '') || ' ' || coalesce(review_remarks, ''))) STORED"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_grievance_requests_{SEARCH_VECTOR} "
+                f"ON grievance_requests USING gin ({SEARCH_VECTOR})"
+            ))
+
+
+def backfill_request_ranges(engine: Engine) -> None:
+    """Give single-day OD/absence requests from before date ranges existed a one-day range."""
+    inspector = inspect(engine)
+    for table in ("od_requests", "absence_requests"):
+        if not inspector.has_table(table):
+            continue
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"UPDATE {table} SET start_date = request_date, end_date = request_date "
+                    "WHERE start_date IS NULL OR end_date IS NULL"
+                )
+            )
+
+
+def backfill_attendance_semesters(engine: Engine) -> None:
+    """Stamp attendance rows from before semesters existed (semester_id NULL) with one.
+
+    They go to the oldest semester of the student's section whose rows are
+    still live (the implicit first one, opened here if the section has none),
+    so the archiver can select a semester's rows by semester_id alone.
+    """
+    with Session(bind=engine) as db:
+        sections = [
+            tuple(row)
+            for row in db.execute(text(
+                "SELECT DISTINCT s.department, s.year, s.section FROM students s WHERE s.id IN ("
+                "SELECT student_id FROM daily_attendance WHERE semester_id IS NULL "
+                "UNION SELECT student_id FROM attendance WHERE semester_id IS NULL)"
+            ))
+        ]
+        if not sections:
+            return
+        target = {}
+        for department, year, section in sections:
+            target[(department, year, section)] = db.execute(
+                text(
+                    "SELECT id FROM semesters WHERE department = :d AND year = :y AND section = :s "
+                    "AND status != 'ARCHIVED' ORDER BY id LIMIT 1"
+                ),
+                {"d": department, "y": year, "s": section},
+            ).scalar()
+        target.update(active_semester_ids(db, {k for k, v in target.items() if v is None}))
+
+        for (department, year, section), semester_id in target.items():
+            for table in ("daily_attendance", "attendance"):
+                db.execute(
+                    text(
+                        f"UPDATE {table} SET semester_id = :sid WHERE semester_id IS NULL AND student_id IN ("
+                        "SELECT id FROM students WHERE department = :d AND year = :y AND section = :s)"
+                    ),
+                    {"sid": semester_id, "d": department, "y": year, "s": section},
+                )
+        db.commit()
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Idempotent, additive upgrades run on startup after create_all()."""
+    ensure_columns(engine)
+    ensure_indexes(engine)
+    migrate_notification_meta(engine)
+    ensure_student_search_index(engine)
+    ensure_grievance_search_index(engine)
+    backfill_request_ranges(engine)
+    backfill_attendance_semesters(engine)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import date, time
 from typing import List, Optional
@@ -164,3 +164,45 @@ class CRAssignmentRemoveSchema(BaseModel):
     pass
 
 
+
+
+class UploadSessionCreateSchema(BaseModel):
+    filename: str
+    total_size: int
+
+
+class ReportSectionRef(BaseModel):
+    department: str
+    year: str
+    section: str
+
+
+class ReportJobCreateSchema(BaseModel):
+    start_date: date
+    end_date: date
+    # None = every section of the admin's department that has students
+    sections: Optional[List[ReportSectionRef]] = None
+    formats: List[str] = ["pdf", "csv"]
+
+
+class YearPromotionSchema(BaseModel):
+    # only "section" (the admin's own year and section) over HTTP;
+    # department-wide promotion is the operator CLI: python -m app.year_promotion
+    scope: str = "section"
+    # None = the admin's own year
+    years: Optional[List[str]] = None
+    dry_run: bool = True
+
+
+class RequestDecisionItem(BaseModel):
+    id: int
+    decision: str  # APPROVED | REJECTED
+    remarks: Optional[str] = None
+
+
+# one batch is decided in a single transaction; keep it to a page of pending requests
+REQUEST_DECISION_BATCH_MAX = 200
+
+
+class RequestDecisionBatchSchema(BaseModel):
+    decisions: List[RequestDecisionItem] = Field(max_length=REQUEST_DECISION_BATCH_MAX)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.models import Admin, HolidayDeclaration, TimeSlot, Timetable
+
+
+Section = tuple[str, str, str]
+
+
+def section_holidays(db: Session, section: Section, start: date, end: date) -> set[date]:
+    department, year, sec = section
+    return {
+        d
+        for (d,) in db.query(HolidayDeclaration.holiday_date).filter(
+            HolidayDeclaration.department == department,
+            HolidayDeclaration.year == year,
+            HolidayDeclaration.section == sec,
+            HolidayDeclaration.holiday_date >= start,
+            HolidayDeclaration.holiday_date <= end,
+        )
+    }
+
+
+def section_timetables(db: Session, sections: set[Section]) -> dict[Section, dict[str, list[TimeSlot]]]:
+    """{section: {weekday: [TimeSlot, ...]}} from each section's admin; one query for all sections."""
+    if not sections:
+        return {}
+    rows = (
+        db.query(Admin.department, Admin.year, Admin.section, Admin.admin_id, Timetable.day, TimeSlot)
+        .join(Timetable, Timetable.admin_id == Admin.admin_id)
+        .join(TimeSlot, TimeSlot.id == Timetable.slot_id)
+        .filter(tuple_(Admin.department, Admin.year, Admin.section).in_(list(sections)))
+        .order_by(Admin.id)
+        .all()
+    )
+    out: dict[Section, dict[str, list[TimeSlot]]] = {s: {} for s in sections}
+    admin_of: dict[Section, str] = {}
+    for department, year, section, admin_id, day, ts in rows:
+        key = (department, year, section)
+        # like the single-request path: the section's first admin owns the timetable
+        if admin_of.setdefault(key, admin_id) != admin_id:
+            continue
+        out[key].setdefault(day, []).append(ts)
+    return out
+
+
+def working_days(start: date, end: date, timetable: dict[str, list], holidays: set[date]) -> list[date]:
+    """The section's working days in [start, end]: weekdays with timetable slots
+    (Mon-Fri without a timetable), minus declared holidays."""
+    class_days = {day for day, slots in timetable.items() if slots}
+    days = []
+    d = start
+    while d <= end:
+        working = d.strftime("%A") in class_days if class_days else d.weekday() < 5
+        if working and d not in holidays:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
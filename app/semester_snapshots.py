@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.attendance_matrix import (
+    ABSENT,
+    DEFAULTER_THRESHOLD,
+    OD,
+    PRESENT,
+    UNMARKED,
+    AttendanceMatrix,
+    load_section_matrix,
+    section_date_range,
+)
+from app.models import Admin, Semester, SemesterSettings, Student
+
+
+SEMESTER_SNAPSHOT_DIR = os.getenv(
+    "SEMESTER_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "semester_snapshots"),
+)
+
+MANIFEST = "manifest.json"
+SNAPSHOT_FORMAT = 1
+
+# array files inside a snapshot directory
+_FILES = {
+    "student_ids": "student_ids.npy",  # int64 [students]
+    "rolls": "rolls.npy",  # unicode [students]
+    "names": "names.npy",  # unicode [students]
+    "calendar": "calendar.npy",  # datetime64[D] [days]
+    "daily": "daily.npy",  # int8 [students, days]
+    "slot_ids": "slot_ids.npy",  # int64 [slots]
+    "slots": "slots.npy",  # int8 [students, days, slots]
+}
+
+Section = tuple[str, str, str]
+
+
+def _safe(part: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(part))
+
+
+def section_snapshot_root(department: str, year: str, section: str) -> str:
+    return os.path.join(SEMESTER_SNAPSHOT_DIR, _safe(department), _safe(year), _safe(section))
+
+
+def _text_array(values: list[str]) -> np.ndarray:
+    # fixed-width unicode (never object dtype) so the file can be memory-mapped
+    width = max((len(v) for v in values), default=1)
+    return np.array(values, dtype=f"<U{max(width, 1)}")
+
+
+# -------------------- WRITE --------------------
+def semester_range(
+    db: Session, department: str, year: str, section: str, semester_id: int | None = None
+) -> tuple[date, date] | None:
+    """The section's configured semester widened to cover its marks; None if it has no marks.
+
+    For a closed semester_id its own recorded dates are used instead of the
+    section's (by then possibly already updated) settings.
+    """
+    marked = section_date_range(db, department=department, year=year, section=section, semester_id=semester_id)
+    if marked is None:
+        return None
+    if semester_id is not None:
+        row = db.query(Semester.start_date, Semester.end_date).filter(Semester.id == semester_id).first()
+    else:
+        row = (
+            db.query(SemesterSettings.start_date, SemesterSettings.end_date)
+            .join(Admin, Admin.admin_id == SemesterSettings.admin_id)
+            .filter(Admin.department == department, Admin.year == year, Admin.section == section)
+            .order_by(SemesterSettings.start_date.desc())
+            .first()
+        )
+    if row is None:
+        return marked
+    # never drop marks recorded outside the configured dates
+    return min(row[0] or marked[0], marked[0]), max(row[1] or marked[1], marked[1])
+
+
+def write_section_snapshot(
+    db: Session, department: str, year: str, section: str, semester_id: int | None = None
+) -> dict | None:
+    """Write the section's current semester (or the closed semester_id) as .npy arrays + manifest;
+    None if it has no marks."""
+    span = semester_range(db, department, year, section, semester_id)
+    if span is None:
+        return None
+    start, end = span
+
+    m = load_section_matrix(
+        db,
+        department=department,
+        year=year,
+        section=section,
+        start=start,
+        end=end,
+        include_slots=True,
+        semester_id=semester_id,
+    )
+    root = section_snapshot_root(department, year, section)
+    name = f"{start.isoformat()}_{end.isoformat()}"
+    dest = os.path.join(root, name)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    arrays = {
+        "student_ids": m.student_ids.astype(np.int64),
+        "rolls": _text_array(m.rolls),
+        "names": _text_array(m.names),
+        "calendar": np.array(m.days, dtype="datetime64[D]"),
+        "daily": m.daily,
+        "slot_ids": np.array(m.slot_ids, dtype=np.int64),
+        "slots": m.slots,
+    }
+    for key, array in arrays.items():
+        np.save(os.path.join(tmp, _FILES[key]), array, allow_pickle=False)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "department": department,
+        "year": year,
+        "section": section,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "students": len(m.rolls),
+        "days": len(m.days),
+        "working_days": m.working_days,
+        "slot_ids": list(m.slot_ids),
+        "status_codes": {"UNMARKED": UNMARKED, "PRESENT": PRESENT, "ABSENT": ABSENT, "OD": OD},
+        "files": dict(_FILES),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # re-closing the same semester replaces its snapshot
+    if os.path.isdir(dest):
+        shutil.rmtree(dest)
+    os.replace(tmp, dest)
+    return {**manifest, "path": dest}
+
+
+def snapshot_all_sections(db: Session, sections: list[Section] | None = None) -> list[dict]:
+    """Snapshot every section with students (or the given ones); returns the written manifests."""
+    if sections is None:
+        sections = [
+            tuple(row)
+            for row in db.query(Student.department, Student.year, Student.section).distinct()
+        ]
+    written = []
+    for department, year, section in sections:
+        manifest = write_section_snapshot(db, department, year, section)
+        if manifest is not None:
+            written.append(manifest)
+    return written
+
+
+# -------------------- READ --------------------
+def list_snapshots(department: str, year: str, section: str) -> list[dict]:
+    """Manifests of the section's snapshots, oldest semester first."""
+    root = section_snapshot_root(department, year, section)
+    if not os.path.isdir(root):
+        return []
+    manifests = []
+    for entry in sorted(os.scandir(root), key=lambda e: e.name):
+        path = os.path.join(entry.path, MANIFEST)
+        if entry.is_dir() and os.path.exists(path):
+            with open(path) as f:
+                manifests.append({**json.load(f), "path": entry.path})
+    return manifests
+
+
+def load_snapshot(path: str) -> AttendanceMatrix:
+    """Memory-map a snapshot: nothing is read until a reduction touches the pages."""
+
+    def load(key):
+        return np.load(os.path.join(path, _FILES[key]), mmap_mode="r", allow_pickle=False)
+
+    return AttendanceMatrix(
+        student_ids=load("student_ids"),
+        rolls=load("rolls"),
+        names=load("names"),
+        days=load("calendar"),
+        daily=load("daily"),
+        slot_ids=load("slot_ids").tolist(),
+        slots=load("slots"),
+    )
+
+
+def semester_summary(m: AttendanceMatrix, threshold: float = DEFAULTER_THRESHOLD) -> dict:
+    """Section-level figures used to compare semesters side by side (OD counts as present)."""
+    pct = m.percentages(count_od=True)
+    longest, _ = m.absence_streaks()
+    heatmap = m.weekday_heatmap()
+    return {
+        "students": len(m.rolls),
+        "working_days": m.working_days,
+        "average_percentage": round(float(pct.mean()), 2) if len(pct) else 0,
+        "median_percentage": round(float(np.median(pct)), 2) if len(pct) else 0,
+        "defaulters": int((pct < threshold).sum()),
+        "longest_absence_streak": int(longest.max()) if len(longest) else 0,
+        "weekday_present_percent": [None if np.isnan(v) else float(v) for v in heatmap[:5]],
+    }
+
+
+if __name__ == "__main__":
+    # snapshot the live semester of every section without resetting: python -m app.semester_snapshots
+    from app.database import SessionLocal
+
+    _db = SessionLocal()
+    try:
+        for _m in snapshot_all_sections(_db):
+            print(_m["path"], _m["students"], "students", _m["days"], "days")
+    finally:
+        _db.close()
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from sqlalchemy import and_, delete, event, func, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import (
+    Attendance,
+    AttendanceArchive,
+    DailyAttendance,
+    DailyAttendanceArchive,
+    Semester,
+    Student,
+)
+
+
+ARCHIVE_CHUNK_SIZE = int(os.getenv("SEMESTER_ARCHIVE_CHUNK_SIZE", "2000"))
+# a FAILED archive is retried at startup until it has been started this many times
+ARCHIVE_MAX_ATTEMPTS = int(os.getenv("SEMESTER_ARCHIVE_MAX_ATTEMPTS", "3"))
+
+Section = tuple[str, str, str]
+
+# live table -> (archive table, columns copied as-is)
+_ARCHIVES = (
+    (DailyAttendance, DailyAttendanceArchive, ("id", "student_id", "date", "status", "source", "marked_by", "created_at")),
+    (Attendance, AttendanceArchive, ("id", "student_id", "date", "slot", "status", "latitude", "longitude", "marked_at")),
+)
+
+
+def _active_key(section: Section) -> str:
+    return "|".join(section)
+
+
+# -------------------- ACTIVE SEMESTER --------------------
+def active_semester_ids(db: Session, sections: set[Section]) -> dict[Section, int]:
+    """Id of each section's ACTIVE semester, opening an implicit one where none exists yet.
+
+    The first semester of a section predating this table has no start date: its
+    rows are whatever was already live, stamped at startup by
+    schema_upgrades.backfill_attendance_semesters.
+    """
+    if not sections:
+        return {}
+    keys = {_active_key(s): s for s in sections}
+    found = {
+        keys[key]: sid
+        for sid, key in db.execute(
+            select(Semester.id, Semester.active_key).where(Semester.active_key.in_(list(keys)))
+        )
+    }
+    missing = sections - set(found)
+    if missing:
+        rows = [
+            {
+                "department": department,
+                "year": year,
+                "section": sec,
+                "status": "ACTIVE",
+                "active_key": _active_key((department, year, sec)),
+                "rows_total": 0,
+                "rows_moved": 0,
+                "opened_at": datetime.utcnow(),
+            }
+            for department, year, sec in missing
+        ]
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            # a concurrent writer may open the same semester first
+            db.execute(dialect_insert(Semester).values(rows).on_conflict_do_nothing(index_elements=["active_key"]))
+        else:
+            db.execute(insert(Semester).values(rows))
+        for sid, key in db.execute(
+            select(Semester.id, Semester.active_key).where(
+                Semester.active_key.in_([_active_key(s) for s in missing])
+            )
+        ):
+            found[keys[key]] = sid
+    return found
+
+
+def active_semester_start(db: Session, department: str, year: str, section: str) -> date | None:
+    return db.execute(
+        select(Semester.start_date).where(Semester.active_key == _active_key((department, year, section)))
+    ).scalar()
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_semester_on_attendance_insert(session, flush_context, instances):
+    pending = [
+        obj
+        for obj in session.new
+        if isinstance(obj, (DailyAttendance, Attendance)) and obj.semester_id is None and obj.student_id is not None
+    ]
+    if not pending:
+        return
+    with session.no_autoflush:
+        section_of = {
+            sid: (department, year, section)
+            for sid, department, year, section in session.query(
+                Student.id, Student.department, Student.year, Student.section
+            ).filter(Student.id.in_({obj.student_id for obj in pending}))
+        }
+        semester_of = active_semester_ids(session, set(section_of.values()))
+    for obj in pending:
+        section = section_of.get(obj.student_id)
+        if section is not None:
+            obj.semester_id = semester_of[section]
+
+
+# -------------------- SWITCH --------------------
+def switch_semester(
+    db: Session,
+    section: Section,
+    *,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> tuple[Semester, Semester]:
+    """Close the section's active semester and open the next one; (closed, opened).
+
+    Two single-row writes: the old rows stay in place until the archiver moves
+    them, and new rows are stamped with the new id from this point on.
+    """
+    current_id = active_semester_ids(db, {section})[section]
+    closed = db.get(Semester, current_id)
+    closed.status = "ARCHIVING"
+    closed.active_key = None
+    closed.closed_at = datetime.utcnow()
+    closed.end_date = closed.end_date or date.today()
+    db.flush()
+
+    department, year, sec = section
+    opened = Semester(
+        department=department,
+        year=year,
+        section=sec,
+        start_date=start_date or date.today(),
+        end_date=end_date,
+        status="ACTIVE",
+        active_key=_active_key(section),
+        rows_total=0,
+        rows_moved=0,
+    )
+    db.add(opened)
+    db.flush()
+    return closed, opened
+
+
+# -------------------- ARCHIVER --------------------
+_archiver: ThreadPoolExecutor | None = None
+_archiver_lock = threading.Lock()
+_scheduled: set[int] = set()
+
+
+def _rows_of(model, semester: Semester):
+    """Live rows belonging to a closed semester (legacy rows are stamped by schema_upgrades)."""
+    return model.semester_id == semester.id
+
+
+def _move_chunk(db: Session, live, archive, columns, semester: Semester) -> int:
+    ids = db.execute(
+        select(live.id).where(_rows_of(live, semester)).order_by(live.id).limit(ARCHIVE_CHUNK_SIZE)
+    ).scalars().all()
+    if not ids:
+        return 0
+    now = datetime.utcnow()
+    db.execute(
+        insert(archive).from_select(
+            [*columns, "semester_id", "archived_at"],
+            select(
+                *[getattr(live, c) for c in columns],
+                literal(semester.id),
+                literal(now),
+            ).where(
+                live.id.in_(ids),
+                # rows a previous, interrupted run copied but did not delete
+                live.id.not_in(select(archive.id).where(archive.id.in_(ids))),
+            ),
+        )
+    )
+    db.execute(delete(live).where(live.id.in_(ids)))
+    db.execute(
+        update(Semester).where(Semester.id == semester.id).values(rows_moved=Semester.rows_moved + len(ids))
+    )
+    db.commit()
+    return len(ids)
+
+
+def archive_semester(semester_id: int) -> None:
+    """Move a closed semester's live rows into the archive tables, one short transaction per chunk."""
+    db = SessionLocal()
+    try:
+        semester = db.get(Semester, semester_id)
+        if semester is None or semester.status not in ("ARCHIVING", "FAILED"):
+            return
+        semester.status = "ARCHIVING"
+        semester.error = None
+        semester.archive_attempts = (semester.archive_attempts or 0) + 1
+        semester.rows_total = semester.rows_moved + sum(
+            db.query(live).filter(_rows_of(live, semester)).count() for live, _, _ in _ARCHIVES
+        )
+        db.commit()
+
+        if not semester.rows_moved:
+            # keep the semester for historical analytics while its rows are all still live
+            from app.semester_snapshots import write_section_snapshot
+
+            write_section_snapshot(db, semester.department, semester.year, semester.section, semester.id)
+
+        for live, archive, columns in _ARCHIVES:
+            while True:
+                try:
+                    moved = _move_chunk(db, live, archive, columns, semester)
+                except IntegrityError:
+                    # another process copied part of this chunk concurrently; retry skips those rows
+                    db.rollback()
+                    continue
+                if not moved:
+                    break
+
+        semester.status = "ARCHIVED"
+        semester.archived_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        semester = db.get(Semester, semester_id)
+        if semester is not None:
+            semester.status = "FAILED"
+            semester.error = f"{type(e).__name__}: {e}"[:500]
+            db.commit()
+    finally:
+        _scheduled.discard(semester_id)
+        db.close()
+
+
+def schedule_archive(semester_id: int) -> None:
+    global _archiver
+    with _archiver_lock:
+        if semester_id in _scheduled:
+            return
+        _scheduled.add(semester_id)
+        if _archiver is None:
+            _archiver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semester-archive")
+    _archiver.submit(archive_semester, semester_id)
+
+
+def resume_pending_archives() -> int:
+    """Re-queue archives interrupted by a restart, and FAILED ones with attempts left; called once at startup."""
+    db = SessionLocal()
+    try:
+        pending = [
+            sid
+            for (sid,) in db.query(Semester.id).filter(
+                or_(
+                    Semester.status == "ARCHIVING",
+                    and_(
+                        Semester.status == "FAILED",
+                        func.coalesce(Semester.archive_attempts, 0) < ARCHIVE_MAX_ATTEMPTS,
+                    ),
+                )
+            )
+        ]
+    finally:
+        db.close()
+    for sid in pending:
+        schedule_archive(sid)
+    return len(pending)
+
+
+def semester_progress(semester: Semester) -> dict:
+    return {
+        "semester_id": semester.id,
+        "status": semester.status,
+        "start_date": semester.start_date.isoformat() if semester.start_date else None,
+        "end_date": semester.end_date.isoformat() if semester.end_date else None,
+        "rows_total": semester.rows_total,
+        "rows_moved": semester.rows_moved,
+        "percent": round(100 * semester.rows_moved / semester.rows_total, 1) if semester.rows_total else 100.0,
+        "error": semester.error,
+        "archive_attempts": semester.archive_attempts or 0,
+        "closed_at": semester.closed_at.isoformat() if semester.closed_at else None,
+        "archived_at": semester.archived_at.isoformat() if semester.archived_at else None,
+    }
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import and_, exists, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import Admin, DailyAttendance, HolidayDeclaration, SmsAlert, Student, Timetable
+from app.utils.attendance import section_absentees_query
+
+
+# Transport: twilio | fake | log (prints only; alerts stay QUEUED until a real transport sends them)
+SMS_TRANSPORT = os.getenv("SMS_TRANSPORT", "log").strip().lower()
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID", "")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN", "")
+TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER", "")
+# Point the Twilio client at app/fake_twilio.py (or any compatible mock) instead of api.twilio.com
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "")
+
+SMS_WORKERS = int(os.getenv("SMS_WORKERS", "8"))
+SMS_RATE_PER_SECOND = float(os.getenv("SMS_RATE_PER_SECOND", "10"))
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", "3"))
+SMS_BATCH_SIZE = int(os.getenv("SMS_BATCH_SIZE", "200"))
+SMS_DEFAULT_COUNTRY_CODE = os.getenv("SMS_DEFAULT_COUNTRY_CODE", "+91")
+
+
+class TransientSmsError(Exception):
+    """Send failed in a way worth retrying (rate limited, 5xx, network)."""
+
+
+class PermanentSmsError(Exception):
+    """Send failed and retrying will not help (bad number, auth, 4xx)."""
+
+
+# -------------------- TRANSPORTS --------------------
+class TwilioTransport:
+    """Send through the twilio client; one client per worker thread."""
+
+    def __init__(
+        self,
+        account_sid: str = TWILIO_ACCOUNT_SID,
+        auth_token: str = TWILIO_AUTH_TOKEN,
+        from_number: str = TWILIO_FROM_NUMBER,
+        base_url: str = TWILIO_API_BASE_URL,
+    ):
+        if not (account_sid and auth_token and from_number):
+            raise RuntimeError("TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN and TWILIO_FROM_NUMBER are required")
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.base_url = base_url
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            from twilio.rest import Client
+
+            client = Client(self.account_sid, self.auth_token)
+            if self.base_url:
+                client.api.base_url = self.base_url.rstrip("/")
+            self._local.client = client
+        return client
+
+    def send(self, to: str, body: str) -> str:
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            msg = self._client().messages.create(to=to, from_=self.from_number, body=body)
+        except TwilioRestException as e:
+            if e.status == 429 or e.status >= 500:
+                raise TransientSmsError(f"twilio {e.status}: {e.msg}")
+            raise PermanentSmsError(f"twilio {e.status}: {e.msg}")
+        except OSError as e:
+            raise TransientSmsError(f"{type(e).__name__}: {e}")
+        return msg.sid
+
+
+class FakeTransport:
+    """In-memory transport; fail_every=N makes every Nth call fail transiently."""
+
+    def __init__(self, fail_every: int = 0):
+        self.fail_every = fail_every
+        self.sent: list[tuple[str, str]] = []
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def send(self, to: str, body: str) -> str:
+        with self._lock:
+            self._calls += 1
+            if self.fail_every and self._calls % self.fail_every == 0:
+                raise TransientSmsError("fake transient failure")
+            self.sent.append((to, body))
+        return "SM" + uuid.uuid4().hex
+
+
+class LogTransport:
+    """Default when SMS is not configured: print instead of sending.
+
+    Returns no provider sid, so the alert is not marked SENT.
+    """
+
+    def send(self, to: str, body: str) -> None:
+        print(f"SMS (not sent) to {to}: {body}")
+        return None
+
+
+def get_transport():
+    if SMS_TRANSPORT == "twilio":
+        return TwilioTransport()
+    if SMS_TRANSPORT == "fake":
+        return FakeTransport()
+    return LogTransport()
+
+
+# -------------------- RATE LIMIT + RETRY --------------------
+class RateLimiter:
+    """Token bucket shared by all worker threads."""
+
+    def __init__(self, rate_per_second: float, burst: int | None = None):
+        self.rate = rate_per_second
+        self.capacity = float(burst or max(1, int(rate_per_second)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class SendResult:
+    alert_id: int
+    status: str
+    attempts: int
+    provider_sid: str | None = None
+    error: str | None = None
+
+
+def _send_with_retries(
+    transport, limiter: RateLimiter, alert_id: int, to: str, body: str, max_attempts: int = SMS_MAX_ATTEMPTS
+) -> SendResult:
+    """Deliver one alert.
+
+    FAILED alerts are retried by later runs while they have attempts left;
+    REJECTED ones never are. A transport that returns no sid did not really
+    send, so the alert stays QUEUED and no attempt is counted.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        limiter.acquire()
+        try:
+            sid = transport.send(to, body)
+        except TransientSmsError as e:
+            if attempts >= max_attempts:
+                return SendResult(alert_id, "FAILED", attempts, error=str(e)[:500])
+            time.sleep(min(0.5 * 2 ** (attempts - 1), 8))
+            continue
+        except PermanentSmsError as e:
+            return SendResult(alert_id, "REJECTED", attempts, error=str(e)[:500])
+        except Exception as e:
+            return SendResult(alert_id, "FAILED", attempts, error=str(e)[:500])
+        if sid is None:
+            return SendResult(alert_id, "QUEUED", 0)
+        return SendResult(alert_id, "SENT", attempts, provider_sid=sid)
+
+
+# -------------------- JOB --------------------
+def normalize_mobile(mobile: str | None) -> str | None:
+    digits = "".join(ch for ch in (mobile or "") if ch.isdigit() or ch == "+")
+    if not digits:
+        return None
+    if digits.startswith("+"):
+        return digits
+    if len(digits) == 10:
+        return SMS_DEFAULT_COUNTRY_CODE + digits
+    return "+" + digits
+
+
+def absentee_message(name: str, roll_number: str, day: date) -> str:
+    return (
+        f"PRESENZA: {name} ({roll_number}) was marked absent on "
+        f"{day.strftime('%d-%m-%Y')}. Contact the class advisor for details."
+    )
+
+
+def queue_section_absentee_alerts(
+    db: Session,
+    *,
+    department: str,
+    year: str,
+    section: str,
+    day: date,
+) -> int:
+    """Insert QUEUED alerts for the section's absentees (idempotent per student/day)."""
+    absentees = section_absentees_query(
+        db, department=department, year=year, section=section, day=day
+    ).all()
+    if not absentees:
+        return 0
+
+    already = {
+        row[0]
+        for row in db.query(SmsAlert.student_id)
+        .filter(
+            SmsAlert.alert_date == day,
+            SmsAlert.student_id.in_([s.id for s in absentees]),
+        )
+        .all()
+    }
+
+    rows = []
+    for s in absentees:
+        mobile = normalize_mobile(s.mobile)
+        if s.id in already or not mobile:
+            continue
+        rows.append(
+            {
+                "student_id": s.id,
+                "alert_date": day,
+                "mobile": mobile,
+                "message": absentee_message(s.name, s.roll_number, day),
+                "status": "QUEUED",
+                "attempts": 0,
+            }
+        )
+
+    if rows:
+        db.bulk_insert_mappings(SmsAlert, rows)
+        db.commit()
+    return len(rows)
+
+
+def dispatch_queued_alerts(db: Session, *, day: date, transport=None, student_ids: list[int] | None = None) -> dict:
+    """Send QUEUED alerts for `day`, and FAILED ones with attempts left, through a rate-limited worker pool.
+
+    SMS_MAX_ATTEMPTS caps the attempts per alert across all runs; REJECTED
+    alerts are never retried. Alerts are loaded and their delivery state written back SMS_BATCH_SIZE at a time,
+    so memory and transaction length stay bounded for large sections.
+    """
+    transport = transport or get_transport()
+    limiter = RateLimiter(SMS_RATE_PER_SECOND)
+    totals = {"sent": 0, "failed": 0, "rejected": 0, "unsent": 0, "attempts": 0}
+
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=SMS_WORKERS, thread_name_prefix="sms") as pool:
+        while True:
+            q = db.query(SmsAlert.id, SmsAlert.mobile, SmsAlert.message, SmsAlert.attempts).filter(
+                SmsAlert.alert_date == day,
+                or_(
+                    SmsAlert.status == "QUEUED",
+                    and_(SmsAlert.status == "FAILED", SmsAlert.attempts < SMS_MAX_ATTEMPTS),
+                ),
+                SmsAlert.id > last_id,
+            )
+            if student_ids is not None:
+                q = q.filter(SmsAlert.student_id.in_(student_ids))
+            batch = q.order_by(SmsAlert.id.asc()).limit(SMS_BATCH_SIZE).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            previous_attempts = {row.id: row.attempts or 0 for row in batch}
+
+            results = list(
+                pool.map(
+                    lambda row: _send_with_retries(
+                        transport,
+                        limiter,
+                        row.id,
+                        row.mobile,
+                        row.message,
+                        max(1, SMS_MAX_ATTEMPTS - previous_attempts[row.id]),
+                    ),
+                    batch,
+                )
+            )
+
+            db.bulk_update_mappings(
+                SmsAlert,
+                [
+                    {
+                        "id": r.alert_id,
+                        "status": r.status,
+                        "attempts": previous_attempts[r.alert_id] + r.attempts,
+                        "provider_sid": r.provider_sid,
+                        "error": r.error,
+                    }
+                    for r in results
+                ],
+            )
+            db.commit()
+
+            for r in results:
+                totals["attempts"] += r.attempts
+                totals[{"SENT": "sent", "REJECTED": "rejected", "QUEUED": "unsent"}.get(r.status, "failed")] += 1
+
+    return totals
+
+
+def class_day_skip_reason(db: Session, *, department: str, year: str, section: str, day: date) -> str | None:
+    """Why `day` was not a class day for the section, or None if it was.
+
+    "No daily row" only means absent once the CR has taken attendance, so
+    holidays, days off the timetable and untaken days are all skipped.
+    """
+    holiday = db.query(
+        exists().where(
+            HolidayDeclaration.department == department,
+            HolidayDeclaration.year == year,
+            HolidayDeclaration.section == section,
+            HolidayDeclaration.holiday_date == day,
+        )
+    ).scalar()
+    if holiday:
+        return "holiday"
+
+    section_admins = select(Admin.admin_id).where(
+        Admin.department == department, Admin.year == year, Admin.section == section
+    )
+    has_classes = db.query(
+        exists().where(Timetable.admin_id.in_(section_admins), Timetable.day == day.strftime("%A"))
+    ).scalar()
+    if not has_classes:
+        return "no timetable slots"
+
+    section_students = select(Student.id).where(
+        Student.department == department, Student.year == year, Student.section == section
+    )
+    taken = db.query(
+        exists().where(DailyAttendance.date == day, DailyAttendance.student_id.in_(section_students))
+    ).scalar()
+    if not taken:
+        return "attendance not taken"
+    return None
+
+
+def send_section_absentee_alerts(
+    db: Session,
+    *,
+    department: str,
+    year: str,
+    section: str,
+    day: date,
+    transport=None,
+) -> dict:
+    skipped = class_day_skip_reason(db, department=department, year=year, section=section, day=day)
+    if skipped:
+        return {"queued": 0, "sent": 0, "failed": 0, "rejected": 0, "unsent": 0, "attempts": 0, "skipped": skipped}
+    queued = queue_section_absentee_alerts(
+        db, department=department, year=year, section=section, day=day
+    )
+    section_ids = [
+        s.id
+        for s in section_absentees_query(
+            db, department=department, year=year, section=section, day=day
+        ).all()
+    ]
+    result = dispatch_queued_alerts(db, day=day, transport=transport, student_ids=section_ids)
+    return {"queued": queued, **result}
+
+
+def run_end_of_day_absentee_alerts(db: Session, day: date | None = None, transport=None) -> list[dict]:
+    """Queue and send alerts for every section that has an admin (i.e. is in use) and had class on `day`."""
+    day = day or date.today()
+    transport = transport or get_transport()
+    scopes = db.query(Admin.department, Admin.year, Admin.section).distinct().all()
+
+    reports = []
+    for department, year, section in scopes:
+        report = send_section_absentee_alerts(
+            db,
+            department=department,
+            year=year,
+            section=section,
+            day=day,
+            transport=transport,
+        )
+        reports.append({"department": department, "year": year, "section": section, **report})
+    return reports
+
+
+if __name__ == "__main__":
+    # cron entry point: python -m app.sms_alerts
+    from app.database import SessionLocal
+
+    _db = SessionLocal()
+    try:
+        for _report in run_end_of_day_absentee_alerts(_db):
+            print(_report)
+    finally:
+        _db.close()
@@ -0,0 +1,188 @@
+"""Static file serving for /static.
+
+On top of Starlette's StaticFiles (which already does ETag / If-None-Match,
+Last-Modified and Range via FileResponse):
+
+* precompressed ``.br`` / ``.gz`` siblings are served when the client accepts
+  them (generate with ``precompress_static`` at startup, or
+  ``python -m app.static_files`` at build time),
+* hashed bundles (``assets/``) and content-addressed proofs (``proofs/``) are
+  marked immutable; everything else must revalidate,
+* with ``STATIC_ACCEL_REDIRECT_PREFIX`` set, responses are handed to the front
+  proxy via ``X-Accel-Redirect`` instead of being streamed by Python, e.g.::
+
+      location /_static/ { internal; alias /srv/presenza/app/static/; gzip_static on; }
+
+  with ``STATIC_ACCEL_REDIRECT_PREFIX=/_static/``.
+"""
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import shutil
+from urllib.parse import quote
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+
+STATIC_ACCEL_REDIRECT_PREFIX = os.getenv("STATIC_ACCEL_REDIRECT_PREFIX", "")
+
+# path prefixes whose files never change once written (hash in the name)
+IMMUTABLE_PREFIXES = ("assets/", "proofs/")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml"}
+PRECOMPRESS_MIN_BYTES = 1024
+
+# preference order when the client accepts several
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def cache_control_for(relpath: str) -> str:
+    return IMMUTABLE_CACHE_CONTROL if relpath.startswith(IMMUTABLE_PREFIXES) else DEFAULT_CACHE_CONTROL
+
+
+def accepted_encodings(accept_encoding: str | None) -> set[str]:
+    """Codings the client accepts (q=0 entries excluded)."""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name)
+    return accepted
+
+
+class PresenzaStaticFiles(StaticFiles):
+    def get_path(self, scope) -> str:
+        path = super().get_path(scope)
+        # dot-dirs hold in-flight writes (e.g. proofs/.incoming); never serve them
+        if any(part.startswith(".") for part in path.split(os.sep) if part not in ("", ".")):
+            raise HTTPException(status_code=404)
+        return path
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        relpath = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+        cache_control = cache_control_for(relpath)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+
+        if STATIC_ACCEL_REDIRECT_PREFIX:
+            # the proxy serves the bytes (and its own ETag/Range/gzip_static)
+            return Response(
+                status_code=status_code,
+                media_type=media_type,
+                headers={
+                    "X-Accel-Redirect": STATIC_ACCEL_REDIRECT_PREFIX + quote(relpath),
+                    "Cache-Control": cache_control,
+                },
+            )
+
+        compressible = os.path.splitext(relpath)[1].lower() in COMPRESSIBLE_EXTENSIONS
+        response = None
+        # byte ranges refer to the identity encoding; only whole-body requests get a variant
+        if compressible and "range" not in request_headers:
+            accepted = accepted_encodings(request_headers.get("accept-encoding"))
+            for coding, suffix in ENCODINGS:
+                if coding not in accepted:
+                    continue
+                variant = f"{full_path}{suffix}"
+                try:
+                    variant_stat = os.stat(variant)
+                except OSError:
+                    continue
+                if variant_stat.st_mtime < stat_result.st_mtime:
+                    continue  # stale: original was rebuilt after compression
+                response = FileResponse(
+                    variant,
+                    status_code=status_code,
+                    stat_result=variant_stat,
+                    media_type=media_type,
+                    headers={"Content-Encoding": coding},
+                )
+                break
+
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["Cache-Control"] = cache_control
+        if compressible:
+            response.headers["Vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def _write_variant(src: str, dest: str, compress) -> None:
+    tmp = dest + ".tmp"
+    with open(src, "rb") as f:
+        data = f.read()
+    with open(tmp, "wb") as out:
+        out.write(compress(data))
+    shutil.copystat(src, tmp)
+    os.replace(tmp, dest)
+
+
+def precompress_static(directory: str, exclude: tuple[str, ...] | None = None) -> dict:
+    """Write .gz (and .br if brotli is installed) next to compressible files.
+
+    Variants that are already newer than their source are left alone, so this
+    is cheap to run on every startup. Top-level directories in exclude are not
+    walked at all; by default that is the proof upload areas, which hold no
+    bundles but can hold a very large number of files.
+    """
+    if exclude is None:
+        from app.proof_store import LEGACY_PROOF_SUBDIRS, PROOF_STORE_SUBDIR
+
+        exclude = (PROOF_STORE_SUBDIR, *LEGACY_PROOF_SUBDIRS)
+    report = {"gzip": 0, "br": 0, "skipped": 0}
+    codecs = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        codecs.append(("br", ".br", lambda data: brotli.compress(data, quality=11)))
+
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        if root == directory:
+            dirs[:] = [d for d in dirs if d not in exclude]
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            src = os.path.join(root, name)
+            src_stat = os.stat(src)
+            if src_stat.st_size < PRECOMPRESS_MIN_BYTES:
+                continue
+            for key, suffix, compress in codecs:
+                dest = src + suffix
+                try:
+                    if os.stat(dest).st_mtime >= src_stat.st_mtime:
+                        report["skipped"] += 1
+                        continue
+                except FileNotFoundError:
+                    pass
+                _write_variant(src, dest, compress)
+                report[key] += 1
+    return report
+
+
+if __name__ == "__main__":
+    # build step: python -m app.static_files
+    print(precompress_static(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")))
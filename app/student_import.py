@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+from itertools import islice
+from typing import BinaryIO, Iterator
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Student
+from app.report_cache import bump_all_versions
+
+
+IMPORT_CHUNK_SIZE = int(os.getenv("STUDENT_IMPORT_CHUNK_SIZE", "1000"))
+# the report lists at most this many failing rows; the totals always count all of them
+IMPORT_MAX_ERRORS = int(os.getenv("STUDENT_IMPORT_MAX_ERRORS", "1000"))
+
+REQUIRED_COLUMNS = ("roll_number", "name", "mobile")
+# department/year/section default to the importing admin's section when the column is absent or blank
+SECTION_COLUMNS = ("department", "year", "section")
+
+_HEADER_ALIASES = {
+    "roll": "roll_number",
+    "roll_no": "roll_number",
+    "rollno": "roll_number",
+    "register_number": "roll_number",
+    "student_name": "name",
+    "phone": "mobile",
+    "mobile_number": "mobile",
+    "dept": "department",
+    "cr": "is_cr",
+}
+
+_TRUE = {"1", "true", "yes", "y"}
+_FALSE = {"", "0", "false", "no", "n"}
+
+
+def _header(name: str) -> str:
+    key = name.strip().lower().replace(" ", "_").replace("-", "_").replace(".", "")
+    return _HEADER_ALIASES.get(key, key)
+
+
+def _read_rows(stream: BinaryIO) -> Iterator[tuple[int, dict]]:
+    """(line number, normalized row) pairs, decoded lazily from the binary upload."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_header(h) for h in header]
+        missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        for values in reader:
+            if not any(v.strip() for v in values):
+                continue
+            yield reader.line_num, {c: v.strip() for c, v in zip(columns, values)}
+    finally:
+        # the caller owns the upload; don't let the wrapper close it
+        text.detach()
+
+
+def _validate(row: dict, defaults: dict) -> tuple[dict | None, list[str]]:
+    errors = [f"{c} is required" for c in REQUIRED_COLUMNS if not row.get(c)]
+    values = {c: row.get(c) or defaults[c] for c in SECTION_COLUMNS}
+    is_cr = row.get("is_cr", "").lower()
+    if is_cr not in _TRUE | _FALSE:
+        errors.append(f"is_cr must be yes/no, got {row['is_cr']!r}")
+    mobile = row.get("mobile", "")
+    if mobile and not mobile.lstrip("+").isdigit():
+        errors.append("mobile must be digits")
+    if errors:
+        return None, errors
+    return {
+        "roll_number": row["roll_number"],
+        "name": row["name"],
+        "mobile": mobile,
+        "is_cr": is_cr in _TRUE,
+        **values,
+    }, []
+
+
+def import_students_csv(db: Session, stream: BinaryIO, defaults: dict) -> dict:
+    """Stream a student CSV into the students table, IMPORT_CHUNK_SIZE rows at a time.
+
+    Each chunk costs one IN query for existing roll numbers and one multi-row
+    INSERT, then commits, so memory stays bounded by the chunk (plus the roll
+    numbers seen so far, to catch in-file duplicates). Invalid rows are skipped
+    and reported by line number; the rest are imported.
+    """
+    seen: set[str] = set()
+    errors: list[dict] = []
+    totals = {"rows": 0, "imported": 0, "failed": 0}
+    sections: set[tuple[str, str, str]] = set()
+
+    def fail(line: int, roll: str | None, reasons: list[str]) -> None:
+        totals["failed"] += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"line": line, "roll_number": roll or None, "errors": reasons})
+
+    rows = _read_rows(stream)
+    while True:
+        chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+        totals["rows"] += len(chunk)
+
+        valid: list[tuple[int, dict]] = []
+        for line, row in chunk:
+            student, reasons = _validate(row, defaults)
+            roll = row.get("roll_number")
+            if roll and roll in seen:
+                reasons.append("duplicate roll_number in file")
+            if roll:
+                seen.add(roll)
+            if reasons:
+                fail(line, roll, reasons)
+            else:
+                valid.append((line, student))
+
+        existing = set(
+            db.execute(
+                select(Student.roll_number).where(Student.roll_number.in_([s["roll_number"] for _, s in valid]))
+            ).scalars()
+        ) if valid else set()
+
+        batch = []
+        for line, student in valid:
+            if student["roll_number"] in existing:
+                fail(line, student["roll_number"], ["roll_number already registered"])
+            else:
+                batch.append(student)
+                sections.add((student["department"], student["year"], student["section"]))
+        if batch:
+            db.execute(insert(Student), batch)
+        db.commit()
+        totals["imported"] += len(batch)
+
+    if sections:
+        # a multi-row INSERT skips the ORM flush hooks: new students change the absentee reports
+        for section in sections:
+            bump_all_versions(db, section)
+        db.commit()
+
+    errors.sort(key=lambda e: e["line"])
+    return {**totals, "errors": errors, "errors_truncated": totals["failed"] > len(errors)}
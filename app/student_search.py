@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from sqlalchemy import and_, case, func, literal_column, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models import Student
+
+
+SEARCH_MAX_LIMIT = 100
+
+# SQLite: external-content FTS5 table over students.name, trigram tokenizer (substring matches)
+STUDENTS_FTS = "students_fts"
+# the trigram tokenizer cannot match anything shorter than one trigram
+FTS_MIN_QUERY = 3
+
+
+# -------------------- BACKENDS --------------------
+_fts_ready: bool | None = None
+
+
+def _has_fts(db: Session) -> bool:
+    global _fts_ready
+    if _fts_ready is None:
+        _fts_ready = bool(
+            db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": STUDENTS_FTS},
+            ).first()
+        )
+    return _fts_ready
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _name_matches(db: Session, query: str):
+    """Condition on Student for a name match, using the best index the database has.
+
+    It is applied inside the department/section scope, so the fallbacks only
+    scan the scoped students (ix_students_section), never the whole roster.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        # served by the pg_trgm GIN index on name
+        return Student.name.ilike(f"%{_escape_like(query)}%", escape="\\")
+    if dialect == "sqlite" and len(query) >= FTS_MIN_QUERY and _has_fts(db):
+        phrase = '"' + query.replace('"', '""') + '"'
+        return Student.id.in_(
+            select(literal_column("rowid")).select_from(text(STUDENTS_FTS)).where(
+                text(f"{STUDENTS_FTS} MATCH :phrase").bindparams(phrase=phrase)
+            )
+        )
+    name = func.upper(Student.name)
+    pattern = _escape_like(query.upper())
+    if len(query) < FTS_MIN_QUERY:
+        # too short for a trigram: a name word starting with the query
+        return or_(name.like(f"{pattern}%", escape="\\"), name.like(f"% {pattern}%", escape="\\"))
+    return name.like(f"%{pattern}%", escape="\\")
+
+
+def _roll_prefix_bounds(prefix: str) -> tuple[str, str]:
+    # [prefix, prefix with its last character incremented): a range scan on the upper(roll_number) index
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# -------------------- SEARCH --------------------
+def search_students(
+    db: Session,
+    query: str,
+    *,
+    department: str,
+    year: str | None = None,
+    section: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> tuple[int, list[dict]]:
+    """(total, page) of students matching a roll-number prefix or part of the name.
+
+    Ranked: exact roll number, roll prefix, name starting with the query, other
+    name matches; ties by roll number.
+    """
+    query = " ".join(query.split())
+    if not query:
+        return 0, []
+    upper = query.upper()
+    low, high = _roll_prefix_bounds(upper)
+    roll_upper = func.upper(Student.roll_number)
+
+    scope = [Student.department == department]
+    if year is not None:
+        scope.append(Student.year == year)
+    if section is not None:
+        scope.append(Student.section == section)
+
+    rank = case(
+        (roll_upper == upper, 0),
+        (and_(roll_upper >= low, roll_upper < high), 1),
+        (func.upper(Student.name).like(f"{_escape_like(upper)}%", escape="\\"), 2),
+        else_=3,
+    )
+    base = select(Student).where(
+        *scope,
+        or_(and_(roll_upper >= low, roll_upper < high), _name_matches(db, query)),
+    )
+
+    # one round trip: the total rides along on every row of the page
+    rows = db.execute(
+        base.add_columns(func.count().over().label("total"))
+        .order_by(rank, Student.roll_number)
+        .limit(min(max(limit, 1), SEARCH_MAX_LIMIT))
+        .offset(max(offset, 0))
+    ).all()
+    if rows:
+        total = rows[0].total
+    else:
+        total = db.execute(select(func.count()).select_from(base.subquery())).scalar() if offset else 0
+    return total, [
+        {
+            "id": s.id,
+            "roll_number": s.roll_number,
+            "name": s.name,
+            "department": s.department,
+            "year": s.year,
+            "section": s.section,
+            "is_cr": bool(s.is_cr),
+        }
+        for s, _ in rows
+    ]
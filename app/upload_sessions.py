@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models import UploadSession
+from app.proof_store import store_proof_file
+from app.uploads import (
+    PROOF_MAX_BYTES,
+    PROOF_TYPES,
+    StoredUpload,
+    proof_extension,
+    safe_filename,
+    sniff_content_type,
+)
+
+
+# Outside static/ on purpose: partial uploads must never be publicly served.
+UPLOAD_SESSION_DIR = os.getenv(
+    "UPLOAD_SESSION_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "upload_sessions"),
+)
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+UPLOAD_SESSION_MAX_CHUNK = int(os.getenv("UPLOAD_SESSION_MAX_CHUNK", str(1024 * 1024)))
+UPLOAD_SESSION_MAX_OPEN = int(os.getenv("UPLOAD_SESSION_MAX_OPEN", "5"))
+
+# serialises chunk writes per session within this process
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(upload_id: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _forget_lock(upload_id: str) -> None:
+    with _locks_guard:
+        _locks.pop(upload_id, None)
+
+
+def part_path(upload_id: str) -> str:
+    return os.path.join(UPLOAD_SESSION_DIR, f"{upload_id}.part")
+
+
+def _remove_part(upload_id: str) -> None:
+    try:
+        os.remove(part_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def session_progress(s: UploadSession) -> dict:
+    return {
+        "upload_id": s.id,
+        "filename": s.filename,
+        "offset": s.received_bytes,
+        "total_size": s.total_size,
+        "complete": s.received_bytes >= s.total_size,
+        "chunk_size": UPLOAD_SESSION_MAX_CHUNK,
+    }
+
+
+def cleanup_stale_upload_sessions(db: Session) -> int:
+    """Drop sessions idle for longer than the TTL, plus stray .part files; returns rows removed."""
+    cutoff = datetime.utcnow() - timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+    stale_ids = [
+        row[0]
+        for row in db.query(UploadSession.id).filter(UploadSession.updated_at < cutoff).all()
+    ]
+    if stale_ids:
+        db.query(UploadSession).filter(UploadSession.id.in_(stale_ids)).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        for upload_id in stale_ids:
+            _remove_part(upload_id)
+            _forget_lock(upload_id)
+
+    # .part files whose row never committed (or was lost) are only visible on disk
+    if os.path.isdir(UPLOAD_SESSION_DIR):
+        cutoff_ts = cutoff.timestamp()
+        with os.scandir(UPLOAD_SESSION_DIR) as entries:
+            candidates = [
+                e for e in entries
+                if e.is_file() and e.name.endswith(".part") and e.stat().st_mtime < cutoff_ts
+            ]
+        if candidates:
+            known = {
+                row[0]
+                for row in db.query(UploadSession.id)
+                .filter(UploadSession.id.in_([e.name[:-5] for e in candidates]))
+                .all()
+            }
+            for e in candidates:
+                if e.name[:-5] not in known:
+                    _remove_part(e.name[:-5])
+
+    return len(stale_ids)
+
+
+def create_upload_session(db: Session, *, student_id: int, filename: str, total_size: int) -> UploadSession:
+    ext = proof_extension(filename)
+    if total_size <= 0:
+        raise HTTPException(status_code=400, detail="total_size must be positive")
+    if total_size > PROOF_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Proof file too large (max {PROOF_MAX_BYTES / (1024 * 1024):.1f} MB)",
+        )
+
+    cleanup_stale_upload_sessions(db)
+
+    open_count = db.query(UploadSession).filter(UploadSession.student_id == student_id).count()
+    if open_count >= UPLOAD_SESSION_MAX_OPEN:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many unfinished uploads — finish or cancel one first",
+        )
+
+    s = UploadSession(
+        id=uuid.uuid4().hex,
+        student_id=student_id,
+        filename=safe_filename(filename),
+        content_type=PROOF_TYPES[ext],
+        total_size=total_size,
+        received_bytes=0,
+    )
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    open(part_path(s.id), "wb").close()
+
+    db.add(s)
+    db.commit()
+    db.refresh(s)
+    return s
+
+
+def get_upload_session(db: Session, upload_id: str, student_id: int) -> UploadSession:
+    s = db.get(UploadSession, upload_id)
+    # another student's session is reported as missing, not forbidden
+    if s is None or s.student_id != student_id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return s
+
+
+def append_chunk(db: Session, *, upload_id: str, student_id: int, offset: int, data: bytes) -> UploadSession:
+    """Write data at offset and advance the session.
+
+    offset must equal the bytes already acknowledged; a mismatch is a 409 that
+    carries the current offset so the client can resume from there. Bytes past
+    the acknowledged offset (from a write whose ack never committed) are
+    truncated away before writing.
+    """
+    with _lock_for(upload_id):
+        s = get_upload_session(db, upload_id, student_id)
+
+        if offset != s.received_bytes:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Offset mismatch", "offset": s.received_bytes},
+            )
+        if not data:
+            return s
+        if len(data) > UPLOAD_SESSION_MAX_CHUNK:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Chunk too large (max {UPLOAD_SESSION_MAX_CHUNK} bytes)",
+            )
+        if offset + len(data) > s.total_size:
+            raise HTTPException(status_code=400, detail="Chunk runs past total_size")
+        if offset == 0 and sniff_content_type(data[:16]) != s.content_type:
+            raise HTTPException(status_code=400, detail="Proof content does not match its file type")
+
+        path = part_path(s.id)
+        if not os.path.exists(path):
+            raise HTTPException(status_code=410, detail="Upload data expired — start a new upload")
+
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        s.received_bytes = offset + len(data)
+        s.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(s)
+        return s
+
+
+def delete_upload_session(db: Session, upload_id: str, student_id: int) -> None:
+    s = get_upload_session(db, upload_id, student_id)
+    db.delete(s)
+    db.commit()
+    _remove_part(upload_id)
+    _forget_lock(upload_id)
+
+
+def consume_upload_session(db: Session, upload_id: str, student_id: int) -> StoredUpload:
+    """Link a completed session's file into the proof store and drop the session.
+
+    Like store_proof_upload, the new blob reference and the session deletion are
+    part of the caller's transaction; the caller commits. The .part file is
+    removed only after that commit, so if it fails the session is still
+    complete and finalize can simply be retried.
+    """
+    s = get_upload_session(db, upload_id, student_id)
+    if s.received_bytes < s.total_size:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload is not complete", "offset": s.received_bytes},
+        )
+
+    path = part_path(s.id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Upload data expired — start a new upload")
+
+    with open(path, "rb") as f:
+        stored = store_proof_file(db, f, s.filename, source_path=path)
+
+    db.delete(s)
+    _forget_lock(upload_id)
+    return stored
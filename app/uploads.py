@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# Largest proof accepted (bytes); existing proofs are 1-3 MB.
+PROOF_MAX_BYTES = int(os.getenv("PROOF_MAX_BYTES", str(8 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# extension -> content type the file's magic bytes must match
+PROOF_TYPES = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+}
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    url: str
+    sha256: str
+    size: int
+    content_type: str
+
+
+def sniff_content_type(head: bytes) -> str | None:
+    """Identify a proof by its leading bytes (extension alone is not trusted)."""
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def safe_filename(filename: str | None) -> str:
+    return (filename or "").replace("\\", "_").replace("/", "_")
+
+
+def proof_extension(filename: str | None) -> str:
+    ext = os.path.splitext(safe_filename(filename))[1].lower()
+    if ext not in PROOF_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported proof file type")
+    return ext
+
+
+def iter_validated_chunks(fileobj, *, expected_type: str, max_bytes: int | None = None):
+    """Yield fileobj in fixed-size chunks, enforcing type (first chunk) and size (every chunk).
+
+    An oversized or mislabelled upload is rejected without ever being buffered whole.
+    """
+    max_bytes = max_bytes or PROOF_MAX_BYTES
+    size = 0
+    first = True
+    while True:
+        chunk = fileobj.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if first:
+            if sniff_content_type(chunk[:16]) != expected_type:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Proof content does not match its file type",
+                )
+            first = False
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Proof file too large (max {max_bytes / (1024 * 1024):.1f} MB)",
+            )
+        yield chunk
+
+    if first:
+        raise HTTPException(status_code=400, detail="Proof file is empty")
+
+
+def hash_upload(fileobj, *, expected_type: str, max_bytes: int | None = None) -> tuple[str, int]:
+    """Validate and SHA-256 an upload without writing it anywhere; rewinds fileobj."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter_validated_chunks(fileobj, expected_type=expected_type, max_bytes=max_bytes):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def stream_to_temp(
+    fileobj,
+    *,
+    dest_dir: str,
+    expected_type: str,
+    max_bytes: int | None = None,
+) -> tuple[str, str, int]:
+    """Copy fileobj into a temp file inside dest_dir, validating and hashing on the fly.
+
+    Returns (temp_path, sha256_hex, size); the caller moves or deletes temp_path.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter_validated_chunks(fileobj, expected_type=expected_type, max_bytes=max_bytes):
+                size += len(chunk)
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return tmp_path, digest.hexdigest(), size
@@ -1,8 +1,36 @@
 #prazenza-backend/app/utils/attendance.py
 from datetime import date
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.models import Attendance, DailyAttendance, Timetable
+from app.models import Attendance, DailyAttendance, Student, Timetable
+
+
+def section_absentees_query(
+    db: Session,
+    *,
+    department: str,
+    year: str,
+    section: str,
+    day: date,
+):
+    """Students of a section with no DailyAttendance row for `day`, ordered by roll number.
+
+    This is the CR absent list's definition of "absent" (any daily row - Present,
+    OD or an approved Absent - counts as accounted for).
+    """
+    marked_ids = select(DailyAttendance.student_id).where(DailyAttendance.date == day)
+
+    return (
+        db.query(Student)
+        .filter(
+            Student.department == department,
+            Student.year == year,
+            Student.section == section,
+            ~Student.id.in_(marked_ids),
+        )
+        .order_by(Student.roll_number)
+    )
 
 
 def auto_mark_daily_attendance(
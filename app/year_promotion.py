@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from sqlalchemy import case, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models import (
+    AbsenceRequest,
+    Admin,
+    CRAssignment,
+    GrievanceRequest,
+    ODRequest,
+    Student,
+    StudentAttendanceBitmap,
+)
+from app.report_cache import bump_all_versions
+from app.semester_year_utils import YEAR_ADVANCE_MAP
+
+
+Section = tuple[str, str, str]
+
+# years that actually change (IV stays IV)
+MOVING_YEARS = tuple(y for y, nxt in YEAR_ADVANCE_MAP.items() if nxt != y)
+
+# (label, model, extra filter) moved together so every section key stays consistent.
+# Open requests follow the student to the next year's CR/admin; decided ones keep
+# the year they were raised in.
+_TABLES = (
+    ("students", Student, None),
+    ("admins", Admin, None),
+    ("cr_assignments", CRAssignment, None),
+    ("od_requests", ODRequest, lambda m: m.status == "PENDING"),
+    ("absence_requests", AbsenceRequest, lambda m: m.status == "PENDING"),
+    ("grievance_requests", GrievanceRequest, lambda m: m.status.in_(("OPEN", "UNDER_REVIEW"))),
+)
+
+
+class PromotionConflict(Exception):
+    """Promotion would put two admins on one section."""
+
+    def __init__(self, conflicts: list[dict]):
+        super().__init__("target sections already have an admin")
+        self.conflicts = conflicts
+
+
+def _next_year(column):
+    return case(
+        *[(column == y, YEAR_ADVANCE_MAP[y]) for y in MOVING_YEARS],
+        else_=column,
+    )
+
+
+def _scope(model, department: str, section: str | None, years: list[str] | None, extra):
+    moving = [y for y in (years or MOVING_YEARS) if y in MOVING_YEARS]
+    clauses = [model.department == department, model.year.in_(moving)]
+    if section is not None:
+        clauses.append(model.section == section)
+    if extra is not None:
+        clauses.append(extra(model))
+    return clauses
+
+
+def admin_conflicts(
+    db: Session,
+    department: str,
+    *,
+    section: str | None = None,
+    years: list[str] | None = None,
+) -> list[dict]:
+    """Admins already on a section a moving admin would be promoted into (and not moving themselves).
+
+    IV stays IV, so promoting III always needs the IV admin to leave first.
+    """
+    moving = db.execute(
+        select(Admin.admin_id, Admin.department, Admin.year, Admin.section)
+        .where(*_scope(Admin, department, section, years, None))
+    ).all()
+    if not moving:
+        return []
+    targets = {(dept, YEAR_ADVANCE_MAP[year], sec): admin_id for admin_id, dept, year, sec in moving}
+    rows = db.execute(
+        select(Admin.admin_id, Admin.department, Admin.year, Admin.section).where(
+            tuple_(Admin.department, Admin.year, Admin.section).in_(list(targets)),
+            Admin.admin_id.not_in([admin_id for admin_id, *_ in moving]),
+        )
+    ).all()
+    return [
+        {
+            "admin_id": admin_id,
+            "department": dept,
+            "year": year,
+            "section": sec,
+            "incoming_admin_id": targets[(dept, year, sec)],
+        }
+        for admin_id, dept, year, sec in rows
+    ]
+
+
+def promotion_preview(
+    db: Session,
+    department: str,
+    *,
+    section: str | None = None,
+    years: list[str] | None = None,
+) -> dict:
+    """Rows each table would move, per source year: one grouped COUNT per table."""
+    tables = {}
+    for label, model, extra in _TABLES:
+        rows = db.execute(
+            select(model.year, func.count())
+            .where(*_scope(model, department, section, years, extra))
+            .group_by(model.year)
+        ).all()
+        tables[label] = {year: count for year, count in rows}
+    return {
+        "year_map": {y: YEAR_ADVANCE_MAP[y] for y in MOVING_YEARS if not years or y in years},
+        "tables": tables,
+        "total": sum(sum(by_year.values()) for by_year in tables.values()),
+        "admin_conflicts": admin_conflicts(db, department, section=section, years=years),
+    }
+
+
+def promote_years(
+    db: Session,
+    department: str,
+    *,
+    section: str | None = None,
+    years: list[str] | None = None,
+) -> dict[str, int]:
+    """Advance every in-scope row by one year: one UPDATE ... SET year = CASE per table.
+
+    The caller commits. Semester rows, calendar bitmaps and report versions stay
+    keyed by section (they describe the class, not the cohort); the moved
+    students' bitmaps are dropped and rebuilt lazily against their new section.
+    Raises PromotionConflict, before writing anything, if a moving admin would
+    land on a section that keeps its own admin.
+    """
+    conflicts = admin_conflicts(db, department, section=section, years=years)
+    if conflicts:
+        raise PromotionConflict(conflicts)
+
+    sources: set[Section] = {
+        tuple(row)
+        for row in db.execute(
+            select(Student.department, Student.year, Student.section)
+            .where(*_scope(Student, department, section, years, None))
+            .distinct()
+        )
+    }
+
+    moved_students = select(Student.id).where(*_scope(Student, department, section, years, None))
+    db.query(StudentAttendanceBitmap).filter(
+        StudentAttendanceBitmap.student_id.in_(moved_students)
+    ).delete(synchronize_session=False)
+
+    updated = {}
+    for label, model, extra in _TABLES:
+        result = db.execute(
+            update(model)
+            .where(*_scope(model, department, section, years, extra))
+            .values(year=_next_year(model.year))
+            .execution_options(synchronize_session=False)
+        )
+        updated[label] = result.rowcount
+
+    # rosters changed on both sides: cached reports of the old and new sections are stale
+    for dept, year, sec in sources:
+        bump_all_versions(db, (dept, year, sec))
+        bump_all_versions(db, (dept, YEAR_ADVANCE_MAP[year], sec))
+    return updated
+
+
+if __name__ == "__main__":
+    # department-wide year-end promotion, run by an operator (dry run unless --apply):
+    #   python -m app.year_promotion CSE --years I II III --apply
+    import argparse
+
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Advance a department's students, admins and open requests by one year")
+    parser.add_argument("department")
+    parser.add_argument("--section", default=None, help="one section letter instead of every section")
+    parser.add_argument("--years", nargs="+", choices=list(YEAR_ADVANCE_MAP), default=None)
+    parser.add_argument("--apply", action="store_true", help="write the changes (default: only count them)")
+    args = parser.parse_args()
+
+    _db = SessionLocal()
+    try:
+        print(promotion_preview(_db, args.department, section=args.section, years=args.years))
+        if args.apply:
+            try:
+                print(promote_years(_db, args.department, section=args.section, years=args.years))
+            except PromotionConflict as e:
+                raise SystemExit(f"refused: {e}: {e.conflicts}")
+            _db.commit()
+    finally:
+        _db.close()
@@ -0,0 +1,125 @@
+"""Section analytics: the old per-student ORM loop vs app.attendance_matrix on synthetic data.
+
+    python -m benchmarks.bench_attendance_matrix --students 500 --days 120
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def legacy_report(db, models, department, year, section):
+    """attendance_report as it was: one COUNT query per student, streaks walked in Python."""
+    Student, DailyAttendance = models.Student, models.DailyAttendance
+    from sqlalchemy import distinct, func
+
+    students = db.query(Student).filter(
+        Student.department == department,
+        Student.year == year,
+        Student.section == section,
+    ).all()
+    working_days = db.query(func.count(distinct(DailyAttendance.date))).scalar() or 0
+
+    report = []
+    for s in students:
+        present_days = db.query(DailyAttendance).filter(
+            DailyAttendance.student_id == s.id,
+            DailyAttendance.status == "PRESENT",
+        ).count()
+        history = (
+            db.query(DailyAttendance.status)
+            .filter(DailyAttendance.student_id == s.id)
+            .order_by(DailyAttendance.date)
+            .all()
+        )
+        longest = run = 0
+        for (status,) in history:
+            run = run + 1 if status == "ABSENT" else 0
+            longest = max(longest, run)
+        report.append((s.roll_number, round(present_days / working_days * 100, 2), longest))
+    return report
+
+
+def matrix_report(db, department, year, section, start, end):
+    from app.attendance_matrix import load_section_matrix
+
+    m = load_section_matrix(db, department=department, year=year, section=section, start=start, end=end)
+    longest, _ = m.absence_streaks()
+    return list(zip(m.rolls, m.percentages().tolist(), longest.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_matrix.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from app.database import SessionLocal, engine
+    from app import models
+
+    engine.echo = False
+    models.Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    db.bulk_insert_mappings(
+        models.Student,
+        [
+            {
+                "roll_number": f"BENCH{i:06d}",
+                "name": f"Student {i}",
+                "department": "BENCH",
+                "year": "I",
+                "section": "A",
+                "mobile": f"9{i:09d}",
+                "is_cr": False,
+            }
+            for i in range(args.students)
+        ],
+    )
+    ids = [sid for (sid,) in db.query(models.Student.id)]
+    start = date.today() - timedelta(days=args.days - 1)
+    rng = random.Random(42)
+    rows = []
+    for offset in range(args.days):
+        day = start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for sid in ids:
+            status = rng.choices(("PRESENT", "ABSENT", "OD"), weights=(85, 12, 3))[0]
+            rows.append({"student_id": sid, "date": day, "status": status, "source": "BENCH"})
+    db.bulk_insert_mappings(models.DailyAttendance, rows)
+    db.commit()
+    print(f"{len(ids)} students, {args.days} days, {len(rows)} daily marks")
+
+    legacy = matrix = None
+    for label, fn in (
+        ("ORM loop", lambda: legacy_report(db, models, "BENCH", "I", "A")),
+        ("attendance_matrix", lambda: matrix_report(db, "BENCH", "I", "A", start, date.today())),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            db.expire_all()
+            t0 = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - t0)
+        print(f"{label:<20} best of {args.repeat}: {best * 1000:8.1f} ms")
+        if legacy is None:
+            legacy = result
+        else:
+            matrix = result
+
+    assert legacy == matrix, "results differ"
+    print("results identical")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""PDF report throughput: pages/second for a roster, old per-page drawing vs app.pdf_reports.
+
+    python -m benchmarks.bench_pdf_reports --students 500 --reports 20 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from io import BytesIO
+
+_PAGE_OBJECT = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def _page_count(pdf: bytes) -> int:
+    return len(_PAGE_OBJECT.findall(pdf))
+
+
+def legacy_render(rows, scope) -> bytes:
+    """The pre-pdf_reports approach: logos re-read from disk on every page."""
+    from reportlab import rl_config
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+
+    from app.pdf_reports import MINDURA_LOGO, PRESENZA_LOGO
+
+    def header(c, width, height):
+        if os.path.exists(PRESENZA_LOGO):
+            c.saveState()
+            c.setFillAlpha(0.08)
+            c.drawImage(PRESENZA_LOGO, width / 2 - 6 * cm, height / 2 - 6 * cm, width=12 * cm, height=12 * cm, mask="auto")
+            c.restoreState()
+        if os.path.exists(MINDURA_LOGO):
+            c.drawImage(MINDURA_LOGO, width / 2 - 1.5 * cm, height - 3 * cm, width=3 * cm, height=3 * cm, mask="auto")
+        c.setFont("Helvetica-Bold", 14)
+        c.drawCentredString(width / 2, height - 5 * cm, "ABSENTEE REPORT")
+        c.setFont("Helvetica", 10)
+        c.drawString(2 * cm, height - 6 * cm, f"Department : {scope.department}")
+        return height - 8 * cm
+
+    use_a85, rl_config.useA85 = rl_config.useA85, 1  # reportlab's default, as before
+    try:
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        y = header(c, width, height)
+        for roll, name in rows:
+            if y < 3 * cm:
+                c.showPage()
+                y = header(c, width, height)
+            c.drawString(2 * cm, y, roll)
+            c.drawString(7 * cm, y, name)
+            y -= 0.4 * cm
+        c.save()
+        return buffer.getvalue()
+    finally:
+        rl_config.useA85 = use_a85
+
+
+def _run(label, fn, reports, pages_per_report):
+    start = time.perf_counter()
+    sizes = fn()
+    elapsed = time.perf_counter() - start
+    pages = reports * pages_per_report
+    print(
+        f"{label:<28} {reports} reports x {pages_per_report} pages in {elapsed:.2f}s "
+        f"-> {pages / elapsed:7.1f} pages/s, {reports / elapsed:6.1f} reports/s, "
+        f"{sum(sizes) / len(sizes) / 1024:.0f} KB/report"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--reports", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ["PDF_RENDER_WORKERS"] = str(args.workers)
+    from app import pdf_reports
+    from app.pdf_reports import ReportColumn, ReportScope, render_report, render_roster_pdf
+
+    scope = ReportScope("CSE", "II", "A", date.today())
+    columns = [ReportColumn("Roll Number", 2), ReportColumn("Name", 7)]
+    rows = [(f"2117240070{i:03d}", f"Student Name {i}") for i in range(args.students)]
+
+    pages = _page_count(render_roster_pdf("ABSENTEE REPORT", scope, columns, rows))
+    legacy_pages = _page_count(legacy_render(rows, scope))
+
+    _run(
+        "legacy (per-page drawImage)",
+        lambda: [len(legacy_render(rows, scope)) for _ in range(args.reports)],
+        args.reports,
+        legacy_pages,
+    )
+    _run(
+        "pdf_reports inline",
+        lambda: [len(render_roster_pdf("ABSENTEE REPORT", scope, columns, rows)) for _ in range(args.reports)],
+        args.reports,
+        pages,
+    )
+
+    # concurrent requests, as the web threadpool would issue them
+    render_report("ABSENTEE REPORT", scope, columns, rows[:10])  # warm the pool
+    with ThreadPoolExecutor(max_workers=args.workers * 2) as clients:
+        _run(
+            f"pdf_reports pool ({pdf_reports.PDF_RENDER_WORKERS} procs)",
+            lambda: list(
+                clients.map(
+                    lambda _: len(render_report("ABSENTEE REPORT", scope, columns, rows)),
+                    range(args.reports),
+                )
+            ),
+            args.reports,
+            pages,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Load benchmark: absentee SMS through the real twilio client against the fake server.
+
+    python -m benchmarks.bench_sms_alerts --students 5000 --workers 16 --rate 0 --fail-every 100
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0, help="messages/second limit (0 = unlimited)")
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_sms.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from app.database import SessionLocal, engine
+    from app import models, sms_alerts
+    from app.fake_twilio import start_fake_twilio
+
+    engine.echo = False
+    models.Base.metadata.create_all(bind=engine)
+    sms_alerts.SMS_WORKERS = args.workers
+    sms_alerts.SMS_RATE_PER_SECOND = args.rate
+
+    db = SessionLocal()
+    db.bulk_insert_mappings(
+        models.Student,
+        [
+            {
+                "roll_number": f"BENCH{i:06d}",
+                "name": f"Student {i}",
+                "department": "BENCH",
+                "year": "I",
+                "section": "A",
+                "mobile": f"9{i:09d}",
+                "is_cr": False,
+            }
+            for i in range(args.students)
+        ],
+    )
+    # alerts only go out on class days: the section needs an admin with a slot today and a taken register
+    db.add(models.Admin(admin_id="ADMIN_BENCH_I_A", department="BENCH", year="I", section="A", password_hash="-"))
+    db.add(models.Timetable(day=date.today().strftime("%A"), admin_id="ADMIN_BENCH_I_A"))
+    cr = models.Student(
+        roll_number="BENCHCR", name="Bench CR", department="BENCH", year="I", section="A", mobile="", is_cr=True
+    )
+    db.add(cr)
+    db.flush()
+    db.add(models.DailyAttendance(student_id=cr.id, date=date.today(), status="Present", source="CR_SCAN"))
+    db.commit()
+
+    server = start_fake_twilio(fail_every=args.fail_every)
+    transport = sms_alerts.TwilioTransport("ACbench", "token", "+15005550006", base_url=server.base_url)
+
+    started = time.perf_counter()
+    report = sms_alerts.send_section_absentee_alerts(
+        db, department="BENCH", year="I", section="A", day=date.today(), transport=transport
+    )
+    elapsed = time.perf_counter() - started
+
+    print(report)
+    print(f"{report['sent']} sent in {elapsed:.2f}s -> {report['sent'] / elapsed:.0f} msg/s "
+          f"({len(server.messages)} accepted by fake server, {server.requests} requests)")
+    db.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()